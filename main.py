@@ -8,11 +8,15 @@ import argparse
 import os
 import sys
 
-from src.core.lexer import Lexer
-from src.core.parser import Parser
 from src.core.version import VERSION
-from src.runtime.interpreter import Interpreter
-from src.runtime.shell import SoplangShell
+
+
+def create_shell():
+    """Create the interactive shell; imported only when it is needed, since
+    it loads readline and colorama and sets up the history file"""
+    from src.runtime.shell import SoplangShell
+
+    return SoplangShell()
 
 
 def main():
@@ -30,6 +34,14 @@ def main():
         python main.py -e 1              # Run example number 1
         python main.py -c 'qor("Hello")' # Execute code snippet
         python main.py -v                # Display version information
+        python main.py --tree-walk f.sop # Run with the reference tree walker
+        python main.py --vm f.sop        # Run on the bytecode VM (.sopc cache)
+        python main.py --check f.sop     # Report undefined names without running
+        python main.py -O f.sop          # Optimize the AST first, print node counts
+        python main.py -p lib f.sop      # Also look for ka_keen files in lib/
+        python main.py --profile f.sop   # Report time per hawl and hits per line
+        python main.py --sample out.folded f.sop  # Sample stacks for a flamegraph
+        python main.py --max-depth 500000 f.sop   # Allow deeper recursion
     """
     # Setup command line argument parser
     parser = argparse.ArgumentParser(description="Soplang Programming Language")
@@ -52,13 +64,92 @@ def main():
     parser.add_argument(
         "-c", "--command", metavar="CODE", help="Execute Soplang code snippet"
     )
+    parser.add_argument(
+        "--tree-walk",
+        action="store_true",
+        help="Use the reference tree-walking interpreter instead of the compiler",
+    )
+    parser.add_argument(
+        "--vm",
+        action="store_true",
+        help="Run on the bytecode virtual machine, caching bytecode in __sopcache__",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report undefined variables in a file without running it",
+    )
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="Fold constants and remove dead code before running; "
+        "prints the AST node counts before and after",
+    )
+    parser.add_argument(
+        "-p",
+        "--path",
+        action="append",
+        dest="search_path",
+        metavar="DIR",
+        help="Directory to search for ka_keen files after the importing file's "
+        "own directory (repeatable; SOPLANG_PATH is searched too)",
+    )
+    parser.add_argument(
+        "--max-depth",
+        metavar="N",
+        type=int,
+        help="Levels deep hawl calls may nest below the outermost one before "
+        "the program stops with an error; tail calls do not count "
+        "(default: 100000). Without --vm, recursion also stops somewhere "
+        "past 100000 levels, where the Python stack runs out",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-hawl call counts and times and per-line hit counts "
+        "to stderr after running",
+    )
+    parser.add_argument(
+        "--profile-sort",
+        default="tottime",
+        choices=("tottime", "cumtime", "calls", "name", "line"),
+        help="Column the --profile report is sorted by (default: tottime)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="Also write the --profile data to FILE: JSON if it ends in "
+        ".json, pstats format otherwise",
+    )
+    parser.add_argument(
+        "--sample",
+        metavar="FILE",
+        help="Sample the Soplang call stack while running and write it to "
+        "FILE as folded stacks for flamegraph tools",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        metavar="MS",
+        type=float,
+        help="Milliseconds between --sample samples (default: 5)",
+    )
     parser.add_argument("filename", nargs="?", help="Soplang file to execute")
 
     # Parse arguments
     args = parser.parse_args()
-
-    # Create shell instance
-    shell = SoplangShell()
+    # Asking for a profile file implies --profile
+    args.profile = args.profile or args.profile_output is not None
+    if args.vm and (args.profile or args.sample):
+        parser.error(
+            "--profile and --sample run on the compiler or --tree-walk, not --vm"
+        )
+    if args.profile and args.sample:
+        parser.error("--profile and --sample cannot be used together")
+    if args.sample_interval is not None:
+        args.sample_interval /= 1000
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.error("--max-depth must be at least 1")
 
     # Display version information if requested
     if args.version:
@@ -70,12 +161,27 @@ def main():
 
     # Execute code snippet if provided
     if args.command:
+        from src.runtime.main import run_soplang_code
+
         # No decorative header - just execute the code directly
-        shell.execute_code(args.command)
+        run_soplang_code(
+            args.command,
+            tree_walk=args.tree_walk,
+            vm=args.vm,
+            optimize=args.optimize,
+            search_path=args.search_path,
+            profile=args.profile,
+            profile_sort=args.profile_sort,
+            profile_output=args.profile_output,
+            sample=args.sample,
+            sample_interval=args.sample_interval,
+            max_depth=args.max_depth,
+        )
         return 0
 
     # Run example if requested
     if args.example is not None:
+        shell = create_shell()
         # Load example list
         shell.list_examples("")
         if not shell.last_examples_list:
@@ -94,7 +200,13 @@ def main():
             "examples",
             example_file,
         )
-        shell.run_file(example_path)
+        shell.run_file(
+            example_path,
+            tree_walk=args.tree_walk,
+            vm=args.vm,
+            optimize=args.optimize,
+            search_path=args.search_path,
+        )
 
         # Start interactive shell afterward if requested
         if args.interactive:
@@ -104,18 +216,37 @@ def main():
 
     # Handle file if provided (either through --file or positional argument)
     filename = args.file or args.filename
+    if filename and args.check:
+        from src.runtime.main import check_soplang_file
+
+        return check_soplang_file(filename)
+
     if filename:
-        # Remove redundant "Running file" message as it's handled in run_file
-        shell.run_file(filename)
+        # Run the file without the shell, so startup stays fast
+        from src.runtime.main import run_soplang_file
+
+        run_soplang_file(
+            filename,
+            tree_walk=args.tree_walk,
+            vm=args.vm,
+            optimize=args.optimize,
+            search_path=args.search_path,
+            profile=args.profile,
+            profile_sort=args.profile_sort,
+            profile_output=args.profile_output,
+            sample=args.sample,
+            sample_interval=args.sample_interval,
+            max_depth=args.max_depth,
+        )
 
         # Start interactive shell afterward if requested
         if args.interactive:
-            shell.run()
+            create_shell().run()
 
         return 0
 
     # No specific command given, start interactive shell
-    shell.run()
+    create_shell().run()
     return 0
 
 
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Soplang arithmetic benchmark.
+
+Runs small numeric kernels in a kuceli loop on the closure compiler, the VM
+and the tree walker: an int kernel of +, *, % and -, a float series of / and
++, int comparisons and a string concatenation. Every binary operation keeps
+seeing the same operand types, so the tree walker runs each one quickened
+to its int, float or string specialization after its first evaluation.
+
+Usage:
+    python scripts/benchmark/bench_arithmetic.py [iterations]
+"""
+
+import sys
+
+from harness import ENGINES, run
+
+PROGRAM = """
+hawl kernel(n) {{
+    door s = {start}
+    kuceli (i 1 ilaa n) {{
+        {body}
+    }}
+    celi s
+}}
+qor(kernel({n}))
+"""
+
+
+def leibniz(n):
+    """The float kernel, adding its terms in the same order"""
+    s = 0.0
+    for i in range(1, n + 1):
+        s = s + 4.0 / (4 * i - 3) - 4.0 / (4 * i - 1)
+    return s
+
+
+# (initial value of s, loop body, Python equivalent of kernel(n))
+KERNELS = {
+    "int": (
+        "0",
+        "s = s + i * i % 7 - 3",
+        lambda n: sum(i * i % 7 - 3 for i in range(1, n + 1)),
+    ),
+    "float": (
+        "0.0",
+        "s = s + 4.0 / (4 * i - 3) - 4.0 / (4 * i - 1)",
+        leibniz,
+    ),
+    "compare": (
+        "0",
+        "haddii (i % 3 == 0 && i > 10 || i <= 5) {\n            s = s + 1\n        }",
+        lambda n: sum(
+            1 for i in range(1, n + 1) if i % 3 == 0 and i > 10 or i <= 5
+        ),
+    ),
+    "string": (
+        '""',
+        's = "k" + i',
+        lambda n: f"k{n}",
+    ),
+}
+
+
+def compute(engine, kernel, n):
+    """Seconds engine takes for n iterations of kernel; checks the result"""
+    start, body, expected = KERNELS[kernel]
+    result = run(PROGRAM.format(n=n, start=start, body=body), engine)
+    assert result.output.strip() == str(expected(n)), result.output
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"=== Soplang: {n} iterations per kernel, ns per loop iteration ===\n")
+    print(f"{'kernel':>10}" + "".join(f"{engine:>11}" for engine in ENGINES))
+    for kernel in KERNELS:
+        times = [compute(engine, kernel, n) / n * 1e9 for engine in ENGINES]
+        print(f"{kernel:>10}" + "".join(f"{ns:>11.0f}" for ns in times))
+
+
+if __name__ == "__main__":
+    main()
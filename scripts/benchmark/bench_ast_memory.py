@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Soplang AST and token memory benchmark.
+
+Parses a generated data file (see bench_lexer.py), then copies its tokens
+and AST twice: once into Token and ASTNode, and once into plain classes
+with a per-instance __dict__ and a fresh children list per node, the
+layout Token and ASTNode had before they used __slots__. The copies share
+their values, so the memory each one retains (measured with tracemalloc)
+is the cost of the representation alone, reported in bytes per token and
+per node.
+
+Usage:
+    python scripts/benchmark/bench_ast_memory.py [megabytes]
+"""
+
+import sys
+import tracemalloc
+
+import harness  # noqa: F401  (puts the repository root on sys.path)
+from bench_lexer import generate_data
+from src.core.ast import ASTNode
+from src.core.lexer import Lexer, Token
+from src.core.parser import Parser
+
+
+class DictToken:
+    def __init__(self, type_, value, line=None, position=None):
+        self.type = type_
+        self.value = value
+        self.line = line
+        self.position = position
+
+
+class DictASTNode:
+    def __init__(self, type_, value=None, children=None, line=None, position=None):
+        self.type = type_
+        self.value = value
+        self.children = children if children else []
+        self.var_type = None
+        self.is_constant = False
+        self.line = line
+        self.position = position
+
+
+def copy_tokens(tokens, token_class):
+    return [token_class(t.type, t.value, t.line, t.position) for t in tokens]
+
+
+def copy_tree(node, node_class):
+    copy = node_class(
+        node.type,
+        node.value,
+        [copy_tree(child, node_class) for child in node.children],
+        node.line,
+        node.position,
+    )
+    copy.var_type = node.var_type
+    copy.is_constant = node.is_constant
+    return copy
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def retained(build, *args):
+    """Return (result, bytes still allocated after build(*args) returns)"""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    source = generate_data(megabytes)
+    tokens = Lexer(source).tokenize()
+    ast = Parser(tokens).parse()
+    nodes = count_nodes(ast)
+    copies = []  # Keeps every copy alive until the end
+    sizes = {}
+    for name, build, args in (
+        ("old tokens", copy_tokens, (tokens, DictToken)),
+        ("tokens", copy_tokens, (tokens, Token)),
+        ("old nodes", copy_tree, (ast, DictASTNode)),
+        ("nodes", copy_tree, (ast, ASTNode)),
+    ):
+        copy, sizes[name] = retained(build, *args)
+        copies.append(copy)
+
+    print("=== Soplang token and AST memory ===\n")
+    print(f"source: {len(source) / (1024 * 1024):.1f} MB, "
+          f"{len(tokens)} tokens, {nodes} nodes\n")
+    print(f"{'':>8} {'__dict__ (B)':>13} {'__slots__ (B)':>14} {'saved':>7}")
+    for name, count in (("token", len(tokens)), ("node", nodes)):
+        old, new = sizes[f"old {name}s"], sizes[f"{name}s"]
+        print(
+            f"{name:>8} {old / count:>13.0f} {new / count:>14.0f} "
+            f"{1 - new / old:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Soplang call-cost scaling benchmark.
+
+Measures the average cost of calling a user-defined hawl while the number of
+global variables grows. With scope environments the per-call cost should stay
+flat instead of growing with the size of the global scope.
+
+Usage:
+    python scripts/benchmark/bench_call_scaling.py [calls]
+"""
+
+import sys
+import time
+
+from harness import parse
+from src.runtime.interpreter import Interpreter
+
+GLOBAL_COUNTS = (10, 100, 1000, 5000)
+
+
+def measure(num_globals, calls):
+    """Return the average seconds per call with num_globals globals defined"""
+    setup = "\n".join(f"door g{i} = {i}" for i in range(num_globals))
+    setup += "\nhawl labalaab(x) {\n    celi x * 2\n}\n"
+    calls_program = f"kuceli (i 1 ilaa {calls}) {{\n    labalaab(i)\n}}\n"
+
+    interpreter = Interpreter()
+    interpreter.interpret(parse(setup))
+    program = parse(calls_program)
+
+    start = time.perf_counter()
+    interpreter.interpret(program)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("=== Soplang call cost vs. global scope size ===")
+    print(f"Calls per run: {calls}\n")
+    print(f"{'globals':>10} {'us/call':>12}")
+    baseline = None
+    for count in GLOBAL_COUNTS:
+        per_call = measure(count, calls)
+        baseline = baseline or per_call
+        print(f"{count:>10} {per_call * 1e6:>12.2f}  ({per_call / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
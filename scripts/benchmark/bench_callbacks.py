@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Soplang callback benchmark.
+
+Measures how many list elements per second shaandhee (filter) and aaddin
+(map) get through when they call a hawl for every element, with the hawl
+passed as a value and by name, on the closure compiler and the tree
+walker. Each call only binds the hawl's parameter frame, so the rate
+should not depend on how many variables the program has defined.
+
+Usage:
+    python scripts/benchmark/bench_callbacks.py [elements]
+"""
+
+import sys
+
+from harness import run
+
+SETUP = """
+hawl waa_dhaban(n) {{
+    celi n % 2 == 0
+}}
+hawl labanlaab(n) {{
+    celi n * 2
+}}
+door liis = baaxad(0, {n})
+"""
+
+# Globals that a call would have to copy if it captured the whole scope
+PADDING = "".join(f"door qiime{i} = {i}\n" for i in range(500))
+
+CALLS = {
+    "shaandhee(hawl)": "door natiijo = liis.shaandhee(waa_dhaban)",
+    "aaddin(hawl)": "door natiijo = liis.aaddin(labanlaab)",
+    'aaddin("hawl")': 'door natiijo = liis.aaddin("labanlaab")',
+}
+
+
+def rate(call, n, engine, padding=""):
+    """Elements per second for one run of call over an n-element list"""
+    result = run(call + "\n", engine, setup=SETUP.format(n=n) + padding)
+    return n / result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"=== Soplang callbacks: elements per second over {n} elements ===\n")
+    print(
+        f"{'call':>18} {'closures':>11} {'+500 globals':>13} {'tree walk':>11}"
+    )
+    for name, call in CALLS.items():
+        compiled = rate(call, n, "closures")
+        padded = rate(call, n, "closures", PADDING)
+        walked = rate(call, n, "tree walk")
+        print(f"{name:>18} {compiled:>11,.0f} {padded:>13,.0f} {walked:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Soplang control flow benchmark.
+
+Times loop-heavy programs that use soco and jooji and call-heavy programs
+that celi from small functions. The tree walker still raises BreakSignal,
+ContinueSignal and ReturnSignal; the closure compiler returns completion
+values instead, so the gap between the two columns is mostly the cost of
+raising and catching those exceptions.
+
+Usage:
+    python scripts/benchmark/bench_control_flow.py [repeat]
+"""
+
+import sys
+
+from harness import best_of, parse
+from src.runtime.interpreter import Interpreter
+
+PROGRAMS = {
+    "soco": """
+door wadar = 0
+kuceli (i 1 ilaa 100000) {
+    haddii (i % 2 == 0) {
+        soco
+    }
+    wadar = wadar + i
+}
+""",
+    "jooji": """
+door tirinta = 0
+kuceli (i 1 ilaa 2000) {
+    kuceli (j 1 ilaa 100) {
+        haddii (j > 40) {
+            jooji
+        }
+        tirinta = tirinta + 1
+    }
+}
+""",
+    "celi": """
+hawl ugu_weyn(a, b) {
+    haddii (a > b) {
+        celi a
+    }
+    celi b
+}
+door wadar = 0
+kuceli (i 1 ilaa 50000) {
+    wadar = wadar + ugu_weyn(i, 25000)
+}
+""",
+    "fib": """
+hawl fib(n) {
+    haddii (n < 2) {
+        celi n
+    }
+    celi fib(n - 1) + fib(n - 2)
+}
+door natiijo = fib(20)
+""",
+}
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print("=== Soplang control flow: exceptions vs. completion values ===\n")
+    print(f"{'program':>10} {'tree walk (s)':>15} {'closures (s)':>14} {'speedup':>9}")
+    for name, source in PROGRAMS.items():
+        ast = parse(source)
+        tree_walk = best_of(lambda: Interpreter(tree_walk=True).interpret(ast), repeat)
+        closures = best_of(lambda: Interpreter().interpret(ast), repeat)
+        print(
+            f"{name:>10} {tree_walk:>15.3f} {closures:>14.3f} "
+            f"{tree_walk / closures:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
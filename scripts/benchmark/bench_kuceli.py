@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Soplang kuceli loop benchmark.
+
+Runs two nested kuceli loops for ten million iterations in all, with a
+body that only adds the inner counter to a total. With int bounds and step
+the counters come from a native range; the same loops with a float step
+of 1.0 are counted with += on every iteration, as all loops were before.
+The tree walker runs a tenth of the iterations.
+
+Usage:
+    python scripts/benchmark/bench_kuceli.py [iterations]
+"""
+
+import sys
+
+from harness import ENGINES, run
+
+OUTER = 1000
+
+PROGRAM = """
+hawl wareeg() {{
+    door wadar = 0
+    kuceli (i 1 ilaa {outer} :: {step}) {{
+        kuceli (j 1 ilaa {inner} :: {step}) {{
+            wadar = wadar + j
+        }}
+    }}
+    celi wadar
+}}
+qor(wareeg())
+"""
+
+# The tree walker runs a tenth of the iterations
+DIVISORS = {"closures": 1, "vm": 1, "tree walk": 10}
+
+
+def loop(engine, n, step):
+    """Seconds engine takes for about n iterations; checks the printed total"""
+    inner = n // DIVISORS[engine] // OUTER
+    result = run(PROGRAM.format(outer=OUTER, inner=inner, step=step), engine)
+    total = OUTER * inner * (inner + 1) // 2
+    assert float(result.output) == total, result.output
+    return OUTER * inner, result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"=== Soplang: nested kuceli loops, {n} iterations ===\n")
+    print(
+        f"{'engine':>10} {'iterations':>11} {'int step':>9} "
+        f"{'float step':>11} {'speedup':>8}"
+    )
+    for engine in ENGINES:
+        iterations, int_seconds = loop(engine, n, "1")
+        _, float_seconds = loop(engine, n, "1.0")
+        print(
+            f"{engine:>10} {iterations:>11} {int_seconds:>9.3f} "
+            f"{float_seconds:>11.3f} {float_seconds / int_seconds:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Soplang lexer benchmark.
+
+Generates a large data file (a long list of object literals, the shape of
+machine-written Soplang data) and reports how many tokens per second
+Lexer.tokenize produces for it and for the concatenated examples.
+
+Usage:
+    python scripts/benchmark/bench_lexer.py [megabytes] [repeat]
+"""
+
+import glob
+import os
+import sys
+import time
+
+from harness import ROOT
+from src.core.lexer import Lexer
+
+
+def generate_data(megabytes):
+    """Return a Soplang source of roughly the given size in megabytes"""
+    lines = ["// Xog la sameeyay", "door xog = ["]
+    size = 0
+    index = 0
+    while size < megabytes * 1024 * 1024:
+        line = (
+            f'    {{magac: "arday_{index}", da: {18 + index % 40}, '
+            f"celcelis: {index % 100}.{index % 7}, ansixiyay: run}},"
+        )
+        lines.append(line)
+        size += len(line) + 1
+        index += 1
+    lines.append("]")
+    lines.append("qor(xog.dherer())")
+    return "\n".join(lines) + "\n"
+
+
+def examples_source():
+    paths = sorted(glob.glob(os.path.join(ROOT, "examples", "*.sop")))
+    parts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            parts.append(f.read())
+    return "\n".join(parts) + "\n"
+
+
+def best_of(source, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = Lexer(source).tokenize()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(tokens), best
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print("=== Soplang lexer throughput ===\n")
+    print(
+        f"{'input':>12} {'size (KB)':>10} {'tokens':>10} {'time (s)':>9} "
+        f"{'tokens/s':>12}"
+    )
+    inputs = {"examples": examples_source(), "data": generate_data(megabytes)}
+    for name, source in inputs.items():
+        count, elapsed = best_of(source, repeat)
+        print(
+            f"{name:>12} {len(source) // 1024:>10} {count:>10} "
+            f"{elapsed:>9.3f} {count / elapsed:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Soplang list building benchmark.
+
+Builds a list of one million elements in a kuceli loop with raaci, which
+appends in place in amortized constant time, and with kudar of a single
+item, which appends in place too. For comparison it also builds smaller
+lists the quadratic way, `liis = liis.kudar([i])`, which copies the whole
+list on every iteration; doubling its size roughly quadruples its time.
+
+Usage:
+    python scripts/benchmark/bench_list_append.py [elements]
+"""
+
+import sys
+
+from harness import run
+
+PROGRAMS = {
+    "raaci": """
+door liis = []
+kuceli (i 1 ilaa {n}) {{
+    liis.raaci(i)
+}}
+qor(liis.dherer())
+""",
+    "kudar(item)": """
+door liis = []
+kuceli (i 1 ilaa {n}) {{
+    liis.kudar(i)
+}}
+qor(liis.dherer())
+""",
+    "liis = kudar([i])": """
+door liis = []
+kuceli (i 1 ilaa {n}) {{
+    liis = liis.kudar([i])
+}}
+qor(liis.dherer())
+""",
+}
+
+
+def build(template, n):
+    """Seconds to run template built for n elements; checks the length"""
+    result = run(template.format(n=n))
+    assert result.output.strip() == str(n), result.output
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print("=== Soplang: building a list in a kuceli loop ===\n")
+    print(f"{'method':>18} {'elements':>10} {'seconds':>9} {'ns/element':>11}")
+    sizes = {
+        "raaci": [n],
+        "kudar(item)": [n],
+        # Quadratic: keep it small enough to finish
+        "liis = kudar([i])": [5_000, 10_000, 20_000],
+    }
+    for name, template in PROGRAMS.items():
+        for size in sizes[name]:
+            seconds = build(template, size)
+            print(
+                f"{name:>18} {size:>10} {seconds:>9.3f} "
+                f"{seconds / size * 1e9:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Soplang front end peak memory benchmark.
+
+Parses a generated data file (see bench_lexer.py) twice: once from the token
+list Lexer.tokenize builds up front, and once from the Lexer.iter_tokens
+stream the runtime uses. Peak memory is measured with tracemalloc, so the
+numbers count Python allocations only and the runs are slower than usual.
+
+Usage:
+    python scripts/benchmark/bench_memory.py [megabytes]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from bench_lexer import generate_data
+from harness import parse
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+
+MODES = {
+    "token list": parse,
+    "token stream": lambda source: Parser(Lexer(source).iter_tokens()).parse(),
+}
+
+
+def measure(build, source):
+    """Return (seconds, peak MB) for parsing source, AST included"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    ast = build(source)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del ast
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    source = generate_data(megabytes)
+    print("=== Soplang lexer + parser peak memory ===\n")
+    print(f"source: {len(source) / (1024 * 1024):.1f} MB\n")
+    print(f"{'mode':>14} {'time (s)':>9} {'peak (MB)':>10}")
+    for name, build in MODES.items():
+        elapsed, peak = measure(build, source)
+        print(f"{name:>14} {elapsed:>9.2f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
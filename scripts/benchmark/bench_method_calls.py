@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Soplang method call benchmark.
+
+Calls a builtin teed, qoraal and walax method in a kuceli loop, one million
+times each, on the closure compiler, the VM and the tree walker. Every call
+site keeps seeing the same receiver type, so after its first call each one
+is served by its inline cache. The last workload alternates a teed and a
+qoraal receiver at one call site, which misses on every call.
+
+Usage:
+    python scripts/benchmark/bench_method_calls.py [calls]
+"""
+
+import sys
+
+from harness import ENGINES, run
+
+PROGRAM = """
+hawl wareeg(shay, kale) {{
+    door tiro = 0
+    kuceli (i 1 ilaa {n}) {{
+        haddii (shay.leeyahay("a")) {{
+            tiro = tiro + 1
+        }}
+        {swap}
+    }}
+    celi tiro
+}}
+qor(wareeg({receiver}, {other}))
+"""
+
+SWAP = """door ku_meel = shay
+        shay = kale
+        kale = ku_meel"""
+
+WORKLOADS = {
+    "teed.leeyahay": ('["a", "b"]', "0", ""),
+    "qoraal.leeyahay": ('"abc"', "0", ""),
+    "walax.leeyahay": ("{a: 1}", "0", ""),
+    "teed/qoraal": ('["a"]', '"a"', SWAP),
+}
+
+
+def call(engine, workload, n):
+    """Seconds engine takes for n calls of workload; checks the result"""
+    receiver, other, swap = WORKLOADS[workload]
+    source = PROGRAM.format(n=n, receiver=receiver, other=other, swap=swap)
+    result = run(source, engine)
+    assert result.output.strip() == str(n), result.output
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"=== Soplang: {n} method calls per workload, ns per loop iteration ===\n")
+    print(f"{'workload':>16}" + "".join(f"{engine:>11}" for engine in ENGINES))
+    for workload in WORKLOADS:
+        times = [call(engine, workload, n) / n * 1e9 for engine in ENGINES]
+        print(f"{workload:>16}" + "".join(f"{ns:>11.0f}" for ns in times))
+
+
+if __name__ == "__main__":
+    main()
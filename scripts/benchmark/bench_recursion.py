@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Soplang recursion benchmark.
+
+Recurses to a given depth on the closure compiler, the VM and the tree
+walker, once through a call that is not in tail position (1 + tiri(n - 1))
+and once through a tail call (celi wareeg(n - 1, ...)). Each run gets a
+max_depth above the depth, so the non-tail recursion shows the cost of
+going deep and the tail recursion that of a chain of calls that reuse their
+frame.
+
+Usage:
+    python scripts/benchmark/bench_recursion.py [depth]
+"""
+
+import sys
+
+from harness import ENGINES, run
+
+PROGRAMS = {
+    "non-tail": """
+hawl tiri(n) {{
+    haddii (n == 0) {{
+        celi 0
+    }}
+    celi 1 + tiri(n - 1)
+}}
+qor(tiri({n}))
+""",
+    "tail": """
+hawl wareeg(n, wadar) {{
+    haddii (n == 0) {{
+        celi wadar
+    }}
+    celi wareeg(n - 1, wadar + 1)
+}}
+qor(wareeg({n}, 0))
+""",
+}
+
+
+def recurse(engine, program, n):
+    """Seconds engine takes to recurse n levels deep; checks the result"""
+    result = run(PROGRAMS[program].format(n=n), engine, max_depth=n + 10)
+    assert result.output.strip() == str(n), result.output
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"=== Soplang: recursion {n} calls deep, ns per call ===\n")
+    print(f"{'recursion':>10}" + "".join(f"{engine:>11}" for engine in ENGINES))
+    for program in PROGRAMS:
+        times = [recurse(engine, program, n) / n * 1e9 for engine in ENGINES]
+        print(f"{program:>10}" + "".join(f"{ns:>11.0f}" for ns in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Soplang interactive shell latency benchmark.
+
+Times SoplangShell.execute_code for a few typical REPL inputs, first in a
+fresh shell and then with hundreds of variables and functions already
+defined, to show that a line's cost does not grow with what is in scope.
+For reference it also times the old fallback, which wrote each line to a
+temporary file and ran it in a new Python process.
+
+Usage:
+    python scripts/benchmark/bench_repl.py [definitions]
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from harness import ROOT
+from src.runtime.shell import SoplangShell
+
+LINES = [
+    "door x = 5",
+    "x * 2 + 1",
+    "qor(x)",
+    "hawl labanlaab(n) {\n    celi n * 2\n}",
+    "qor(labanlaab(x))",
+]
+
+
+def define(shell, count):
+    """Give the shell count variables and count functions"""
+    for i in range(count):
+        shell.execute_code(f"door qiime{i} = {i}")
+        shell.execute_code(f"hawl hawl{i}(n) {{\n    celi n + qiime{i}\n}}")
+
+
+def time_lines(shell, repeat=200):
+    """Median milliseconds per execute_code call for each of LINES"""
+    results = []
+    for line in LINES:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            shell.execute_code(line)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        results.append(times[len(times) // 2] * 1000)
+    return results
+
+
+def time_subprocess(line):
+    """Milliseconds for running one line the way the old fallback did"""
+    with tempfile.NamedTemporaryFile("w", suffix=".sop", delete=False) as f:
+        f.write(line + "\n")
+    try:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "main.py"), f.name],
+            capture_output=True,
+        )
+        return (time.perf_counter() - start) * 1000
+    finally:
+        os.unlink(f.name)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # Keep the benchmark away from the user's ~/.soplang_history
+    with mock.patch.object(SoplangShell, "setup_history"):
+        fresh = SoplangShell()
+        loaded = SoplangShell()
+    with contextlib.redirect_stdout(io.StringIO()):
+        define(loaded, count)
+        fresh_times = time_lines(fresh)
+        loaded_times = time_lines(loaded)
+
+    print("=== Soplang shell: milliseconds per input line (median) ===\n")
+    print(f"{'input':>22} {'fresh':>8} {f'{count} defs':>10}")
+    for line, a, b in zip(LINES, fresh_times, loaded_times):
+        label = line.split("\n")[0]
+        print(f"{label:>22} {a:>8.3f} {b:>10.3f}")
+    print(f"\nold subprocess fallback: {time_subprocess('qor(5)'):.1f} ms per line")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Soplang sampling profiler overhead benchmark.
+
+Runs call-heavy and statement-heavy programs on the closure compiler, once
+plainly and once under the SamplingProfiler at its default interval, and
+reports the slowdown. The sampled run pays for keeping
+Interpreter.call_stack up to date and for the sampling thread itself.
+
+Usage:
+    python scripts/benchmark/bench_sampling.py [repeats]
+"""
+
+import contextlib
+import io
+import statistics
+import sys
+import time
+
+from harness import parse
+from src.runtime.interpreter import Interpreter
+from src.runtime.profiler import DEFAULT_INTERVAL, SamplingProfiler
+
+PROGRAMS = {
+    "recursive fib": """
+hawl fib(n) {
+    haddii (n < 2) {
+        celi n
+    }
+    celi fib(n - 1) + fib(n - 2)
+}
+qor(fib(20))
+""",
+    "loop statements": """
+door wadar = 0
+kuceli (i 1 ilaa 60000) {
+    door x = i * 2
+    haddii (x % 3 == 0) {
+        wadar = wadar + x
+    }
+}
+qor(wadar)
+""",
+    "small hawl": """
+hawl kordhi(x) {
+    celi x + 1
+}
+door n = 0
+kuceli (i 1 ilaa 30000) {
+    n = kordhi(n)
+}
+qor(n)
+""",
+}
+
+
+def run(source, sampled):
+    """Seconds to compile and run source, optionally under the sampler"""
+    ast = parse(source)
+    interpreter = Interpreter()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if sampled:
+            sampler = SamplingProfiler(interpreter.call_stack)
+            interpreter.profiler = sampler
+            sampler.start()
+            try:
+                sampler.run_program(None, lambda: interpreter.interpret(ast))
+            finally:
+                sampler.stop()
+        else:
+            interpreter.interpret(ast)
+    return time.perf_counter() - start
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    print("=== Soplang sampling profiler overhead ===\n")
+    print(f"interval: {DEFAULT_INTERVAL * 1000:g} ms, median of {repeats} runs\n")
+    print(f"{'program':>16} {'plain (s)':>10} {'sampled (s)':>12} {'overhead':>9}")
+    for name, source in PROGRAMS.items():
+        plain, sampled = [], []
+        for _ in range(repeats):
+            # Interleave the runs so machine noise hits both alike
+            plain.append(run(source, False))
+            sampled.append(run(source, True))
+        a, b = statistics.median(plain), statistics.median(sampled)
+        print(f"{name:>16} {a:>10.3f} {b:>12.3f} {(b / a - 1) * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Soplang sorting benchmark.
+
+Sorts a teed of one million walax records with habee by a field name, by a
+hawl key, and descending, and picks the ten smallest with ugu_horreeya,
+which does not sort the whole list. A key hawl is called once per record.
+For scale, it also times the insertion sort a program had to write in
+Soplang before habee took a key, on a much smaller list.
+
+Usage:
+    python scripts/benchmark/bench_sort.py [records]
+"""
+
+import random
+import sys
+
+from harness import run
+
+SETUP = """
+hawl da(q) {
+    celi q.da
+}
+"""
+
+CALLS = {
+    'habee("da")': 'dad.habee("da")',
+    "habee(da)": "dad.habee(da)",
+    'habee("da", run)': 'dad.habee("da", run)',
+    'ugu_horreeya(10, "da")': 'door yar = dad.ugu_horreeya(10, "da")',
+}
+
+MANUAL_SORT = """
+kuceli (i 1 ilaa dherer(dad) - 1) {
+    door shay = dad[i]
+    door j = i - 1
+    intay (j >= 0 && dad[j].da > shay.da) {
+        dad[j + 1] = dad[j]
+        j = j - 1
+    }
+    dad[j + 1] = shay
+}
+"""
+
+
+def records(n):
+    """n walax records with a random da field"""
+    rng = random.Random(0)
+    return [{"magac": f"qof{i}", "da": rng.randint(0, 100)} for i in range(n)]
+
+
+def sort(call, n):
+    """Seconds call takes on a fresh list of n records"""
+    result = run(call + "\n", setup=SETUP, variables={"dad": records(n)})
+    dad = result.engine.globals.values["dad"]
+    if "ugu_horreeya" not in call:
+        ages = [item["da"] for item in dad]
+        assert ages == sorted(ages, reverse="run" in call), call
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"=== Soplang: sorting {n} walax records ===\n")
+    print(f"{'call':>24} {'records':>9} {'seconds':>9}")
+    for name, call in CALLS.items():
+        print(f"{name:>24} {n:>9} {sort(call, n):>9.3f}")
+    small = 2000
+    seconds = sort(MANUAL_SORT, small)
+    print(f"{'insertion sort in Soplang':>24} {small:>9} {seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
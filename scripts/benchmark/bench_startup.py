@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Soplang startup time benchmark.
+
+Measures the wall time from launching a new Python process until the first
+line printed by qor arrives on its stdout, for a one-line file and for the
+same code given to main.py -c. For comparison it also times bare Python and
+the old start-up path, which built the interactive shell (readline history,
+colorama) before running the file.
+
+Usage:
+    python scripts/benchmark/bench_startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from harness import ROOT
+
+MAIN = os.path.join(ROOT, "main.py")
+
+SOURCE = 'qor("salaan")\n'
+
+# Builds the shell first, as main.py used to for every invocation
+WITH_SHELL = (
+    "import sys; sys.path.insert(0, sys.argv[1]); "
+    "from src.runtime.shell import SoplangShell; "
+    "SoplangShell().run_file(sys.argv[2])"
+)
+
+
+def time_to_first_line(command, env):
+    """Seconds from starting command until its first line of output"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+    )
+    process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.communicate()
+    return elapsed
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as home:
+        path = os.path.join(home, "salaan.sop")
+        with open(path, "w") as f:
+            f.write(SOURCE)
+
+        # A throwaway HOME keeps the shell's history file out of the way
+        env = dict(os.environ, HOME=home)
+        modes = {
+            "python -c print": [sys.executable, "-c", "print('salaan')"],
+            "main.py file": [sys.executable, MAIN, path],
+            "main.py -c": [sys.executable, MAIN, "-c", SOURCE],
+            "shell + file": [sys.executable, "-c", WITH_SHELL, ROOT, path],
+        }
+
+        print("=== Soplang startup: time to first qor output ===\n")
+        print(f"runs: {runs}\n")
+        print(f"{'mode':>16} {'median (ms)':>12} {'min (ms)':>9}")
+        for name, command in modes.items():
+            time_to_first_line(command, env)  # Warm the .pyc files
+            times = [time_to_first_line(command, env) for _ in range(runs)]
+            print(
+                f"{name:>16} {statistics.median(times) * 1000:>12.1f} "
+                f"{min(times) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Soplang dooro benchmark.
+
+Runs a dooro statement with 200 xaalad cases inside a kuceli loop whose
+counter walks through every case value and past the last one into
+ugudambeyn. With literal case values each dooro is one table lookup; the
+same cases written as `xaalad 0 + k` are not literals, so every case
+before the matching one is evaluated and compared in order, as all cases
+were before the table.
+
+Usage:
+    python scripts/benchmark/bench_switch.py [iterations]
+"""
+
+import sys
+
+from harness import ENGINES, run
+
+CASES = 200
+
+
+def program(n, literal):
+    """Source running a CASES-case dooro n times; it prints the case total"""
+    cases = "".join(
+        f"        xaalad {k if literal else f'0 + {k}'} {{\n"
+        f"            wadar = wadar + {k}\n"
+        f"        }}\n"
+        for k in range(CASES)
+    )
+    return (
+        "door wadar = 0\n"
+        f"kuceli (i 1 ilaa {n}) {{\n"
+        f"    dooro (i % {CASES + 1}) {{\n"
+        f"{cases}"
+        "        ugudambeyn {\n"
+        "            wadar = wadar - 1\n"
+        "        }\n"
+        "    }\n"
+        "}\n"
+        "qor(wadar)\n"
+    )
+
+
+def expected(n):
+    """Total the program prints after n iterations"""
+    values = (i % (CASES + 1) for i in range(1, n + 1))
+    return sum(k if k < CASES else -1 for k in values)
+
+
+def dispatch(engine, source, n):
+    """Seconds engine takes to run source; checks the printed total"""
+    result = run(source, engine)
+    assert result.output.strip() == str(expected(n)), result.output
+    return result.seconds
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"=== Soplang: {n} dooro statements with {CASES} cases ===\n")
+    print(f"{'engine':>10} {'literal':>9} {'computed':>9} {'speedup':>8}")
+    for engine in ENGINES:
+        literal = dispatch(engine, program(n, True), n)
+        computed = dispatch(engine, program(n, False), n)
+        print(
+            f"{engine:>10} {literal:>9.3f} {computed:>9.3f} "
+            f"{computed / literal:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
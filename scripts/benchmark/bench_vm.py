@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Soplang bytecode VM benchmark.
+
+Compares the closure compiler with the bytecode VM on a loop-heavy and a
+call-heavy program, and measures cold start (lex + parse + compile) against
+loading the same program from its .sopc cache.
+
+Usage:
+    python scripts/benchmark/bench_vm.py [copies]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from harness import best_of, parse
+from src.runtime import bytecode
+from src.runtime.codegen import BytecodeCompiler
+from src.runtime.interpreter import Interpreter
+from src.runtime.vm import VirtualMachine, load_program
+
+LOOP_PROGRAM = """
+door wadar = 0
+kuceli (i 1 ilaa 200000) {
+    wadar = wadar + i * 2
+}
+"""
+
+CALL_PROGRAM = """
+hawl fib(n) {
+    haddii (n < 2) {
+        celi n
+    }
+    celi fib(n - 1) + fib(n - 2)
+}
+door natiijo = fib(20)
+"""
+
+# Repeated to build a large script for the cold start measurement
+STARTUP_CHUNK = """
+hawl isku_dar(a, b) {
+    celi a + b
+}
+door liis = [1, 2, 3, 4, 5]
+door xog = {magac: "Soplang", nooc: "luuqad"}
+kuceli (i 0 ilaa 2) {
+    haddii (i == 1) {
+        liis[i] = isku_dar(i, liis[i])
+    } ugudambeyn {
+        xog.magac = "Soplang " + i
+    }
+}
+"""
+
+
+def compare_engines():
+    print(f"{'program':>10} {'closures (s)':>14} {'vm (s)':>10}")
+    for name, source in (("loop", LOOP_PROGRAM), ("calls", CALL_PROGRAM)):
+        ast = parse(source)
+        code = BytecodeCompiler().compile_program(ast)
+        closures = best_of(lambda: Interpreter().interpret(ast))
+        vm = best_of(lambda: VirtualMachine().run_code(code))
+        print(f"{name:>10} {closures:>14.3f} {vm:>10.3f}")
+
+
+def compare_startup(copies):
+    source = STARTUP_CHUNK * copies
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, "weyn.sop")
+        with open(path, "w") as f:
+            f.write(source)
+
+        def cold():
+            shutil.rmtree(os.path.dirname(bytecode.cache_path(path)), True)
+            load_program(path, source)
+
+        cold_time = best_of(cold)
+        load_program(path, source)
+        warm_time = best_of(lambda: load_program(path, source))
+    finally:
+        shutil.rmtree(temp_dir)
+
+    lines = source.count("\n")
+    print(f"\nStartup for a {lines}-line script")
+    print(f"  lex + parse + compile: {cold_time * 1000:8.1f} ms")
+    print(f"  fresh .sopc cache:     {warm_time * 1000:8.1f} ms")
+    print(f"  speedup:               {cold_time / warm_time:8.1f}x")
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print("=== Soplang closure compiler vs. bytecode VM ===\n")
+    compare_engines()
+    compare_startup(copies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Shared setup for the bench_*.py scripts that time whole Soplang programs.
+
+Importing it puts the repository root (ROOT) on sys.path, so a benchmark
+run from anywhere can reach src. ENGINES makes a fresh engine by name, and
+run() parses a program, runs it on one and reports how long that took and
+what it printed; parse() and best_of() serve scripts that time something
+other than one run. For timings of separate lex/parse/execute phases with
+warmup and a stored baseline, use suite.py instead.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+from collections import namedtuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.core.lexer import Lexer  # noqa: E402
+from src.core.parser import Parser  # noqa: E402
+from src.runtime.interpreter import Interpreter  # noqa: E402
+from src.runtime.vm import VirtualMachine  # noqa: E402
+
+# Engine name -> factory taking Interpreter keyword arguments such as max_depth
+ENGINES = {
+    "closures": Interpreter,
+    "vm": VirtualMachine,
+    "tree walk": lambda **options: Interpreter(tree_walk=True, **options),
+}
+
+# Seconds the timed program took, everything it printed, and its engine
+Result = namedtuple("Result", ["seconds", "output", "engine"])
+
+
+def parse(source):
+    """AST of a source string"""
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def best_of(func, repeat=3):
+    """Fewest seconds a call of func() took in repeat calls, with anything
+    it printed thrown away"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(source, engine="closures", setup=None, variables=None, **options):
+    """Run source on a new engine and return its Result
+
+    setup, a source string, runs first on the same engine and variables are
+    then bound as globals; neither is timed, and neither is lexing or
+    parsing source. options go to the engine's constructor.
+    """
+    interpreter = ENGINES[engine](**options)
+    ast = parse(source)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        if setup is not None:
+            interpreter.interpret(parse(setup))
+        if variables:
+            interpreter.globals.values.update(variables)
+        start = time.perf_counter()
+        interpreter.interpret(ast)
+        elapsed = time.perf_counter() - start
+    return Result(elapsed, output.getvalue(), interpreter)
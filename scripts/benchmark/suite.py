@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Soplang benchmark suite.
+
+Runs a fixed set of Soplang workloads in-process and times each phase
+separately: lexing, parsing, and executing, so interpreter startup is not
+mixed into the numbers the way it is by benchmark.sh. Every workload gets
+warmup runs that are not recorded, then a number of timed repetitions, and
+the median, percentiles and spread of each phase are reported.
+
+`run` writes the results to JSON. `compare` checks a results file against
+a stored baseline and exits with status 1 if the median of any phase got
+slower by more than the threshold:
+
+    python scripts/benchmark/suite.py run -o scripts/benchmark/baseline.json
+    ... change the interpreter ...
+    python scripts/benchmark/suite.py run -o results.json
+    python scripts/benchmark/suite.py compare results.json
+
+Usage:
+    python scripts/benchmark/suite.py run [-o FILE] [-r N] [-w N]
+                                          [--tree-walk] [workload ...]
+    python scripts/benchmark/suite.py compare RESULTS [BASELINE]
+                                              [--threshold PERCENT]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from src.core.lexer import Lexer  # noqa: E402
+from src.core.parser import Parser  # noqa: E402
+from src.core.version import VERSION  # noqa: E402
+from src.runtime.interpreter import Interpreter  # noqa: E402
+
+# Where compare looks for the baseline when none is given
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Layout version of the results file
+FORMAT = 1
+
+PHASES = ("lex", "parse", "execute", "total")
+
+WORKLOADS = {
+    "fib": """
+hawl fib(n) {
+    haddii (n < 2) {
+        celi n
+    }
+    celi fib(n - 1) + fib(n - 2)
+}
+qor(fib(20))
+""",
+    "nested_kuceli": """
+door wadar = 0
+kuceli (i 1 ilaa 300) {
+    kuceli (j 1 ilaa 300) {
+        haddii ((i + j) % 3 == 0) {
+            wadar = wadar + i * j
+        }
+    }
+}
+qor(wadar)
+""",
+    "string_building": """
+door qoraal_dheer = ""
+kuceli (i 1 ilaa 20000) {
+    qoraal_dheer = qoraal_dheer + "x" + i
+    haddii (i % 1000 == 0) {
+        qoraal_dheer = qoraal_dheer.xarafaha_weyn()
+    }
+}
+qor(dherer(qoraal_dheer))
+""",
+    "list_methods": """
+hawl waa_dhaban(n) {
+    celi n % 2 == 0
+}
+hawl labanlaab(n) {
+    celi n * 2
+}
+door liis = []
+kuceli (i 1 ilaa 5000) {
+    liis.kudar((i * 7919) % 5003)
+}
+door wadar = 0
+kuceli (k 1 ilaa 10) {
+    door nuqul = liis.nuqul()
+    nuqul.habee()
+    door dhaban = nuqul.shaandhee(waa_dhaban)
+    door laban = dhaban.aaddin("labanlaab")
+    wadar = wadar + dherer(laban)
+}
+qor(wadar)
+""",
+    "object_churn": """
+door wadar = 0
+door kayd = []
+kuceli (i 1 ilaa 20000) {
+    door shay = {magac: "shay", qiime: i, xog: {tiro: i % 10}}
+    shay.qiime = shay.qiime + shay.xog.tiro
+    wadar = wadar + shay.qiime
+    haddii (i % 100 == 0) {
+        kayd.kudar(shay)
+    }
+}
+qor(wadar + dherer(kayd))
+""",
+    "dooro_dispatch": """
+door wadar = 0
+kuceli (i 1 ilaa 30000) {
+    dooro (i % 8) {
+        xaalad 0 {
+            wadar = wadar + 1
+        }
+        xaalad 1 {
+            wadar = wadar + 2
+        }
+        xaalad 2 {
+            wadar = wadar + 3
+        }
+        xaalad 3 {
+            wadar = wadar - 1
+        }
+        xaalad 4 {
+            wadar = wadar * 1
+        }
+        xaalad 5 {
+            wadar = wadar + 5
+        }
+        xaalad 6 {
+            wadar = wadar - 2
+        }
+        xaalad 7 {
+            wadar = wadar + 7
+        }
+    }
+}
+qor(wadar)
+""",
+    "imports": """
+ka_keen "xisaab0.sop"
+ka_keen "xisaab1.sop"
+ka_keen "xisaab2.sop"
+ka_keen "xisaab3.sop"
+ka_keen "xisaab4.sop"
+ka_keen "xisaab5.sop"
+ka_keen "xisaab6.sop"
+ka_keen "xisaab7.sop"
+door wadar = 0
+kuceli (i 1 ilaa 500) {
+    wadar = wadar + xisaab0.isku_dar(i, 1) + xisaab7.isku_dar(i, 2)
+}
+qor(wadar)
+""",
+}
+
+# Files next to the "imports" workload, loaded afresh by every execution;
+# their lexing and parsing is part of the workload's execute phase
+MODULE = """
+madoor XAD = 100
+door tirinta = 0
+hawl caawi(n) {
+    celi n % XAD
+}
+hawl isku_dar(a, b) {
+    tirinta = tirinta + 1
+    celi caawi(a) + b
+}
+hawl tiri(liis) {
+    door s = 0
+    kuceli (i 0 ilaa dherer(liis) - 1) {
+        s = s + liis[i]
+    }
+    celi s
+}
+"""
+MODULES = {f"xisaab{i}.sop": MODULE for i in range(8)}
+
+
+# -----------------------------
+#  Statistics
+# -----------------------------
+def percentile(values, fraction):
+    """The fraction-th percentile of values, interpolating between ranks"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(samples):
+    """Statistics of a list of timings, in seconds"""
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "p90": percentile(samples, 0.9),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "samples": samples,
+    }
+
+
+# -----------------------------
+#  Running
+# -----------------------------
+def time_phases(source, path, tree_walk):
+    """Seconds spent lexing, parsing and executing source once"""
+    start = time.perf_counter()
+    tokens = Lexer(source).tokenize()
+    lexed = time.perf_counter()
+    ast = Parser(tokens).parse()
+    parsed = time.perf_counter()
+    # A new interpreter each time, so modules are loaded again too
+    interpreter = Interpreter(tree_walk=tree_walk, filename=path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(ast)
+    executed = time.perf_counter()
+    return {
+        "lex": lexed - start,
+        "parse": parsed - lexed,
+        "execute": executed - parsed,
+        "total": executed - start,
+    }
+
+
+def run_workload(name, directory, repeat, warmup, tree_walk):
+    path = os.path.join(directory, f"{name}.sop")
+    with open(path) as f:
+        source = f.read()
+    for _ in range(warmup):
+        time_phases(source, path, tree_walk)
+    timings = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        for phase, seconds in time_phases(source, path, tree_walk).items():
+            timings[phase].append(seconds)
+    return {phase: summarize(samples) for phase, samples in timings.items()}
+
+
+def run(args):
+    names = args.workloads or list(WORKLOADS)
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        print(f"Unknown workload: {', '.join(unknown)}", file=sys.stderr)
+        print(f"Available: {', '.join(WORKLOADS)}", file=sys.stderr)
+        return 2
+
+    directory = tempfile.mkdtemp(prefix="soplang-bench-")
+    try:
+        for filename, source in list(MODULES.items()) + [
+            (f"{name}.sop", source) for name, source in WORKLOADS.items()
+        ]:
+            with open(os.path.join(directory, filename), "w") as f:
+                f.write(source)
+
+        engine = "tree-walk" if args.tree_walk else "compiler"
+        print(f"=== Soplang benchmark suite ({engine}) ===\n")
+        print(f"{args.warmup} warmup and {args.repeat} timed runs per workload\n")
+        print(
+            f"{'workload':>16} {'lex':>9} {'parse':>9} {'execute':>9} "
+            f"{'p90 exec':>9} {'total':>9}  (median ms)"
+        )
+        results = {}
+        for name in names:
+            result = run_workload(
+                name, directory, args.repeat, args.warmup, args.tree_walk
+            )
+            results[name] = result
+            ms = {phase: result[phase]["median"] * 1000 for phase in PHASES}
+            print(
+                f"{name:>16} {ms['lex']:>9.3f} {ms['parse']:>9.3f} "
+                f"{ms['execute']:>9.2f} {result['execute']['p90'] * 1000:>9.2f} "
+                f"{ms['total']:>9.2f}"
+            )
+    finally:
+        shutil.rmtree(directory)
+
+    data = {
+        "format": FORMAT,
+        "soplang": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": engine,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "workloads": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+# -----------------------------
+#  Comparing
+# -----------------------------
+def compare(args):
+    if not os.path.exists(args.baseline):
+        print(
+            f"No baseline at {args.baseline}; write one with "
+            f"`suite.py run -o {args.baseline}`",
+            file=sys.stderr,
+        )
+        return 2
+    with open(args.results) as f:
+        results = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if results.get("engine") != baseline.get("engine"):
+        print(
+            f"Warning: comparing {results.get('engine')} results with a "
+            f"{baseline.get('engine')} baseline",
+            file=sys.stderr,
+        )
+
+    limit = 1 + args.threshold / 100
+    regressions = []
+    print(f"=== {args.results} vs. {args.baseline} (median ms) ===\n")
+    print(
+        f"{'workload':>16} {'phase':>8} {'baseline':>10} {'now':>10} "
+        f"{'change':>8}"
+    )
+    for name, phases in results["workloads"].items():
+        if name not in baseline["workloads"]:
+            print(f"{name:>16} {'':>8} {'(not in baseline)':>30}")
+            continue
+        for phase in PHASES:
+            before = baseline["workloads"][name][phase]["median"]
+            after = phases[phase]["median"]
+            ratio = after / before if before else 1.0
+            flag = ""
+            # Phases too short to time reliably are never flagged
+            if ratio > limit and after - before > args.min_difference / 1000:
+                flag = "  REGRESSION"
+                regressions.append((name, phase))
+            print(
+                f"{name:>16} {phase:>8} {before * 1000:>10.3f} "
+                f"{after * 1000:>10.3f} {(ratio - 1) * 100:>+7.1f}%{flag}"
+            )
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} phase(s) slower than the baseline by more "
+            f"than {args.threshold:g}%"
+        )
+        return 1
+    print(f"\nNo phase slower than the baseline by more than {args.threshold:g}%")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soplang benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the workloads")
+    run_parser.add_argument("workloads", nargs="*", help="Workloads (default: all)")
+    run_parser.add_argument("-o", "--output", help="Write the results to this file")
+    run_parser.add_argument(
+        "-r", "--repeat", type=int, default=10, help="Timed runs (default: 10)"
+    )
+    run_parser.add_argument(
+        "-w", "--warmup", type=int, default=2, help="Warmup runs (default: 2)"
+    )
+    run_parser.add_argument(
+        "--tree-walk", action="store_true", help="Use the tree walker"
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="Flag regressions against a baseline"
+    )
+    compare_parser.add_argument("results", help="Results file written by run")
+    compare_parser.add_argument(
+        "baseline",
+        nargs="?",
+        default=BASELINE,
+        help="Baseline results file (default: scripts/benchmark/baseline.json)",
+    )
+    compare_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent slowdown of a median that counts as a regression "
+        "(default: 10)",
+    )
+    compare_parser.add_argument(
+        "--min-difference",
+        type=float,
+        default=0.5,
+        help="Milliseconds a median must also grow by (default: 0.5)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,6 @@ from src.core.ast import ASTNode, NodeType
 
 # Runtime components
 from src.runtime.interpreter import Interpreter
-from src.runtime.shell import SoplangShell
 
 # Utilities and error handling
 from src.utils.errors import (
@@ -39,4 +38,15 @@ from src.utils.errors import (
 # Standard library
 from src.stdlib.builtins import get_builtin_functions, get_list_methods, get_object_methods
 
+
+def __getattr__(name):
+    # The shell pulls in readline and colorama; load it only when asked for,
+    # so running a file or a -c snippet starts quickly
+    if name == "SoplangShell":
+        from src.runtime.shell import SoplangShell
+
+        return SoplangShell
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Make src a proper Python package
@@ -28,15 +28,37 @@ class NodeType(Enum):
     PROPERTY_ACCESS = "PROPERTY_ACCESS"  # For object.property
     METHOD_CALL = "METHOD_CALL"  # For object.method()
     INDEX_ACCESS = "INDEX_ACCESS"  # For list[index]
+    # For conditional expressions: condition ? value_if_true : value_if_false
+    CONDITIONAL_EXPRESSION = "CONDITIONAL_EXPRESSION"
     # For explicit assignment (separate from declaration)
     ASSIGNMENT = "ASSIGNMENT"
 
 
+# Shared by every node without children. It is immutable, so a node that
+# needs children must be given its own list.
+NO_CHILDREN = ()
+
+
 class ASTNode:
+    # No per-instance __dict__. slot and scope are set by the resolver and
+    # parts by the lowering pass; they are left unset on other nodes.
+    __slots__ = (
+        "type",
+        "value",
+        "children",
+        "var_type",
+        "is_constant",
+        "line",
+        "position",
+        "slot",
+        "scope",
+        "parts",
+    )
+
     def __init__(self, type_, value=None, children=None, line=None, position=None):
         self.type = type_
         self.value = value
-        self.children = children if children else []
+        self.children = children if children else NO_CHILDREN
         self.var_type = None  # For static typing
         self.is_constant = False  # For constant variables (madoor)
         self.line = line  # Store line number
@@ -61,3 +83,7 @@ class ASTNode:
             if self.position is not None:
                 line_pos += f", pos={self.position}"
         return f"ASTNode({self.type}, value={self.value}{type_info}{line_pos}, children={self.children})"
+
+
+# Value of the BLOCK node holding the ugudambeyn body of a dooro statement
+DEFAULT_CASE = "ugudambeyn"
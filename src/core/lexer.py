@@ -1,8 +1,81 @@
+import re
+from bisect import bisect_right
+
 from src.core.tokens import TokenType
 from src.utils.errors import LexerError
 
+# One alternative per kind of lexeme; the group that matched is the kind.
+# Tokens that start outside ASCII, and malformed input, fail to match and
+# are handled by Lexer.scan_other.
+TOKEN = re.compile(
+    r"""
+    (\s+)                                   # whitespace
+  | (//[^\n]*\n?|/\*(?s:.*?)\*/)            # comment; // eats its newline
+  | (/\*)                                   # unterminated comment
+  | ([A-Za-z]\w*)                           # identifier or keyword
+  | ([0-9][0-9.]*)                          # number
+  | "([^"]*)" | '([^']*)'                   # string
+  | (>=|<=|!=|&&|\|\||[-+*/%=(){}><!,:?;\[\].])
+    """,
+    re.VERBOSE,
+)
+(
+    WHITESPACE,
+    COMMENT,
+    OPEN_COMMENT,
+    WORD,
+    DIGITS,
+    DOUBLE_QUOTED,
+    SINGLE_QUOTED,
+    OPERATOR,
+) = range(1, 9)
+
+# \w matches exactly the characters str.isalnum (plus "_") accepts
+IDENTIFIER_TAIL = re.compile(r"\w*")
+NUMBER_TAIL = re.compile(r"[0-9.]*")
+
+OPERATORS = {
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "%": TokenType.MODULO,
+    "=": TokenType.EQUAL,
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ">": TokenType.GREATER,
+    "<": TokenType.LESS,
+    "!": TokenType.NOT,
+    ",": TokenType.COMMA,
+    ":": TokenType.COLON,
+    "?": TokenType.QUESTION,
+    ";": TokenType.SEMICOLON,
+    "[": TokenType.LEFT_BRACKET,
+    "]": TokenType.RIGHT_BRACKET,
+    ".": TokenType.DOT,
+}
+
+TWO_CHAR_OPERATORS = {
+    ">=": TokenType.GREATER_EQUAL,
+    "<=": TokenType.LESS_EQUAL,
+    "!=": TokenType.NOT_EQUAL,
+    "&&": TokenType.AND,
+    "||": TokenType.OR,
+}
+
+# Enum attribute lookups are slow enough to show up per token
+IDENTIFIER = TokenType.IDENTIFIER
+NUMBER = TokenType.NUMBER
+STRING = TokenType.STRING
+EOF = TokenType.EOF
+OPERATOR_TYPES = {**OPERATORS, **TWO_CHAR_OPERATORS}
+
 
 class Token:
+    __slots__ = ("type", "value", "line", "position")
+
     def __init__(self, type_, value, line=None, position=None):
         self.type = type_
         self.value = value
@@ -14,374 +87,172 @@ class Token:
 
 
 class Lexer:
+    """
+    Turns source code into tokens.
+
+    The scanner matches one compiled regular expression at a time against
+    the source and slices each lexeme out whole, instead of walking it
+    character by character. Line and column are looked up in a table of
+    line start offsets when a token or an error is created.
+    """
+
+    KEYWORDS = {
+        # Dynamic and control flow
+        "door": TokenType.DOOR,
+        "madoor": TokenType.MADOOR,
+        "hawl": TokenType.HAWL,
+        "celi": TokenType.CELI,
+        "qor": TokenType.qor,
+        "gelin": TokenType.GELIN,
+        "haddii": TokenType.HADDII,
+        "haddii_kale": TokenType.HADDII_KALE,
+        "ugudambeyn": TokenType.UGUDAMBEYN,
+        "dooro": TokenType.DOORO,
+        "xaalad": TokenType.XAALAD,
+        "kuceli": TokenType.kuceli,
+        "intay": TokenType.INTAY,
+        "jooji": TokenType.JOOJI,
+        "soco": TokenType.soco,
+        "isku_day": TokenType.ISKU_DAY,
+        "qabo": TokenType.QABO,
+        "ka_keen": TokenType.KA_KEEN,
+        "fasalka": TokenType.FASALKA,
+        "ka_dhaxal": TokenType.KA_DHAXAL,
+        "cusub": TokenType.CUSUB,
+        "nafta": TokenType.NAFTA,
+        # Static types
+        "abn": TokenType.abn,
+        "qoraal": TokenType.QORAAL,
+        "bool": TokenType.BOOL,
+        "teed": TokenType.teed,
+        "walax": TokenType.WALAX,
+        # Boolean literals
+        "run": TokenType.TRUE,
+        "been": TokenType.FALSE,
+        "null": TokenType.NULL,
+        "jajab": TokenType.JAJAB,
+    }
+
     def __init__(self, source_code):
         self.source = source_code
-        self.position = 0
-        self.line = 1  # Track line number
-        self.column = 1  # Track column position
-        self.current_char = self.source[self.position] if self.source else None
-
-        self.KEYWORDS = {
-            # Dynamic and control flow
-            "door": TokenType.DOOR,
-            "madoor": TokenType.MADOOR,
-            "hawl": TokenType.HAWL,
-            "celi": TokenType.CELI,
-            "qor": TokenType.qor,
-            "gelin": TokenType.GELIN,
-            "haddii": TokenType.HADDII,
-            "haddii_kale": TokenType.HADDII_KALE,
-            "ugudambeyn": TokenType.UGUDAMBEYN,
-            "dooro": TokenType.DOORO,
-            "xaalad": TokenType.XAALAD,
-            "kuceli": TokenType.kuceli,
-            "intay": TokenType.INTAY,
-            "jooji": TokenType.JOOJI,
-            "soco": TokenType.soco,
-            "isku_day": TokenType.ISKU_DAY,
-            "qabo": TokenType.QABO,
-            "ka_keen": TokenType.KA_KEEN,
-            "fasalka": TokenType.FASALKA,
-            "ka_dhaxal": TokenType.KA_DHAXAL,
-            "cusub": TokenType.CUSUB,
-            "nafta": TokenType.NAFTA,
-            # Static types
-            "abn": TokenType.abn,
-            "qoraal": TokenType.QORAAL,
-            "bool": TokenType.BOOL,
-            "teed": TokenType.teed,
-            "walax": TokenType.WALAX,
-            # Boolean literals
-            "run": TokenType.TRUE,
-            "been": TokenType.FALSE,
-            "null": TokenType.NULL,
-            "jajab": TokenType.JAJAB,
-        }
-
-    def advance(self):
-        # Update line and column tracking
-        if self.current_char == "\n":
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-
-        self.position += 1
-        if self.position < len(self.source):
-            self.current_char = self.source[self.position]
-        else:
-            self.current_char = None
-
-    def skip_whitespace(self):
-        while self.current_char and self.current_char.isspace():
-            self.advance()
-
-    def skip_comment(self):
-        # Single-line comments (//)
-        if self.current_char == "/" and self.peek() == "/":
-            self.advance()  # Skip first '/'
-            self.advance()  # Skip second '/'
-
-            # Skip until end of line or end of file
-            while self.current_char and self.current_char != "\n":
-                self.advance()
-
-            # Skip the newline character if present
-            if self.current_char == "\n":
-                self.advance()
-
-            return True
-
-        # Multi-line comments (/* ... */)
-        elif self.current_char == "/" and self.peek() == "*":
-            self.advance()  # Skip '/'
-            self.advance()  # Skip '*'
-
-            while self.current_char:
-                if self.current_char == "*" and self.peek() == "/":
-                    self.advance()  # Skip '*'
-                    self.advance()  # Skip '/'
-                    return True
-                self.advance()
-
-            # If we reach here, the comment was not properly closed
-            raise LexerError(
-                "unterminated_comment", position=self.column, line=self.line
-            )
-
-        return False
-
-    def peek(self):
-        """Look at the next character without advancing"""
-        peek_pos = self.position + 1
-        if peek_pos >= len(self.source):
-            return None
-        return self.source[peek_pos]
-
-    def tokenize_identifier(self):
-        identifier = ""
-        start_position = self.column
-        start_line = self.line
-        while self.current_char and (
-            self.current_char.isalnum() or self.current_char == "_"
-        ):
-            identifier += self.current_char
-            self.advance()
-
-        # Check if it's a keyword
-        token_type = self.KEYWORDS.get(identifier, TokenType.IDENTIFIER)
-        return Token(token_type, identifier, line=start_line, position=start_position)
-
-    def tokenize_number(self):
-        number = ""
-        start_position = self.column
-        start_line = self.line
-        has_decimal = False
-
-        while self.current_char and (
-            self.current_char.isdigit() or self.current_char == "."
-        ):
-            if self.current_char == ".":
-                has_decimal = True
-            number += self.current_char
-            self.advance()
-
-        # Convert to integer if no decimal point, otherwise float
-        value = int(number) if not has_decimal else float(number)
-
-        return Token(
-            TokenType.NUMBER, value, line=start_line, position=start_position
-        )
-
-    def tokenize_string(self):
-        quote_char = self.current_char
-        start_position = self.column
-        start_line = self.line
-        self.advance()
-        string_value = ""
-
-        while self.current_char and self.current_char != quote_char:
-            string_value += self.current_char
-            self.advance()
-
-        if self.current_char == quote_char:
-            self.advance()
-            return Token(
-                TokenType.STRING, string_value, line=start_line, position=start_position
-            )
-        raise LexerError("unterminated_string", position=self.column, line=self.line)
-
-    def next_token(self):
-        while self.current_char:
-            # Skip whitespace
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
-
-            # Handle comments
-            if self.current_char == "/":
-                if self.skip_comment():
+        self.length = len(source_code)
+        # Offset of the first character of every line, for locate()
+        self.line_starts = [0]
+        newline = source_code.find("\n")
+        while newline != -1:
+            self.line_starts.append(newline + 1)
+            newline = source_code.find("\n", newline + 1)
+
+    def locate(self, offset):
+        """Return the (line, column) of a source offset, both 1-based"""
+        index = bisect_right(self.line_starts, offset) - 1
+        return index + 1, offset - self.line_starts[index] + 1
+
+    def error(self, error_code, offset, **kwargs):
+        line, column = self.locate(offset)
+        return LexerError(error_code, position=column, line=line, **kwargs)
+
+    def number_end(self, end):
+        """Return the offset just past the digits and dots starting at end"""
+        source = self.source
+        while True:
+            end = NUMBER_TAIL.match(source, end).end()
+            # Digits outside ASCII are rare; take them one at a time
+            if end < self.length and source[end].isdigit():
+                end += 1
+            else:
+                return end
+
+    def scan_other(self, start):
+        """
+        Scan a lexeme TOKEN does not match: an identifier or number that
+        starts with a non-ASCII letter or digit, or else an error.
+
+        Returns (token_type, value, end).
+        """
+        source = self.source
+        char = source[start]
+        if char.isalpha():
+            end = IDENTIFIER_TAIL.match(source, start + 1).end()
+            identifier = source[start:end]
+            return self.KEYWORDS.get(identifier, IDENTIFIER), identifier, end
+        if char.isdigit():
+            end = self.number_end(start)
+            number = source[start:end]
+            return NUMBER, float(number) if "." in number else int(number), end
+        if char in "\"'":
+            raise self.error("unterminated_string", self.length)
+        raise self.error("unexpected_char", start, char=char)
+
+    def iter_tokens(self):
+        """
+        Yield the tokens of the source in order, scanning each one only when
+        it is asked for, so a parser can consume them as they are produced.
+
+        An EOF token is yielded only when whitespace or a comment follows
+        the last token, which the parser relies on.
+        """
+        source = self.source
+        length = self.length
+        line_starts = self.line_starts
+        keywords = self.KEYWORDS
+        operator_types = OPERATOR_TYPES
+        match = TOKEN.match
+        # Line of the current token, and where it starts and ends. Tokens on
+        # one line share a single line number object.
+        line = 0
+        line_number = 1
+        line_start = 0
+        next_line_start = line_starts[1] if len(line_starts) > 1 else length
+        position = 0
+        at_trivia = False
+
+        while position < length:
+            found = match(source, position)
+            if found is None:
+                token_type, value, end = self.scan_other(position)
+            else:
+                kind = found.lastindex
+                end = found.end()
+                if kind <= COMMENT:
+                    position = end
+                    at_trivia = True
                     continue
-
-            if self.current_char.isalpha():
-                return self.tokenize_identifier()
-
-            if self.current_char.isdigit():
-                return self.tokenize_number()
-
-            if self.current_char in "\"'":
-                return self.tokenize_string()
-
-            # Store current position and line before advancing
-            current_position = self.column
-            current_line = self.line
-
-            if self.current_char == "+":
-                self.advance()
-                return Token(
-                    TokenType.PLUS, "+", line=current_line, position=current_position
-                )
-            if self.current_char == "-":
-                self.advance()
-                return Token(
-                    TokenType.MINUS, "-", line=current_line, position=current_position
-                )
-            if self.current_char == "*":
-                self.advance()
-                return Token(
-                    TokenType.STAR, "*", line=current_line, position=current_position
-                )
-            if self.current_char == "/":
-                self.advance()
-                return Token(
-                    TokenType.SLASH, "/", line=current_line, position=current_position
-                )
-            if self.current_char == "%":
-                self.advance()
-                return Token(
-                    TokenType.MODULO, "%", line=current_line, position=current_position
-                )
-            if self.current_char == "=":
-                self.advance()
-                return Token(
-                    TokenType.EQUAL, "=", line=current_line, position=current_position
-                )
-            if self.current_char == "(":
-                self.advance()
-                return Token(
-                    TokenType.LEFT_PAREN,
-                    "(",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == ")":
-                self.advance()
-                return Token(
-                    TokenType.RIGHT_PAREN,
-                    ")",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == "{":
-                self.advance()
-                return Token(
-                    TokenType.LEFT_BRACE,
-                    "{",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == "}":
-                self.advance()
-                return Token(
-                    TokenType.RIGHT_BRACE,
-                    "}",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == ">":
-                self.advance()
-                if self.current_char == "=":
-                    self.advance()
-                    return Token(
-                        TokenType.GREATER_EQUAL,
-                        ">=",
-                        line=current_line,
-                        position=current_position,
-                    )
-                return Token(
-                    TokenType.GREATER, ">", line=current_line, position=current_position
-                )
-            if self.current_char == "<":
-                self.advance()
-                if self.current_char == "=":
-                    self.advance()
-                    return Token(
-                        TokenType.LESS_EQUAL,
-                        "<=",
-                        line=current_line,
-                        position=current_position,
-                    )
-                return Token(
-                    TokenType.LESS, "<", line=current_line, position=current_position
-                )
-            if self.current_char == "!":
-                self.advance()
-                if self.current_char == "=":
-                    self.advance()
-                    return Token(
-                        TokenType.NOT_EQUAL,
-                        "!=",
-                        line=current_line,
-                        position=current_position,
-                    )
-                return Token(
-                    TokenType.NOT, "!", line=current_line, position=current_position
-                )
-            if self.current_char == "&":
-                self.advance()
-                if self.current_char == "&":
-                    self.advance()
-                    return Token(
-                        TokenType.AND,
-                        "&&",
-                        line=current_line,
-                        position=current_position,
-                    )
-                raise LexerError(
-                    "unexpected_char",
-                    position=current_position,
-                    line=current_line,
-                    char="&",
-                )
-            if self.current_char == "|":
-                self.advance()
-                if self.current_char == "|":
-                    self.advance()
-                    return Token(
-                        TokenType.OR, "||", line=current_line, position=current_position
-                    )
-                raise LexerError(
-                    "unexpected_char",
-                    position=current_position,
-                    line=current_line,
-                    char="|",
-                )
-            if self.current_char == ",":
-                self.advance()
-                return Token(
-                    TokenType.COMMA, ",", line=current_line, position=current_position
-                )
-            if self.current_char == ":":
-                self.advance()
-                return Token(
-                    TokenType.COLON, ":", line=current_line, position=current_position
-                )
-            if self.current_char == ";":
-                self.advance()
-                return Token(
-                    TokenType.SEMICOLON,
-                    ";",
-                    line=current_line,
-                    position=current_position,
-                )
-
-            # New tokens for lists and objects
-            if self.current_char == "[":
-                self.advance()
-                return Token(
-                    TokenType.LEFT_BRACKET,
-                    "[",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == "]":
-                self.advance()
-                return Token(
-                    TokenType.RIGHT_BRACKET,
-                    "]",
-                    line=current_line,
-                    position=current_position,
-                )
-            if self.current_char == ".":
-                self.advance()
-                return Token(
-                    TokenType.DOT, ".", line=current_line, position=current_position
-                )
-
-            raise LexerError(
-                "unexpected_char",
-                position=current_position,
-                line=current_line,
-                char=self.current_char,
-            )
-
-        return Token(TokenType.EOF, None, line=self.line, position=self.column)
+                if kind == WORD:
+                    value = source[position:end]
+                    token_type = keywords.get(value, IDENTIFIER)
+                elif kind == OPERATOR:
+                    value = source[position:end]
+                    token_type = operator_types[value]
+                elif kind == DIGITS:
+                    if end < length and source[end].isdigit():
+                        end = self.number_end(end)
+                    number = source[position:end]
+                    # Convert to integer if no decimal point, otherwise float
+                    value = float(number) if "." in number else int(number)
+                    token_type = NUMBER
+                elif kind == OPEN_COMMENT:
+                    raise self.error("unterminated_comment", length)
+                else:
+                    value = found.group(kind)
+                    token_type = STRING
+
+            if position >= next_line_start:
+                # Tokens come in source order, so search forward from here
+                line = bisect_right(line_starts, position, line) - 1
+                line_number = line + 1
+                line_start = line_starts[line]
+                if line_number < len(line_starts):
+                    next_line_start = line_starts[line_number]
+                else:
+                    next_line_start = length
+            yield Token(token_type, value, line_number, position - line_start + 1)
+            position = end
+            at_trivia = False
+
+        if at_trivia:
+            line, column = self.locate(length)
+            yield Token(EOF, None, line=line, position=column)
 
     def tokenize(self):
-        tokens = []
-        while self.position < len(self.source):
-            token = self.next_token()
-            tokens.append(token)
-            if token.type == TokenType.EOF:
-                break
-        return tokens
+        return list(self.iter_tokens())
@@ -0,0 +1,182 @@
+"""
+Soplang lowering pass.
+
+The parser leaves haddii, kuceli and dooro statements in a flat child layout
+that has to be taken apart before they can run:
+
+    haddii     condition, body..., haddii_kale IF_STATEMENTs..., else BLOCK
+    kuceli     start, end, step (when it looks like an expression), body...
+    dooro      subject, xaalad BLOCKs (value, body...), ugudambeyn BLOCK
+
+This pass works that layout out once, after the optimizer and before
+execution, and records it on each such node as node.parts: an IfParts,
+LoopParts or SwitchParts. The tree walker runs those directly and the
+compilers build from them, so no engine rediscovers where a body ends.
+Every quirk of the layout is kept: an if-body ends at the first nested
+haddii or block, and the third child of a kuceli loop is its step when it is
+a literal, identifier or binary operation.
+
+celi statements get a ReturnParts, which records whether the statement is
+a tail call: celi f(...) inside a hawl and outside any isku_day of that
+hawl, whose handler would otherwise have to catch errors from the call.
+Engines run a tail call in place of the frame of the hawl that makes it.
+"""
+
+from src.core.ast import DEFAULT_CASE, NodeType
+
+# Node types taken for a kuceli step when they are the loop's third child
+STEP_TYPES = (NodeType.LITERAL, NodeType.IDENTIFIER, NodeType.BINARY_OPERATION)
+
+
+class IfParts:
+    """haddii statement: (condition, body) for the haddii and each
+    haddii_kale in order, and the ugudambeyn body (None without one)"""
+
+    __slots__ = ("arms", "else_body")
+
+    def __init__(self, arms, else_body):
+        self.arms = arms
+        self.else_body = else_body
+
+
+class LoopParts:
+    """kuceli statement: start, end and step expressions (step None for the
+    default of 1) and the body statements"""
+
+    __slots__ = ("start", "end", "step", "body")
+
+    def __init__(self, start, end, step, body):
+        self.start = start
+        self.end = end
+        self.step = step
+        self.body = body
+
+
+class SwitchParts:
+    """dooro statement: subject, (value, body) per xaalad, the ugudambeyn
+    body (None without one) and the case_table of the case values"""
+
+    __slots__ = ("subject", "cases", "default_body", "table", "ordered")
+
+    def __init__(self, subject, cases, default_body):
+        self.subject = subject
+        self.cases = cases
+        self.default_body = default_body
+        self.table, self.ordered = case_table([value for value, _ in cases])
+
+
+class ReturnParts:
+    """celi statement: the returned expression (None without one) and
+    whether it is a call in tail position"""
+
+    __slots__ = ("value", "tail_call")
+
+    def __init__(self, value, tail_call):
+        self.value = value
+        self.tail_call = tail_call
+
+
+def leading_body(nodes):
+    """Statements of an if/elif body: those before the first haddii or block"""
+    body = []
+    for child in nodes:
+        if child.type in (NodeType.IF_STATEMENT, NodeType.BLOCK):
+            break
+        body.append(child)
+    return body
+
+
+def if_parts(node):
+    children = node.children
+    body = leading_body(children[1:])
+    arms = [(children[0], body)]
+    else_body = None
+    for child in children[1 + len(body):]:
+        if child.type == NodeType.IF_STATEMENT:
+            arms.append((child.children[0], leading_body(child.children[1:])))
+        elif child.type == NodeType.BLOCK:
+            else_body = list(child.children)
+            break
+    return IfParts(arms, else_body)
+
+
+def loop_parts(node):
+    children = node.children
+    if len(children) > 2 and children[2].type in STEP_TYPES:
+        return LoopParts(children[0], children[1], children[2], list(children[3:]))
+    return LoopParts(children[0], children[1], None, list(children[2:]))
+
+
+def switch_parts(node):
+    cases = []
+    default_body = None
+    for case_node in node.children[1:]:
+        if case_node.value == DEFAULT_CASE:
+            default_body = list(case_node.children)
+        else:
+            cases.append((case_node.children[0], list(case_node.children[1:])))
+    return SwitchParts(node.children[0], cases, default_body)
+
+
+def case_table(values):
+    """Jump table for the xaalad values of a dooro statement
+
+    Returns a dict mapping every literal case value to the index of the
+    first case with that value, and the indices of the other cases, whose
+    values have to be evaluated and compared in order.
+    """
+    table = {}
+    ordered = []
+    for index, value in enumerate(values):
+        if value.type == NodeType.LITERAL:
+            table.setdefault(value.value, index)
+        else:
+            ordered.append(index)
+    return table, ordered
+
+
+def case_index(table, value, default):
+    """Look value up in a case_table; an unhashable value equals no literal"""
+    try:
+        return table.get(value, default)
+    except TypeError:
+        return default
+
+
+def return_parts(node, in_tail_context):
+    value = node.children[0] if node.children else None
+    tail_call = (
+        in_tail_context and
+        value is not None and
+        value.type == NodeType.FUNCTION_CALL and
+        "." not in value.value
+    )
+    return ReturnParts(value, tail_call)
+
+
+LOWERINGS = {
+    NodeType.IF_STATEMENT: if_parts,
+    NodeType.LOOP_STATEMENT: loop_parts,
+    NodeType.SWITCH_STATEMENT: switch_parts,
+}
+
+
+def lower(root):
+    """Record node.parts on every haddii, kuceli, dooro and celi under root"""
+    # Each node with whether a celi there may be a tail call
+    pending = [(root, False)]
+    while pending:
+        node, in_tail_context = pending.pop()
+        node_type = node.type
+        if node_type == NodeType.RETURN_STATEMENT:
+            node.parts = return_parts(node, in_tail_context)
+        else:
+            lowering = LOWERINGS.get(node_type)
+            if lowering is not None:
+                node.parts = lowering(node)
+            if node_type == NodeType.FUNCTION_DEFINITION:
+                in_tail_context = True
+            elif node_type == NodeType.TRY_CATCH:
+                in_tail_context = False
+        pending.extend((child, in_tail_context) for child in node.children)
+    return root
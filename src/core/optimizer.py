@@ -0,0 +1,471 @@
+"""
+Soplang optimizer.
+
+An optional pass that rewrites the AST in place after Parser.parse and before
+any execution engine sees it (enabled with --optimize):
+
+- arithmetic, comparison, logical and string + expressions whose operands
+  are literals are folded, as are ! and ?: on literals
+- madoor constants declared with a literal value are inlined where read
+- statements after celi, jooji or soco in the same block are removed
+- haddii branches whose condition is constant are dropped, and an always
+  taken branch replaces the whole statement
+
+Every rewrite keeps the behavior the engines already share, including their
+quirks: an if-body ends at the first nested haddii or block, the third child
+of a kuceli loop is its step when it looks like an expression, and a
+function without celi returns the value of its last statement.
+"""
+
+from src.core.ast import DEFAULT_CASE, ASTNode, NodeType
+from src.core.lowering import STEP_TYPES, if_parts, loop_parts
+from src.core.resolver import function_parts, import_name
+
+# Statements after one of these in the same block never run
+TERMINATORS = (
+    NodeType.BREAK_STATEMENT,
+    NodeType.CONTINUE_STATEMENT,
+    NodeType.RETURN_STATEMENT,
+)
+
+# Expression node types that may appear in statement position
+EXPRESSION_STATEMENTS = (
+    NodeType.BINARY_OPERATION,
+    NodeType.UNARY_OPERATION,
+    NodeType.PROPERTY_ACCESS,
+    NodeType.METHOD_CALL,
+    NodeType.INDEX_ACCESS,
+    NodeType.CONDITIONAL_EXPRESSION,
+    NodeType.IDENTIFIER,
+    NodeType.LITERAL,
+)
+
+# Statements whose value a function returns when they run last
+VALUE_STATEMENTS = (
+    NodeType.FUNCTION_CALL,
+    NodeType.ASSIGNMENT,
+    NodeType.CLASS_DEFINITION,
+)
+
+# Longest string a fold may produce, so "x" * 10**9 stays a runtime cost
+MAX_FOLDED_STRING = 4096
+
+
+class CannotFold(Exception):
+    """Raised when an operation on literals must be left to run time"""
+
+
+def fold_operator(operator, left, right):
+    """Apply operator to two literal values exactly as the engines do"""
+    if operator == "+":
+        if isinstance(left, str) or isinstance(right, str):
+            from src.stdlib.builtins import SoplangBuiltins
+
+            return SoplangBuiltins.qoraal(left) + SoplangBuiltins.qoraal(right)
+        return left + right
+    if operator == "-":
+        return left - right
+    if operator == "*":
+        return left * right
+    if operator in ("/", "%"):
+        if right == 0:
+            # Leave the division_by_zero / modulo_by_zero error to run time
+            raise CannotFold()
+        return left / right if operator == "/" else left % right
+    if operator == "==":
+        return left == right
+    if operator == "!=":
+        return left != right
+    if operator == ">":
+        return left > right
+    if operator == "<":
+        return left < right
+    if operator == ">=":
+        return left >= right
+    if operator == "<=":
+        return left <= right
+    if operator == "&&":
+        return bool(left) and bool(right)
+    if operator == "||":
+        return bool(left) or bool(right)
+    raise CannotFold()
+
+
+def count_nodes(node):
+    """Count node and every node below it"""
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+class ConstantScope:
+    """Names bound in one function (or the program) and its known madoor values"""
+
+    __slots__ = ("bindings", "constants")
+
+    def __init__(self, bindings):
+        self.bindings = bindings  # Name -> number of places that bind it
+        self.constants = {}  # Name -> literal value, once its madoor has run
+
+
+def _literal(value, node):
+    return ASTNode(
+        NodeType.LITERAL,
+        value=value,
+        line=getattr(node, "line", None),
+        position=getattr(node, "position", None),
+    )
+
+
+def _is_literal(node):
+    # Object literal properties are LITERAL nodes that hold their value as a child
+    return node.type == NodeType.LITERAL and not node.children
+
+
+class Optimizer:
+    def __init__(self):
+        self.scopes = []  # ConstantScopes, innermost last
+        self.imported_names = set()  # Globals bound by ka_keen
+
+    def optimize(self, root):
+        """Optimize a PROGRAM node in place and return it"""
+        # ka_keen binds its module's global when it runs, wherever it is
+        self.imported_names = {
+            import_name(node.value)
+            for node in _walk(root)
+            if node.type == NodeType.IMPORT_STATEMENT
+        }
+        self.scopes = [ConstantScope(self.count_bindings(root.children))]
+        root.children = self.optimize_block(root.children)
+        return root
+
+    # -----------------------------
+    #  Bindings and constants
+    # -----------------------------
+    def count_bindings(self, nodes, counts=None):
+        """Count where each name is bound in a scope, skipping nested functions"""
+        if counts is None:
+            counts = {}
+        for node in nodes:
+            if node.type == NodeType.FUNCTION_DEFINITION:
+                continue
+            if node.type in (
+                NodeType.VARIABLE_DECLARATION,
+                NodeType.LOOP_STATEMENT,
+                NodeType.TRY_CATCH,
+            ):
+                counts[node.value] = counts.get(node.value, 0) + 1
+            if node.type == NodeType.CLASS_DEFINITION:
+                # Field declarations become class fields, not variables
+                self.count_bindings(
+                    [
+                        child
+                        for child in node.children
+                        if child.type != NodeType.VARIABLE_DECLARATION
+                    ],
+                    counts,
+                )
+                continue
+            self.count_bindings(node.children, counts)
+        return counts
+
+    def lookup_constant(self, name):
+        """Return the scope that binds name if it holds a known constant"""
+        for scope in reversed(self.scopes):
+            if name in scope.bindings:
+                return scope if name in scope.constants else None
+        return None
+
+    def record_constant(self, node):
+        """Remember a madoor declaration that ran at the top of its scope"""
+        scope = self.scopes[-1]
+        value = node.children[0]
+        if (
+            node.value not in self.imported_names and
+            getattr(node, "is_constant", False) and
+            _is_literal(value) and
+            scope.bindings.get(node.value) == 1
+        ):
+            scope.constants[node.value] = value.value
+
+    # -----------------------------
+    #  Statement lists
+    # -----------------------------
+    def optimize_block(
+        self, nodes, top_level=True, if_body=False, loop_head=False, returns_value=False
+    ):
+        """Optimize a list of statements, splicing, dropping and cutting dead code
+
+        top_level: the list is the body of the current scope, so a madoor in
+            it is known to have run for every later statement
+        if_body: the list is an if/elif body, which may not hold haddii or
+            block statements of its own
+        loop_head: the first statement sits where a kuceli step would be
+        returns_value: the last statement's value is a function's result
+        """
+        result = []
+        for index, node in enumerate(nodes):
+            replacement = self.optimize_statement(node, top_level)
+            if replacement != [node] and not self._can_splice(
+                replacement,
+                if_body,
+                loop_head and index == 0,
+                returns_value and index == len(nodes) - 1,
+            ):
+                replacement = [node]
+            result.extend(replacement)
+            if result and result[-1].type in TERMINATORS:
+                # Anything after celi, jooji or soco is unreachable
+                break
+        return result
+
+    @staticmethod
+    def _can_splice(replacement, if_body, loop_head, returns_value):
+        if if_body and any(
+            node.type in (NodeType.IF_STATEMENT, NodeType.BLOCK) for node in replacement
+        ):
+            return False
+        if loop_head and (not replacement or replacement[0].type in STEP_TYPES):
+            return False
+        if returns_value and (
+            not replacement or replacement[-1].type in VALUE_STATEMENTS
+        ):
+            return False
+        return True
+
+    # -----------------------------
+    #  Statements
+    # -----------------------------
+    def optimize_statement(self, node, top_level=False):
+        """Optimize node and return the statements that replace it"""
+        node_type = node.type
+        if node_type == NodeType.VARIABLE_DECLARATION:
+            node.children[0] = self.optimize_expression(node.children[0])
+            if top_level:
+                self.record_constant(node)
+        elif node_type == NodeType.ASSIGNMENT:
+            target, value = node.children
+            if target.type != NodeType.IDENTIFIER:
+                # Only the index of obj[i] = v may change; the object stays
+                target.children[1:] = [
+                    self.optimize_expression(child) for child in target.children[1:]
+                ]
+            node.children[1] = self.optimize_expression(value)
+        elif node_type == NodeType.FUNCTION_DEFINITION:
+            self.optimize_function(node)
+        elif node_type == NodeType.FUNCTION_CALL:
+            node.children = [self.optimize_expression(arg) for arg in node.children]
+        elif node_type == NodeType.IF_STATEMENT:
+            return self.optimize_if(node)
+        elif node_type == NodeType.SWITCH_STATEMENT:
+            self.optimize_switch(node)
+        elif node_type == NodeType.LOOP_STATEMENT:
+            self.optimize_loop(node)
+        elif node_type == NodeType.WHILE_STATEMENT:
+            node.children = [self.optimize_expression(node.children[0])] + (
+                self.optimize_block(node.children[1:], top_level=False)
+            )
+        elif node_type == NodeType.RETURN_STATEMENT:
+            if node.children:
+                node.children[0] = self.optimize_expression(node.children[0])
+        elif node_type == NodeType.TRY_CATCH:
+            for block in node.children:
+                block.children = self.optimize_block(block.children, top_level=False)
+        elif node_type == NodeType.CLASS_DEFINITION:
+            for child in node.children:
+                if child.type == NodeType.FUNCTION_DEFINITION:
+                    self.optimize_function(child)
+                elif child.type == NodeType.VARIABLE_DECLARATION:
+                    child.children[0] = self.optimize_expression(child.children[0])
+                else:
+                    self.optimize_statement(child)
+        elif node_type == NodeType.BLOCK:
+            node.children = self.optimize_block(node.children, top_level=False)
+        elif node_type in (
+            NodeType.BINARY_OPERATION,
+            NodeType.UNARY_OPERATION,
+            NodeType.CONDITIONAL_EXPRESSION,
+        ):
+            # Keep the node itself: a folded statement could turn into a loop step
+            node.children = [self.optimize_expression(child) for child in node.children]
+        elif node_type in EXPRESSION_STATEMENTS and node_type != NodeType.IDENTIFIER:
+            self.optimize_expression(node)
+        return [node]
+
+    def optimize_function(self, node):
+        params, body = function_parts(node)
+        bindings = self.count_bindings(body)
+        for param in params:
+            bindings[param] = bindings.get(param, 0) + 1
+        self.scopes.append(ConstantScope(bindings))
+        try:
+            body = self.optimize_block(body, returns_value=True)
+        finally:
+            self.scopes.pop()
+        node.children = [
+            child for child in node.children if child.type == NodeType.IDENTIFIER
+        ] + body
+
+    def optimize_loop(self, node):
+        parts = loop_parts(node)
+        head = [
+            self.optimize_expression(parts.start),
+            self.optimize_expression(parts.end),
+        ]
+        if parts.step is not None:
+            # Folding keeps a step a literal, identifier or binary operation
+            head.append(self.optimize_expression(parts.step))
+        node.children = head + self.optimize_block(
+            parts.body, top_level=False, loop_head=parts.step is None
+        )
+
+    def optimize_switch(self, node):
+        node.children[0] = self.optimize_expression(node.children[0])
+        for case_node in node.children[1:]:
+            body = case_node.children
+            if case_node.value != DEFAULT_CASE:
+                # A folded case value can go in the engines' jump table
+                body[0] = self.optimize_expression(body[0])
+                body = body[1:]
+            for child in body:
+                self.optimize_statement(child)
+
+    def optimize_if(self, node):
+        """Fold an if statement; returns [node] or the statements replacing it"""
+        parts = if_parts(node)
+        else_body = parts.else_body
+        arms = [
+            (
+                self.optimize_expression(condition),
+                self.optimize_block(arm_body, top_level=False, if_body=True),
+            )
+            for condition, arm_body in parts.arms
+        ]
+        if else_body is not None:
+            else_body = self.optimize_block(else_body, top_level=False)
+
+        # Rebuild the node in its canonical layout; it stays a valid
+        # fallback whenever the folded form cannot be spliced in
+        node.children = [arms[0][0]] + arms[0][1]
+        for condition, arm_body in arms[1:]:
+            node.children.append(
+                ASTNode(NodeType.IF_STATEMENT, children=[condition] + arm_body)
+            )
+        if else_body is not None:
+            node.children.append(ASTNode(NodeType.BLOCK, children=else_body))
+
+        live_arms = []
+        for condition, arm_body in arms:
+            if not _is_literal(condition):
+                live_arms.append((condition, arm_body))
+            elif condition.value:
+                # Always taken when reached: later arms are dead
+                else_body = arm_body
+                break
+        else:
+            if len(live_arms) == len(arms):
+                return [node]
+
+        if not live_arms:
+            return list(else_body or [])
+        condition, arm_body = live_arms[0]
+        folded = ASTNode(NodeType.IF_STATEMENT, children=[condition] + arm_body)
+        for condition, arm_body in live_arms[1:]:
+            folded.children.append(
+                ASTNode(NodeType.IF_STATEMENT, children=[condition] + arm_body)
+            )
+        if else_body:
+            folded.children.append(ASTNode(NodeType.BLOCK, children=list(else_body)))
+        return [folded]
+
+    # -----------------------------
+    #  Expressions
+    # -----------------------------
+    def optimize_operand(self, node):
+        """Optimize an object whose identity may matter (obj.prop, obj.method())"""
+        if node.type == NodeType.IDENTIFIER:
+            return node
+        return self.optimize_expression(node)
+
+    def optimize_expression(self, node):
+        node_type = node.type
+        if node_type == NodeType.IDENTIFIER:
+            scope = self.lookup_constant(node.value)
+            if scope is not None:
+                return _literal(scope.constants[node.value], node)
+            return node
+        if node_type == NodeType.LITERAL:
+            return node
+        if node_type == NodeType.OBJECT_LITERAL:
+            for prop in node.children:
+                prop.children = [self.optimize_expression(prop.children[0])]
+            return node
+        if node_type in (NodeType.PROPERTY_ACCESS, NodeType.METHOD_CALL):
+            obj = self.optimize_operand(node.children[0])
+            args = []
+            for arg in node.children[1:]:
+                if node.value == "shaandhee" and arg.type == NodeType.IDENTIFIER:
+                    # May name a function instead of a variable
+                    args.append(arg)
+                else:
+                    args.append(self.optimize_expression(arg))
+            node.children = [obj] + args
+            return node
+
+        node.children = [self.optimize_expression(child) for child in node.children]
+        if node_type == NodeType.BINARY_OPERATION:
+            return self.fold_binary(node)
+        if node_type == NodeType.UNARY_OPERATION:
+            operand = node.children[0]
+            if node.value == "!" and _is_literal(operand):
+                return _literal(not bool(operand.value), node)
+        elif node_type == NodeType.CONDITIONAL_EXPRESSION:
+            condition, when_true, when_false = node.children
+            if _is_literal(condition):
+                return when_true if condition.value else when_false
+        return node
+
+    def fold_binary(self, node):
+        left, right = node.children
+        if not _is_literal(left):
+            return node
+        if node.value == "&&" and not left.value:
+            # The right operand is never evaluated
+            return _literal(False, node)
+        if node.value == "||" and left.value:
+            return _literal(True, node)
+        if not _is_literal(right):
+            return node
+        if (
+            node.value == "*" and
+            _repeat_length(left.value, right.value) > MAX_FOLDED_STRING
+        ):
+            return node
+        try:
+            value = fold_operator(node.value, left.value, right.value)
+        except Exception:
+            # CannotFold, or a type error that is reported at run time as before
+            return node
+        if isinstance(value, str) and len(value) > MAX_FOLDED_STRING:
+            return node
+        return _literal(value, node)
+
+
+def _repeat_length(left, right):
+    """Length of the string that "s" * n would build, or 0"""
+    if isinstance(left, str) and isinstance(right, int):
+        return len(left) * right
+    if isinstance(right, str) and isinstance(left, int):
+        return len(right) * left
+    return 0
+
+
+def _walk(node):
+    yield node
+    for child in node.children:
+        yield from _walk(child)
+
+
+def optimize(root):
+    """Optimize root in place and return the node counts before and after"""
+    before = count_nodes(root)
+    Optimizer().optimize(root)
+    return before, count_nodes(root)
@@ -1,13 +1,22 @@
-from src.core.ast import ASTNode, NodeType
+from collections import deque
+
+from src.core.ast import DEFAULT_CASE, ASTNode, NodeType
+from src.core.lexer import Token
 from src.core.tokens import TokenType
 from src.utils.errors import ParserError
 
 
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.current_token_index = 0
-        self.current_token = self.tokens[self.current_token_index]
+        # tokens may be a list or a stream such as Lexer.iter_tokens(); it is
+        # read one token at a time, so lexing proceeds as parsing does and
+        # consumed tokens are not kept alive by the parser
+        self.tokens = iter(tokens)
+        # Tokens read ahead of current_token by peek()
+        self.lookahead = deque()
+        self.current_token = next(self.tokens, None)
+        if self.current_token is None:
+            self.current_token = Token(TokenType.EOF, None, line=1, position=1)
 
     def get_friendly_token_name(self, token_type):
         """Convert token types to user-friendly descriptions."""
@@ -21,6 +30,7 @@ class Parser:
             TokenType.COMMA: "comma ','",
             TokenType.DOT: "dot '.'",
             TokenType.COLON: "colon ':'",
+            TokenType.QUESTION: "question mark '?'",
             TokenType.SEMICOLON: "semicolon ';'",
             TokenType.PLUS: "plus '+'",
             TokenType.MINUS: "minus '-'",
@@ -65,9 +75,21 @@ class Parser:
         return token_descriptions.get(token_type, str(token_type))
 
     def advance(self):
-        self.current_token_index += 1
-        if self.current_token_index < len(self.tokens):
-            self.current_token = self.tokens[self.current_token_index]
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
+        else:
+            # At the end of the stream current_token stays where it is
+            self.current_token = next(self.tokens, self.current_token)
+
+    def peek(self, offset=1):
+        """Return the token offset places after current_token without
+        consuming it, or None if the stream ends first."""
+        while len(self.lookahead) < offset:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[offset - 1]
 
     def expect(self, token_type):
         if self.current_token.type == token_type:
@@ -96,6 +118,18 @@ class Parser:
         return ASTNode(NodeType.PROGRAM, children=statements)
 
     def parse_statement(self):
+        """
+        Parse any statement, recording the line and position it starts at
+        when the statement's own parser did not
+        """
+        token = self.current_token
+        node = self.parse_any_statement()
+        if node.line is None:
+            node.line = getattr(token, "line", None)
+            node.position = getattr(token, "position", None)
+        return node
+
+    def parse_any_statement(self):
         """
         Parse any statement in the language
         """
@@ -165,7 +199,7 @@ class Parser:
             self.expect(TokenType.EQUAL)
 
             # Parse the expression to assign to the variable
-            expression = self.parse_logical_expression()
+            expression = self.parse_conditional_expression()
 
             # Create variable declaration node
             var_node = ASTNode(
@@ -276,7 +310,8 @@ class Parser:
                                 position=getattr(self.current_token, "position", None),
                             )
 
-                        prop_name = self.current_token.value
+                        name_token = self.current_token
+                        prop_name = name_token.value
                         self.advance()  # Consume the property name
 
                         if self.current_token.type == TokenType.LEFT_PAREN:
@@ -285,16 +320,18 @@ class Parser:
                             self.advance()  # Consume left paren
 
                             if self.current_token.type != TokenType.RIGHT_PAREN:
-                                args.append(self.parse_logical_expression())
+                                args.append(self.parse_conditional_expression())
                                 while self.current_token.type == TokenType.COMMA:
                                     self.advance()
-                                    args.append(self.parse_logical_expression())
+                                    args.append(self.parse_conditional_expression())
 
                             self.expect(TokenType.RIGHT_PAREN)
                             left = ASTNode(
                                 NodeType.METHOD_CALL,
                                 value=prop_name,
                                 children=[left] + args,
+                                line=getattr(name_token, "line", None),
+                                position=getattr(name_token, "position", None),
                             )
                         else:
                             # Regular property access (obj.prop)
@@ -307,14 +344,14 @@ class Parser:
                     elif self.current_token.type == TokenType.LEFT_BRACKET:
                         # Handle array indexing (arr[idx])
                         self.advance()  # Consume left bracket
-                        index = self.parse_logical_expression()
+                        index = self.parse_conditional_expression()
                         self.expect(TokenType.RIGHT_BRACKET)
                         left = ASTNode(NodeType.INDEX_ACCESS, children=[left, index])
 
                 # Now check if this is an assignment (obj.prop = value or arr[idx] = value)
                 if self.current_token.type == TokenType.EQUAL:
                     self.advance()  # Consume equals
-                    value = self.parse_logical_expression()
+                    value = self.parse_conditional_expression()
                     return ASTNode(NodeType.ASSIGNMENT, children=[left, value], line=line, position=position)
 
                 # If not an assignment, just return the property access or method call
@@ -326,10 +363,10 @@ class Parser:
                 self.advance()  # Consume left paren
 
                 if self.current_token.type != TokenType.RIGHT_PAREN:
-                    args.append(self.parse_logical_expression())
+                    args.append(self.parse_conditional_expression())
                     while self.current_token.type == TokenType.COMMA:
                         self.advance()
-                        args.append(self.parse_logical_expression())
+                        args.append(self.parse_conditional_expression())
 
                 self.expect(TokenType.RIGHT_PAREN)
                 return ASTNode(
@@ -339,7 +376,7 @@ class Parser:
             # Handle simple variable assignment (var = value)
             elif self.current_token.type == TokenType.EQUAL:
                 self.advance()  # Consume equals
-                value = self.parse_logical_expression()
+                value = self.parse_conditional_expression()
                 return ASTNode(
                     NodeType.ASSIGNMENT,
                     children=[
@@ -402,7 +439,7 @@ class Parser:
         self.expect(TokenType.EQUAL)
 
         # Parse the expression to assign to the variable
-        expression = self.parse_logical_expression()
+        expression = self.parse_conditional_expression()
 
         # Create variable declaration node
         var_node = ASTNode(
@@ -517,7 +554,7 @@ class Parser:
     def parse_if_statement(self):
         self.expect(TokenType.HADDII)
         self.expect(TokenType.LEFT_PAREN)
-        condition = self.parse_logical_expression()
+        condition = self.parse_conditional_expression()
         self.expect(TokenType.RIGHT_PAREN)
         self.expect(TokenType.LEFT_BRACE)
 
@@ -532,7 +569,7 @@ class Parser:
         while self.current_token.type == TokenType.HADDII_KALE:
             self.advance()
             self.expect(TokenType.LEFT_PAREN)
-            elif_condition = self.parse_logical_expression()
+            elif_condition = self.parse_conditional_expression()
             self.expect(TokenType.RIGHT_PAREN)
             self.expect(TokenType.LEFT_BRACE)
             elif_body = []
@@ -622,7 +659,7 @@ class Parser:
     def parse_while_statement(self):
         self.expect(TokenType.INTAY)
         self.expect(TokenType.LEFT_PAREN)
-        condition = self.parse_logical_expression()
+        condition = self.parse_conditional_expression()
         self.expect(TokenType.RIGHT_PAREN)
         self.expect(TokenType.LEFT_BRACE)
 
@@ -718,7 +755,7 @@ class Parser:
 
         elements = []
         while self.current_token.type != TokenType.RIGHT_BRACKET:
-            elements.append(self.parse_logical_expression())
+            elements.append(self.parse_conditional_expression())
             if self.current_token.type == TokenType.COMMA:
                 self.advance()
             else:
@@ -756,7 +793,7 @@ class Parser:
             self.expect(TokenType.COLON)
 
             # Property value - use logical expressions for more flexibility
-            value = self.parse_logical_expression()
+            value = self.parse_conditional_expression()
 
             # Create a property node with key as value and expression as child
             property_node = ASTNode(NodeType.LITERAL, value=key, children=[value])
@@ -862,7 +899,8 @@ class Parser:
                         position=getattr(self.current_token, "position", None),
                     )
 
-                property_name = self.current_token.value
+                name_token = self.current_token
+                property_name = name_token.value
                 self.advance()  # Consume the property name
 
                 if self.current_token.type == TokenType.LEFT_PAREN:
@@ -871,16 +909,18 @@ class Parser:
                     self.advance()  # Consume the left paren
 
                     if self.current_token.type != TokenType.RIGHT_PAREN:
-                        args.append(self.parse_logical_expression())
+                        args.append(self.parse_conditional_expression())
                         while self.current_token.type == TokenType.COMMA:
                             self.advance()
-                            args.append(self.parse_logical_expression())
+                            args.append(self.parse_conditional_expression())
 
                     self.expect(TokenType.RIGHT_PAREN)
                     expr = ASTNode(
                         NodeType.METHOD_CALL,
                         value=property_name,
                         children=[expr] + args,
+                        line=getattr(name_token, "line", None),
+                        position=getattr(name_token, "position", None),
                     )
                 else:
                     # Regular property access (obj.prop)
@@ -891,7 +931,7 @@ class Parser:
             elif self.current_token.type == TokenType.LEFT_BRACKET:
                 # Array indexing (array[index])
                 self.advance()  # Consume the left bracket
-                index = self.parse_logical_expression()
+                index = self.parse_conditional_expression()
                 self.expect(TokenType.RIGHT_BRACKET)
                 expr = ASTNode(NodeType.INDEX_ACCESS, children=[expr, index])
 
@@ -940,7 +980,7 @@ class Parser:
             return ASTNode(NodeType.IDENTIFIER, value=token_value)
         elif token.type == TokenType.LEFT_PAREN:
             self.advance()
-            expr = self.parse_logical_expression()
+            expr = self.parse_conditional_expression()
             self.expect(TokenType.RIGHT_PAREN)
             return expr
         elif token.type == TokenType.LEFT_BRACKET:
@@ -957,20 +997,29 @@ class Parser:
 
     def parse_function_call_helper(self, func_name):
         """Helper method to parse a function call once we've identified the function name"""
+        # The call is recorded on the line of its opening paren
+        line = getattr(self.current_token, "line", None)
+        position = getattr(self.current_token, "position", None)
         self.expect(TokenType.LEFT_PAREN)
         args = []
 
         # Parse arguments
         if self.current_token.type != TokenType.RIGHT_PAREN:
-            args.append(self.parse_logical_expression())
+            args.append(self.parse_conditional_expression())
             while self.current_token.type == TokenType.COMMA:
                 self.advance()
-                args.append(self.parse_logical_expression())
+                args.append(self.parse_conditional_expression())
 
         self.expect(TokenType.RIGHT_PAREN)
 
         # Create function call node
-        function_call = ASTNode(NodeType.FUNCTION_CALL, value=func_name, children=args)
+        function_call = ASTNode(
+            NodeType.FUNCTION_CALL,
+            value=func_name,
+            children=args,
+            line=line,
+            position=position,
+        )
 
         # If this is a function call as a statement (not part of an expression),
         # consume the semicolon if present, but don't require it
@@ -979,6 +1028,26 @@ class Parser:
 
         return function_call
 
+    def parse_conditional_expression(self):
+        """Parse a conditional expression like 'a > b ? a : b'"""
+        condition = self.parse_logical_expression()
+        if self.current_token.type != TokenType.QUESTION:
+            return condition
+
+        line = getattr(self.current_token, "line", None)
+        position = getattr(self.current_token, "position", None)
+        self.advance()  # Consume the question mark
+        # Both branches may themselves be conditional (right associative)
+        when_true = self.parse_conditional_expression()
+        self.expect(TokenType.COLON)
+        when_false = self.parse_conditional_expression()
+        return ASTNode(
+            NodeType.CONDITIONAL_EXPRESSION,
+            children=[condition, when_true, when_false],
+            line=line,
+            position=position,
+        )
+
     def parse_logical_expression(self):
         """Parse a logical expression like 'a > 5 && b < 10'"""
         left = self.parse_comparison_expression()
@@ -1027,7 +1096,7 @@ class Parser:
         self.expect(TokenType.CELI)
         # If there is an expression after celi, parse it
         if self.current_token.type != TokenType.SEMICOLON:
-            expr = self.parse_logical_expression()
+            expr = self.parse_conditional_expression()
             return ASTNode(NodeType.RETURN_STATEMENT, children=[expr])
         # Otherwise, it's a return with no value
         return ASTNode(NodeType.RETURN_STATEMENT)
@@ -1051,7 +1120,7 @@ class Parser:
     def parse_switch_statement(self):
         self.expect(TokenType.DOORO)
         self.expect(TokenType.LEFT_PAREN)
-        switch_expr = self.parse_logical_expression()
+        switch_expr = self.parse_conditional_expression()
         self.expect(TokenType.RIGHT_PAREN)
         self.expect(TokenType.LEFT_BRACE)
 
@@ -1062,7 +1131,7 @@ class Parser:
         while self.current_token.type != TokenType.RIGHT_BRACE:
             if self.current_token.type == TokenType.XAALAD:
                 self.advance()  # Consume 'xaalad'
-                case_value = self.parse_logical_expression()
+                case_value = self.parse_conditional_expression()
                 self.expect(TokenType.LEFT_BRACE)
 
                 case_body = []
@@ -1083,7 +1152,9 @@ class Parser:
                 self.expect(TokenType.RIGHT_BRACE)
 
                 # Create a block node for the default case (without a case value)
-                default_node = ASTNode(NodeType.BLOCK, children=default_body)
+                default_node = ASTNode(
+                    NodeType.BLOCK, value=DEFAULT_CASE, children=default_body
+                )
                 children.append(default_node)
             else:
                 raise ParserError(
@@ -0,0 +1,242 @@
+"""
+Soplang resolver.
+
+A static pass that runs between Parser.parse and execution. Every hawl body
+gets a FunctionScope whose locals (parameters, declarations, loop counters
+and catch variables) are numbered slots, and every variable reference or
+binding is annotated with where it lives:
+
+    node.slot = (depth, index)  # local of the function `depth` levels out
+    node.slot = None            # global, looked up by name
+
+Annotated nodes are IDENTIFIER references, VARIABLE_DECLARATION,
+ASSIGNMENT targets, LOOP_STATEMENT and TRY_CATCH (their loop and error
+variables) and FUNCTION_CALL names (the object part of obj.method(), or a
+variable holding a hawl). Function and method definitions get node.scope.
+Names that cannot be bound anywhere, and are not hawl names used as
+values, are collected as undefined_variable diagnostics.
+"""
+
+import os
+
+from src.core.ast import NodeType
+from src.utils.errors import RuntimeError
+
+
+class FunctionScope:
+    """Static layout of a function's local slots"""
+
+    __slots__ = ("name", "params", "names", "slot_map", "constants", "types")
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params  # Parameter names, bound to the first slots
+        self.names = []  # Slot index -> variable name
+        self.slot_map = {}  # Variable name -> slot index
+        self.constants = set()  # Slots declared with madoor
+        self.types = {}  # Slot -> statically declared type
+        for param in params:
+            self.declare(param)
+
+    def declare(self, name):
+        slot = self.slot_map.get(name)
+        if slot is None:
+            slot = len(self.names)
+            self.names.append(name)
+            self.slot_map[name] = slot
+        return slot
+
+    @property
+    def checked(self):
+        """Slots whose assignments need constant or type checks"""
+        return self.constants | set(self.types)
+
+    def __repr__(self):
+        return f"FunctionScope({self.name}, slots={self.names})"
+
+
+def import_name(filename):
+    """The global a ka_keen of filename binds: the file name without extension"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def function_parts(node):
+    """Split a FUNCTION_DEFINITION into parameter names and body nodes"""
+    # Every IDENTIFIER child of a function definition is a parameter
+    params = [
+        child.value for child in node.children if child.type == NodeType.IDENTIFIER
+    ]
+    body = [child for child in node.children if child.type != NodeType.IDENTIFIER]
+    return list(dict.fromkeys(params)), body
+
+
+class Resolver:
+    def __init__(self, known_globals=(), known_functions=()):
+        # Names defined before this program, and built-in or earlier hawl
+        # names; only tested for membership, so a REPL's scope is not copied
+        self.known_globals = known_globals
+        self.known_functions = known_functions
+        self.scopes = []  # Enclosing FunctionScopes, innermost last
+        self.global_names = set()  # Names bound at module level
+        self.function_names = set()  # Every hawl defined in the program
+        self.global_references = []  # IDENTIFIER nodes that resolved to globals
+        self.diagnostics = []
+
+    def resolve(self, root):
+        """Annotate root in place and return the undefined name diagnostics"""
+        self.visit_block(root.children)
+        self.check_undefined()
+        return self.diagnostics
+
+    # -----------------------------
+    #  Scope helpers
+    # -----------------------------
+    def declare(self, node, name):
+        """Bind name in the innermost scope and annotate node with the slot"""
+        if not self.scopes:
+            self.global_names.add(name)
+            node.slot = None
+            return None
+        slot = self.scopes[-1].declare(name)
+        node.slot = (0, slot)
+        return slot
+
+    def lookup(self, name):
+        """Return (depth, index) of the innermost function local, or None"""
+        for depth, scope in enumerate(reversed(self.scopes)):
+            slot = scope.slot_map.get(name)
+            if slot is not None:
+                return depth, slot
+        return None
+
+    def hoist(self, scope, nodes):
+        """Give every local bound anywhere in a function body its slot up front"""
+        for node in nodes:
+            if node.type == NodeType.FUNCTION_DEFINITION:
+                # Nested functions get their own frame
+                continue
+            if node.type in (
+                NodeType.VARIABLE_DECLARATION,
+                NodeType.LOOP_STATEMENT,
+                NodeType.TRY_CATCH,
+            ):
+                scope.declare(node.value)
+            if node.type == NodeType.CLASS_DEFINITION:
+                # Field declarations become class fields, not variables
+                self.hoist(
+                    scope,
+                    [
+                        child
+                        for child in node.children
+                        if child.type != NodeType.VARIABLE_DECLARATION
+                    ],
+                )
+                continue
+            self.hoist(scope, node.children)
+
+    # -----------------------------
+    #  Statements
+    # -----------------------------
+    def visit_block(self, nodes):
+        for node in nodes:
+            self.visit(node)
+
+    def visit(self, node):
+        node_type = node.type
+        if node_type == NodeType.IDENTIFIER:
+            self.visit_identifier(node)
+        elif node_type == NodeType.VARIABLE_DECLARATION:
+            self.visit_block(node.children)
+            slot = self.declare(node, node.value)
+            if slot is not None:
+                scope = self.scopes[-1]
+                if getattr(node, "is_constant", False):
+                    scope.constants.add(slot)
+                if getattr(node, "var_type", None) is not None:
+                    scope.types[slot] = node.var_type
+        elif node_type == NodeType.FUNCTION_DEFINITION:
+            self.function_names.add(node.value)
+            self.visit_function(node)
+        elif node_type == NodeType.ASSIGNMENT:
+            target, value = node.children
+            self.visit(value)
+            if target.type == NodeType.IDENTIFIER:
+                target.slot = self.lookup(target.value)
+                if target.slot is None:
+                    self.global_references.append(target)
+            else:
+                self.visit(target)
+        elif node_type == NodeType.LOOP_STATEMENT:
+            self.declare(node, node.value)
+            self.visit_block(node.children)
+        elif node_type == NodeType.TRY_CATCH:
+            self.declare(node, node.value)
+            self.visit_block(node.children)
+        elif node_type == NodeType.CLASS_DEFINITION:
+            for child in node.children:
+                if child.type == NodeType.FUNCTION_DEFINITION:
+                    self.visit_function(child)
+                elif child.type == NodeType.VARIABLE_DECLARATION:
+                    self.visit_block(child.children)
+                else:
+                    self.visit(child)
+        elif node_type == NodeType.METHOD_CALL:
+            self.visit(node.children[0])
+            self.visit_block(node.children[1:])
+        elif node_type == NodeType.FUNCTION_CALL:
+            # The object of obj.method(), or a variable holding a hawl
+            node.slot = self.lookup(node.value.split(".", 1)[0])
+            self.visit_block(node.children)
+        elif node_type == NodeType.OBJECT_LITERAL:
+            for prop in node.children:
+                self.visit_block(prop.children)
+        elif node_type == NodeType.IMPORT_STATEMENT:
+            # The module is bound as a global wherever ka_keen appears
+            self.global_names.add(import_name(node.value))
+        else:
+            self.visit_block(node.children)
+
+    def visit_function(self, node):
+        params, body = function_parts(node)
+        scope = FunctionScope(node.value, params)
+        self.hoist(scope, body)
+        node.scope = scope
+        self.scopes.append(scope)
+        try:
+            self.visit_block(body)
+        finally:
+            self.scopes.pop()
+
+    def visit_identifier(self, node):
+        node.slot = self.lookup(node.value)
+        if node.slot is None:
+            self.global_references.append(node)
+
+    # -----------------------------
+    #  Diagnostics
+    # -----------------------------
+    def check_undefined(self):
+        reported = set()
+        for node in self.global_references:
+            name = node.value
+            if name in self.global_names or name in self.known_globals:
+                continue
+            if name in reported:
+                continue
+            if name in self.function_names or name in self.known_functions:
+                # A hawl used as a value
+                continue
+            reported.add(name)
+            self.diagnostics.append(
+                RuntimeError(
+                    "undefined_variable",
+                    name=name,
+                    line=getattr(node, "line", None),
+                    position=getattr(node, "position", None),
+                )
+            )
+
+
+def resolve(root, known_globals=(), known_functions=()):
+    """Resolve root in place and return its undefined name diagnostics"""
+    return Resolver(known_globals, known_functions).resolve(root)
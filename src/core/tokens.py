@@ -55,6 +55,7 @@ class TokenType(Enum):
     ASSIGN = "="
     COMMA = ","
     COLON = ":"
+    QUESTION = "?"  # For conditional expressions: shuruud ? a : b
     SEMICOLON = ";"
     LEFT_PAREN = "("
     RIGHT_PAREN = ")"
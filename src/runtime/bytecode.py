@@ -0,0 +1,262 @@
+"""
+Soplang bytecode format.
+
+Defines the opcodes understood by the VirtualMachine, the CodeObject container
+produced by the BytecodeCompiler, and the on-disk .sopc cache. Cached files
+live in a __sopcache__ directory next to the source and are keyed by the
+SHA-256 of the source text, so a fresh cache lets the runtime skip lexing and
+parsing entirely.
+"""
+
+import hashlib
+import marshal
+import os
+import zlib
+
+from src.core.tokens import TokenType
+from src.core.version import VERSION
+
+# -----------------------------
+#  Opcodes
+# -----------------------------
+OPCODES = (
+    # Hot instructions come first: the VM dispatches them in groups of eight
+    # by opcode number before falling back to the rare instructions
+    "LOAD_FAST",  # local slot
+    "LOAD_CONST",  # const index
+    "LOAD_GLOBAL",  # name index
+    "STORE_FAST",  # local slot, assignment with constant/type checks
+    "STORE_GLOBAL",  # name index, assignment with constant/type checks
+    "BIND_FAST",  # local slot, plain store (loop counters, catch variables)
+    "BIND_GLOBAL",  # name index, plain store
+    "POP_TOP",
+    "BINARY_ADD",  # quickened to BINARY_ADD_NATIVE unless the argument is True
+    "BINARY_ADD_NATIVE",  # Python's +, rewritten back to BINARY_ADD when it raises
+    "BINARY_SUBTRACT",
+    "BINARY_MULTIPLY",
+    "COMPARE_LT",
+    "COMPARE_LE",
+    "COMPARE_GT",
+    "COMPARE_EQ",
+    "GET_INDEX",
+    "POP_JUMP_IF_FALSE",  # target
+    "JUMP",  # target
+    "FOR_ITER",  # exit target
+    "CALL_FUNCTION",  # (name index, argument count, name is a local)
+    "TAIL_CALL",  # As CALL_FUNCTION; a hawl callee replaces the frame
+    "RETURN_VALUE",
+    "RETURN_NONE",
+    "CALL_METHOD",  # (name index, argument count)
+    # Rare instructions
+    "DUP_TOP",
+    "LOAD_DEREF",  # (depth, slot) in an enclosing function frame
+    "STORE_DEREF",  # (depth, slot)
+    "DECLARE_FAST",  # (slot, var_type, is_constant)
+    "DECLARE_GLOBAL",  # (name index, var_type, is_constant)
+    "BINARY_DIVIDE",
+    "BINARY_MODULO",
+    "COMPARE_NE",
+    "COMPARE_GE",
+    "JUMP_IF_FALSE_OR_POP",  # target, leaves False on the stack when jumping (&&)
+    "JUMP_IF_TRUE_OR_POP",  # target, leaves True on the stack when jumping (||)
+    "TO_BOOL",
+    "UNARY_NOT",
+    "BUILD_LIST",  # element count
+    "BUILD_OBJECT",  # const index of the key tuple
+    "GET_PROPERTY",  # name index
+    "SET_PROPERTY",  # name index
+    "SET_INDEX",
+    "FUNCTION_REF",  # (name index, jump target when the name is a function)
+    "MAKE_FUNCTION",  # index into CodeObject.functions
+    "MAKE_CLASS",  # const index of (name, parent, methods, fields)
+    "CHECK_CLASS_PARENT",  # const index of the parent name
+    "IMPORT",  # const index of the file name
+    "POP_JUMP_IF_TRUE",  # target
+    "FOR_PREP",  # replaces start, end and step with an iterator over the counter
+    "SETUP_TRY",  # handler target
+    "POP_TRY",
+    "RAISE_ERROR",  # const index of (error code, ((key, value), ...))
+    "SWITCH_JUMP",  # const index of {case value: target}, keeps the subject
+)
+
+for _index, _name in enumerate(OPCODES):
+    globals()[_name] = _index
+
+OPNAMES = dict(enumerate(OPCODES))
+
+# Bumped whenever the serialized layout changes; the opcode checksum makes
+# caches written with a different instruction set stale automatically
+BYTECODE_VERSION = 2
+MAGIC = (
+    f"SOPC{BYTECODE_VERSION}:{VERSION}:"
+    f"{zlib.crc32(','.join(OPCODES).encode('ascii')):08x}"
+).encode("ascii")
+CACHE_DIR = "__sopcache__"
+
+
+class CodeObject:
+    """A compiled Soplang program or function body."""
+
+    __slots__ = (
+        "name",
+        "params",
+        "instructions",
+        "positions",
+        "constants",
+        "names",
+        "varnames",
+        "functions",
+        "slot_map",
+    )
+
+    def __init__(
+        self,
+        name,
+        params,
+        instructions,
+        positions,
+        constants,
+        names,
+        varnames,
+        functions,
+    ):
+        self.name = name  # Function name ("<module>" for programs)
+        self.params = params  # Parameter names, bound to the first slots
+        self.instructions = instructions  # List of (opcode, argument) pairs
+        self.positions = positions  # (line, position) per instruction
+        self.constants = constants  # Literal constant pool
+        self.names = names  # Global, function, property and method names
+        self.varnames = varnames  # Local slot names
+        self.functions = functions  # Nested function CodeObjects
+        self.slot_map = {name: slot for slot, name in enumerate(varnames)}
+
+    def __repr__(self):
+        return (
+            f"CodeObject({self.name}, instructions={len(self.instructions)}, "
+            f"locals={len(self.varnames)})"
+        )
+
+    # -----------------------------
+    #  Serialization
+    # -----------------------------
+    def to_tuple(self):
+        """Convert to nested tuples of plain values that marshal can store"""
+        return (
+            self.name,
+            tuple(self.params),
+            tuple(
+                (op, _encode_argument(argument))
+                for op, argument in self.instructions
+            ),
+            tuple(self.positions),
+            tuple(self.constants),
+            tuple(self.names),
+            tuple(self.varnames),
+            tuple(function.to_tuple() for function in self.functions),
+        )
+
+    @classmethod
+    def from_tuple(cls, data):
+        name, params, instructions, positions, constants, names, varnames, functions = (
+            data
+        )
+        return cls(
+            name,
+            list(params),
+            [(op, _decode_argument(argument)) for op, argument in instructions],
+            list(positions),
+            list(constants),
+            list(names),
+            list(varnames),
+            [cls.from_tuple(function) for function in functions],
+        )
+
+    def disassemble(self, indent=""):
+        """Return a human readable listing of the instructions"""
+        lines = [f"{indent}code {self.name}({', '.join(self.params)}):"]
+        for pc, (op, argument) in enumerate(self.instructions):
+            suffix = "" if argument is None else f" {argument!r}"
+            lines.append(f"{indent}  {pc:4d} {OPNAMES[op]}{suffix}")
+        for function in self.functions:
+            lines.append(function.disassemble(indent + "  "))
+        return "\n".join(lines)
+
+
+def _encode_argument(argument):
+    # Static types are stored by keyword so marshal can serialize them
+    if isinstance(argument, tuple):
+        return tuple(_encode_argument(item) for item in argument)
+    if isinstance(argument, TokenType):
+        return ("__type__", argument.value)
+    return argument
+
+
+def _decode_argument(argument):
+    if isinstance(argument, tuple):
+        if len(argument) == 2 and argument[0] == "__type__":
+            return TokenType(argument[1])
+        return tuple(_decode_argument(item) for item in argument)
+    return argument
+
+
+def dumps(code):
+    """Serialize a CodeObject to bytes"""
+    return MAGIC + b"\n" + marshal.dumps(code.to_tuple())
+
+
+def loads(data):
+    """Deserialize bytes produced by dumps, or return None if incompatible"""
+    header, _, payload = data.partition(b"\n")
+    if header != MAGIC:
+        return None
+    return CodeObject.from_tuple(marshal.loads(payload))
+
+
+# -----------------------------
+#  .sopc cache
+# -----------------------------
+def source_hash(source):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def cache_path(filename, optimized=False):
+    """Return the .sopc path used to cache the given source file
+
+    Bytecode compiled from an optimized AST is kept in a separate .opt.sopc
+    file so the two never replace each other.
+    """
+    directory, base = os.path.split(os.path.abspath(filename))
+    stem = os.path.splitext(base)[0]
+    suffix = ".opt.sopc" if optimized else ".sopc"
+    return os.path.join(directory, CACHE_DIR, stem + suffix)
+
+
+def load_cached(filename, source, optimized=False):
+    """Return the cached CodeObject for filename if it matches source, else None"""
+    try:
+        with open(cache_path(filename, optimized), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    digest, _, payload = data.partition(b"\n")
+    if digest.decode("ascii", "replace") != source_hash(source):
+        return None
+    try:
+        return loads(payload)
+    except (EOFError, ValueError, TypeError):
+        # Corrupt or truncated cache files are simply recompiled
+        return None
+
+
+def store_cached(filename, source, code, optimized=False):
+    """Write code to the cache for filename; failures are silently ignored"""
+    path = cache_path(filename, optimized)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(source_hash(source).encode("ascii") + b"\n" + dumps(code))
+        os.replace(temp_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,614 @@
+"""
+Soplang bytecode compiler.
+
+Lowers an AST produced by Parser.parse into CodeObjects for the
+VirtualMachine. Every function body gets its own CodeObject whose locals
+live in the slots assigned by the Resolver; names that are not local to any
+enclosing function are global. Control flow (haddii, intay, kuceli, dooro,
+isku_day) becomes jumps, so break/continue/return no longer need exceptions.
+"""
+
+from src.core.ast import NodeType
+from src.core.lowering import lower
+from src.core.resolver import function_parts, resolve
+from src.runtime import bytecode as bc
+from src.runtime.bytecode import CodeObject
+
+# Expression node types that may appear in statement position
+EXPRESSION_STATEMENTS = (
+    NodeType.BINARY_OPERATION,
+    NodeType.UNARY_OPERATION,
+    NodeType.PROPERTY_ACCESS,
+    NodeType.METHOD_CALL,
+    NodeType.INDEX_ACCESS,
+    NodeType.CONDITIONAL_EXPRESSION,
+    NodeType.IDENTIFIER,
+    NodeType.LITERAL,
+)
+
+BINARY_OPCODES = {
+    "+": bc.BINARY_ADD,
+    "-": bc.BINARY_SUBTRACT,
+    "*": bc.BINARY_MULTIPLY,
+    "/": bc.BINARY_DIVIDE,
+    "%": bc.BINARY_MODULO,
+    "==": bc.COMPARE_EQ,
+    "!=": bc.COMPARE_NE,
+    ">": bc.COMPARE_GT,
+    "<": bc.COMPARE_LT,
+    ">=": bc.COMPARE_GE,
+    "<=": bc.COMPARE_LE,
+}
+
+# && and || jump over their right operand when the left one decides
+SHORT_CIRCUIT_OPCODES = {
+    "&&": bc.JUMP_IF_FALSE_OR_POP,
+    "||": bc.JUMP_IF_TRUE_OR_POP,
+}
+
+
+class _Loop:
+    """Jump bookkeeping for the innermost enclosing loop"""
+
+    __slots__ = ("continue_target", "break_jumps", "try_depth")
+
+    def __init__(self, try_depth):
+        self.continue_target = None
+        self.break_jumps = []
+        self.try_depth = try_depth
+
+
+class _Scope:
+    """Compile-time state for one CodeObject"""
+
+    def __init__(self, name, params, parent=None, varnames=()):
+        self.name = name
+        self.params = params
+        self.parent = parent
+        self.varnames = list(varnames)
+        self.instructions = []
+        self.positions = []
+        self.constants = []
+        self.constant_index = {}
+        self.names = []
+        self.name_index = {}
+        self.functions = []
+        self.loops = []
+        self.try_depth = 0
+
+    def build(self):
+        return CodeObject(
+            self.name,
+            list(self.params),
+            self.instructions,
+            self.positions,
+            self.constants,
+            self.names,
+            self.varnames,
+            self.functions,
+        )
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.scope = None
+        self.statement_compilers = {
+            NodeType.PROGRAM: self.compile_block,
+            NodeType.BLOCK: self.compile_block,
+            NodeType.VARIABLE_DECLARATION: self.compile_var_declaration,
+            NodeType.FUNCTION_DEFINITION: self.compile_function_definition,
+            NodeType.IF_STATEMENT: self.compile_if_statement,
+            NodeType.SWITCH_STATEMENT: self.compile_switch_statement,
+            NodeType.LOOP_STATEMENT: self.compile_loop_statement,
+            NodeType.WHILE_STATEMENT: self.compile_while_statement,
+            NodeType.BREAK_STATEMENT: self.compile_break,
+            NodeType.CONTINUE_STATEMENT: self.compile_continue,
+            NodeType.RETURN_STATEMENT: self.compile_return,
+            NodeType.IMPORT_STATEMENT: self.compile_import_statement,
+            NodeType.TRY_CATCH: self.compile_try_catch,
+            NodeType.ASSIGNMENT: self.compile_assignment_statement,
+        }
+        # Statements that leave a value on the stack
+        self.value_compilers = {
+            NodeType.FUNCTION_CALL: self.compile_function_call,
+            NodeType.ASSIGNMENT: self.compile_assignment,
+            NodeType.CLASS_DEFINITION: self.compile_class_definition,
+        }
+        self.expression_compilers = {
+            NodeType.LITERAL: self.compile_literal,
+            NodeType.IDENTIFIER: self.compile_identifier,
+            NodeType.BINARY_OPERATION: self.compile_binary_operation,
+            NodeType.UNARY_OPERATION: self.compile_unary_operation,
+            NodeType.LIST_LITERAL: self.compile_list_literal,
+            NodeType.OBJECT_LITERAL: self.compile_object_literal,
+            NodeType.PROPERTY_ACCESS: self.compile_property_access,
+            NodeType.METHOD_CALL: self.compile_method_call,
+            NodeType.INDEX_ACCESS: self.compile_index_access,
+            NodeType.FUNCTION_CALL: self.compile_function_call,
+            NodeType.CONDITIONAL_EXPRESSION: self.compile_conditional_expression,
+        }
+
+    # -----------------------------
+    #  Entry points
+    # -----------------------------
+    def compile_program(self, root, name="<module>"):
+        """Compile a PROGRAM node into a module-level CodeObject"""
+        resolve(root)
+        lower(root)
+        self.scope = _Scope(name, [])
+        self.compile_statements(root.children)
+        self.emit(bc.RETURN_NONE)
+        code = self.scope.build()
+        self.scope = None
+        return code
+
+    def compile_statements(self, nodes):
+        for node in nodes:
+            self.compile_statement(node)
+
+    def compile_statement(self, node):
+        compiler = self.statement_compilers.get(node.type)
+        if compiler is not None:
+            compiler(node)
+            return
+
+        compiler = self.value_compilers.get(node.type)
+        if compiler is None and node.type in EXPRESSION_STATEMENTS:
+            compiler = self.compile_expression
+        if compiler is not None:
+            # Evaluate and discard the result
+            compiler(node)
+            self.emit(bc.POP_TOP)
+            return
+
+        self.emit_error("unknown_node_type", node, node_type=str(node.type))
+
+    def compile_expression(self, node):
+        compiler = self.expression_compilers.get(node.type)
+        if compiler is not None:
+            compiler(node)
+            return
+        self.emit_error("unknown_node_type", node, node_type=str(node.type))
+        # Keep the stack balanced for the (unreachable) consumer
+        self.emit_const(None)
+
+    # -----------------------------
+    #  Emission helpers
+    # -----------------------------
+    def emit(self, op, argument=None, node=None):
+        scope = self.scope
+        scope.instructions.append((op, argument))
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+        scope.positions.append(
+            None if line is None and position is None else (line, position)
+        )
+        return len(scope.instructions) - 1
+
+    def emit_const(self, value):
+        self.emit(bc.LOAD_CONST, self.add_const(value))
+
+    def emit_error(self, code, node, **kwargs):
+        self.emit(
+            bc.RAISE_ERROR,
+            self.add_const((code, tuple(kwargs.items()))),
+            node,
+        )
+
+    def add_const(self, value):
+        scope = self.scope
+        # Key on the type as well so 1, 1.0 and True stay distinct
+        key = (type(value), value)
+        index = scope.constant_index.get(key)
+        if index is None:
+            index = len(scope.constants)
+            scope.constants.append(value)
+            scope.constant_index[key] = index
+        return index
+
+    def add_name(self, name):
+        scope = self.scope
+        index = scope.name_index.get(name)
+        if index is None:
+            index = len(scope.names)
+            scope.names.append(name)
+            scope.name_index[name] = index
+        return index
+
+    def label(self):
+        return len(self.scope.instructions)
+
+    def patch(self, index, target=None):
+        """Point the jump at index to target (default: the next instruction)"""
+        if target is None:
+            target = self.label()
+        op, argument = self.scope.instructions[index]
+        if op == bc.FUNCTION_REF:
+            argument = (argument[0], target)
+        else:
+            argument = target
+        self.scope.instructions[index] = (op, argument)
+
+    @staticmethod
+    def slot_kind(slot):
+        """Classify a Resolver slot as fast, deref or global"""
+        if slot is None:
+            return "global"
+        return "fast" if slot[0] == 0 else "deref"
+
+    def variable_argument(self, node, name):
+        """Return the (kind, instruction argument) for a resolved variable"""
+        slot = getattr(node, "slot", None)
+        kind = self.slot_kind(slot)
+        if kind == "global":
+            return kind, self.add_name(name)
+        if kind == "fast":
+            return kind, slot[1]
+        return kind, slot
+
+    # -----------------------------
+    #  Statements
+    # -----------------------------
+    def compile_block(self, node):
+        self.compile_statements(node.children)
+
+    def compile_var_declaration(self, node):
+        self.compile_expression(node.children[0])
+        var_type = getattr(node, "var_type", None)
+        is_constant = getattr(node, "is_constant", False)
+        # Declarations always bind in the current frame
+        kind, target = self.variable_argument(node, node.value)
+        op = bc.DECLARE_FAST if kind == "fast" else bc.DECLARE_GLOBAL
+        self.emit(op, (target, var_type, is_constant), node)
+
+    def compile_function_definition(self, node):
+        index = self.compile_function_code(node)
+        self.emit(bc.MAKE_FUNCTION, index, node)
+
+    def compile_function_code(self, node):
+        """Compile a function or method into a nested CodeObject; return its index"""
+        params, body = function_parts(node)
+        enclosing = self.scope
+        self.scope = _Scope(node.value, params, enclosing, node.scope.names)
+        try:
+            self.compile_function_body(body)
+            code = self.scope.build()
+        finally:
+            self.scope = enclosing
+
+        enclosing.functions.append(code)
+        return len(enclosing.functions) - 1
+
+    def compile_function_body(self, body):
+        # A function without celi returns the value of its last statement
+        for node in body[:-1]:
+            self.compile_statement(node)
+        if body and body[-1].type in self.value_compilers:
+            self.value_compilers[body[-1].type](body[-1])
+            self.emit(bc.RETURN_VALUE)
+            return
+        if body:
+            self.compile_statement(body[-1])
+        self.emit(bc.RETURN_NONE)
+
+    def compile_if_statement(self, node):
+        parts = node.parts
+        end_jumps = []
+        for condition, branch_body in parts.arms:
+            self.compile_expression(condition)
+            skip = self.emit(bc.POP_JUMP_IF_FALSE)
+            self.compile_statements(branch_body)
+            end_jumps.append(self.emit(bc.JUMP))
+            self.patch(skip)
+        if parts.else_body is not None:
+            self.compile_statements(parts.else_body)
+        for jump in end_jumps:
+            self.patch(jump)
+
+    def compile_switch_statement(self, node):
+        parts = node.parts
+        self.compile_expression(parts.subject)
+
+        # Each run of literal case values becomes one SWITCH_JUMP through a
+        # table; any other case value is compared against the subject in order
+        case_jumps = []  # (case index, jump instruction)
+        tables = []  # {case value: case index}, until the bodies are placed
+        table = None
+        for index, (value, _) in enumerate(parts.cases):
+            if value.type == NodeType.LITERAL:
+                if table is None:
+                    table = {}
+                    tables.append(table)
+                    # Not add_const: a dict is unhashable and never shared
+                    self.emit(bc.SWITCH_JUMP, len(self.scope.constants))
+                    self.scope.constants.append(table)
+                table.setdefault(value.value, index)
+                continue
+            table = None
+            self.emit(bc.DUP_TOP)
+            self.compile_expression(value)
+            self.emit(bc.COMPARE_EQ)
+            case_jumps.append((index, self.emit(bc.POP_JUMP_IF_TRUE)))
+
+        self.emit(bc.POP_TOP)
+        if parts.default_body is not None:
+            self.compile_statements(parts.default_body)
+        end_jumps = [self.emit(bc.JUMP)]
+
+        starts = []
+        for _, body in parts.cases:
+            starts.append(self.label())
+            self.emit(bc.POP_TOP)
+            self.compile_statements(body)
+            end_jumps.append(self.emit(bc.JUMP))
+
+        for index, jump in case_jumps:
+            self.patch(jump, starts[index])
+        for table in tables:
+            for value, index in table.items():
+                table[value] = starts[index]
+        for jump in end_jumps:
+            self.patch(jump)
+
+    def compile_loop_statement(self, node):
+        parts = node.parts
+        self.compile_expression(parts.start)
+        self.compile_expression(parts.end)
+        if parts.step is not None:
+            self.compile_expression(parts.step)
+        else:
+            self.emit_const(1)
+
+        # FOR_PREP replaces start/end/step with a single loop state entry
+        self.emit(bc.FOR_PREP, None, node)
+        loop = _Loop(self.scope.try_depth)
+        top = self.label()
+        exit_jump = self.emit(bc.FOR_ITER)
+        kind, target = self.variable_argument(node, node.value)
+        self.emit(bc.BIND_FAST if kind == "fast" else bc.BIND_GLOBAL, target)
+
+        loop.continue_target = top
+        self.scope.loops.append(loop)
+        self.compile_statements(parts.body)
+        self.scope.loops.pop()
+        self.emit(bc.JUMP, top)
+
+        # break leaves the loop state on the stack
+        for jump in loop.break_jumps:
+            self.patch(jump)
+        if loop.break_jumps:
+            self.emit(bc.POP_TOP)
+        self.patch(exit_jump)
+
+    def compile_while_statement(self, node):
+        loop = _Loop(self.scope.try_depth)
+        top = self.label()
+        loop.continue_target = top
+        self.compile_expression(node.children[0])
+        exit_jump = self.emit(bc.POP_JUMP_IF_FALSE)
+
+        self.scope.loops.append(loop)
+        self.compile_statements(node.children[1:])
+        self.scope.loops.pop()
+        self.emit(bc.JUMP, top)
+
+        self.patch(exit_jump)
+        for jump in loop.break_jumps:
+            self.patch(jump)
+
+    def _unwind_try(self, loop):
+        # Leaving a try block by a jump must drop its handler
+        for _ in range(self.scope.try_depth - loop.try_depth):
+            self.emit(bc.POP_TRY)
+
+    def compile_break(self, node):
+        if not self.scope.loops:
+            self.emit_error("break_outside_loop", None)
+            return
+        loop = self.scope.loops[-1]
+        self._unwind_try(loop)
+        loop.break_jumps.append(self.emit(bc.JUMP))
+
+    def compile_continue(self, node):
+        if not self.scope.loops:
+            self.emit_error("continue_outside_loop", None)
+            return
+        loop = self.scope.loops[-1]
+        self._unwind_try(loop)
+        self.emit(bc.JUMP, loop.continue_target)
+
+    def compile_return(self, node):
+        if self.scope.parent is None:
+            self.emit_error("return_outside_function", None)
+            return
+        if node.children:
+            parts = node.parts
+            if parts.tail_call:
+                # RETURN_VALUE is only reached when the callee is not a hawl
+                self.compile_function_call(parts.value, bc.TAIL_CALL)
+            else:
+                self.compile_expression(parts.value)
+            self.emit(bc.RETURN_VALUE)
+        else:
+            self.emit(bc.RETURN_NONE)
+
+    def compile_import_statement(self, node):
+        self.emit(bc.IMPORT, self.add_const(node.value), node)
+
+    def compile_try_catch(self, node):
+        setup = self.emit(bc.SETUP_TRY)
+        self.scope.try_depth += 1
+        self.compile_block(node.children[0])
+        self.scope.try_depth -= 1
+        self.emit(bc.POP_TRY)
+        end_jump = self.emit(bc.JUMP)
+
+        # The VM pushes the error message before jumping here
+        self.patch(setup)
+        kind, target = self.variable_argument(node, node.value)
+        self.emit(bc.BIND_FAST if kind == "fast" else bc.BIND_GLOBAL, target)
+        self.compile_block(node.children[1])
+        self.patch(end_jump)
+
+    def compile_class_definition(self, node):
+        if isinstance(node.value, tuple):
+            class_name, parent_name = node.value
+        else:
+            class_name = node.value
+            parent_name = None
+
+        if parent_name:
+            self.emit(bc.CHECK_CLASS_PARENT, self.add_const(parent_name), node)
+
+        methods = []
+        fields = []
+        for child in node.children:
+            if child.type == NodeType.FUNCTION_DEFINITION:
+                # Methods are compiled but not bound as global functions
+                methods.append((child.value, self.compile_function_code(child)))
+            elif child.type == NodeType.VARIABLE_DECLARATION:
+                # Field values stay on the stack until MAKE_CLASS
+                self.compile_expression(child.children[0])
+                fields.append(child.value)
+            else:
+                # Execute any statements in the class (like qor())
+                self.compile_statement(child)
+
+        self.emit(
+            bc.MAKE_CLASS,
+            self.add_const((class_name, parent_name, tuple(methods), tuple(fields))),
+            node,
+        )
+
+    def compile_assignment_statement(self, node):
+        self.compile_assignment(node, keep_value=False)
+
+    def compile_assignment(self, node, keep_value=True):
+        target = node.children[0]
+        self.compile_expression(node.children[1])
+        if keep_value:
+            # Assignments evaluate to the assigned value
+            self.emit(bc.DUP_TOP)
+
+        if target.type == NodeType.IDENTIFIER:
+            kind, slot = self.variable_argument(target, target.value)
+            op = {
+                "fast": bc.STORE_FAST,
+                "deref": bc.STORE_DEREF,
+                "global": bc.STORE_GLOBAL,
+            }[kind]
+            self.emit(op, slot, node)
+        elif target.type == NodeType.PROPERTY_ACCESS:
+            self.compile_expression(target.children[0])
+            self.emit(bc.SET_PROPERTY, self.add_name(target.value), node)
+        elif target.type == NodeType.INDEX_ACCESS:
+            self.compile_expression(target.children[0])
+            self.compile_expression(target.children[1])
+            self.emit(bc.SET_INDEX, None, node)
+        else:
+            self.emit_error(
+                "invalid_syntax",
+                node,
+                detail=f"Invalid assignment target: {target.type}",
+            )
+
+    # -----------------------------
+    #  Expressions
+    # -----------------------------
+    def compile_literal(self, node):
+        self.emit_const(node.value)
+
+    def compile_identifier(self, node):
+        kind, slot = self.variable_argument(node, node.value)
+        op = {
+            "fast": bc.LOAD_FAST,
+            "deref": bc.LOAD_DEREF,
+            "global": bc.LOAD_GLOBAL,
+        }[kind]
+        self.emit(op, slot, node)
+
+    def compile_binary_operation(self, node):
+        self.compile_expression(node.children[0])
+        jump_op = SHORT_CIRCUIT_OPCODES.get(node.value)
+        if jump_op is not None:
+            skip = self.emit(jump_op)
+            self.compile_expression(node.children[1])
+            self.emit(bc.TO_BOOL)
+            self.patch(skip)
+            return
+        self.compile_expression(node.children[1])
+        op = BINARY_OPCODES.get(node.value)
+        if op is not None:
+            self.emit(op, None, node)
+            return
+        self.emit(bc.POP_TOP)
+        self.emit(bc.POP_TOP)
+        self.emit_error("unknown_operator", node, operator=node.value)
+        self.emit_const(None)
+
+    def compile_conditional_expression(self, node):
+        condition, when_true, when_false = node.children
+        self.compile_expression(condition)
+        skip = self.emit(bc.POP_JUMP_IF_FALSE)
+        self.compile_expression(when_true)
+        end = self.emit(bc.JUMP)
+        self.patch(skip)
+        self.compile_expression(when_false)
+        self.patch(end)
+
+    def compile_unary_operation(self, node):
+        self.compile_expression(node.children[0])
+        if node.value == "!":
+            self.emit(bc.UNARY_NOT)
+            return
+        self.emit(bc.POP_TOP)
+        self.emit_error("unknown_operator", node, operator=node.value)
+        self.emit_const(None)
+
+    def compile_list_literal(self, node):
+        for element in node.children:
+            self.compile_expression(element)
+        self.emit(bc.BUILD_LIST, len(node.children))
+
+    def compile_object_literal(self, node):
+        for prop in node.children:
+            self.compile_expression(prop.children[0])
+        keys = tuple(prop.value for prop in node.children)
+        self.emit(bc.BUILD_OBJECT, self.add_const(keys))
+
+    def compile_property_access(self, node):
+        self.compile_expression(node.children[0])
+        self.emit(bc.GET_PROPERTY, self.add_name(node.value), node)
+
+    def compile_method_call(self, node):
+        self.compile_expression(node.children[0])
+        for arg in node.children[1:]:
+            if node.value == "shaandhee" and arg.type == NodeType.IDENTIFIER:
+                # shaandhee may receive a function by name instead of a value
+                ref = self.emit(bc.FUNCTION_REF, (self.add_name(arg.value), None))
+                self.compile_expression(arg)
+                self.patch(ref)
+            else:
+                self.compile_expression(arg)
+        self.emit(
+            bc.CALL_METHOD,
+            (self.add_name(node.value), len(node.children) - 1),
+            node,
+        )
+
+    def compile_index_access(self, node):
+        self.compile_expression(node.children[0])
+        self.compile_expression(node.children[1])
+        self.emit(bc.GET_INDEX, None, node)
+
+    def compile_function_call(self, node, op=bc.CALL_FUNCTION):
+        for arg in node.children:
+            self.compile_expression(arg)
+        # A name bound by some enclosing hawl, such as a parameter holding a
+        # hawl, is looked up there before the hawl of the same name
+        local = "." not in node.value and getattr(node, "slot", None) is not None
+        self.emit(
+            op,
+            (self.add_name(node.value), len(node.children), local),
+            node,
+        )
@@ -0,0 +1,1326 @@
+"""
+Soplang closure compiler.
+
+Turns an AST produced by Parser.parse into a tree of specialized Python
+closures. Node dispatch, child layout discovery and source positions are all
+resolved once at compile time, so running a program is just a call to the
+root closure. The tree-walking Interpreter.execute/evaluate path is kept as
+the reference implementation and both must produce identical results.
+
+Programs are run through the Resolver first: function locals are read and
+written as FunctionFrame slots and globals straight from the global scope,
+so no scope chain is searched by name at runtime. jooji, soco and celi are
+returned as Completion values instead of being raised as signal exceptions.
+"""
+
+from src.core.ast import ASTNode, NodeType
+from src.core.lowering import case_index, lower
+from src.core.resolver import function_parts, resolve
+from src.runtime.environment import UNBOUND
+from src.runtime.method_cache import MethodCache
+from src.runtime.operators import NATIVE, OPERATORS, SPECULATION_ERRORS, to_string
+from src.utils.errors import RuntimeError, TypeError
+
+# Expression node types that may appear in statement position
+EXPRESSION_STATEMENTS = (
+    NodeType.BINARY_OPERATION,
+    NodeType.UNARY_OPERATION,
+    NodeType.PROPERTY_ACCESS,
+    NodeType.METHOD_CALL,
+    NodeType.INDEX_ACCESS,
+    NodeType.CONDITIONAL_EXPRESSION,
+    NodeType.IDENTIFIER,
+    NodeType.LITERAL,
+)
+
+
+class Completion:
+    """Abrupt completion of a statement: jooji, soco or celi with its value
+
+    Statements that can complete abruptly return None when they finish
+    normally and a Completion otherwise, so loops and function bodies check a
+    return value instead of catching exceptions.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value=None):
+        self.value = value
+
+
+class TailCall:
+    """A hawl call in tail position, returned by the body of the hawl that
+    makes it; call_user_function runs it in place of that hawl"""
+
+    __slots__ = ("definition", "args")
+
+    def __init__(self, definition, args):
+        self.definition = definition  # The dict stored in functions
+        self.args = args
+
+
+BREAK = Completion()
+CONTINUE = Completion()
+RETURN_NONE = Completion()
+
+
+def completes_abruptly(node, in_loop=False):
+    """Whether running node as a statement can produce a Completion"""
+    node_type = node.type
+    if node_type in (NodeType.BREAK_STATEMENT, NodeType.CONTINUE_STATEMENT):
+        # Consumed by the enclosing loop, if there is one inside node
+        return not in_loop
+    if node_type == NodeType.RETURN_STATEMENT:
+        return True
+    if node_type in (NodeType.FUNCTION_DEFINITION, NodeType.CLASS_DEFINITION):
+        return False
+    if node_type in (NodeType.LOOP_STATEMENT, NodeType.WHILE_STATEMENT):
+        in_loop = True
+    return any(completes_abruptly(child, in_loop) for child in node.children)
+
+
+def loop_range(start, end, step):
+    """Values a kuceli loop binds its counter to, from start to end inclusive
+
+    Int bounds and a nonzero int step, the common case, give a native range.
+    Anything else is counted with repeated += as before, so float loops keep
+    their exact rounding.
+    """
+    if type(start) is int and type(end) is int and type(step) is int and step:
+        return range(start, end + 1 if step > 0 else end - 1, step)
+    if (
+        not isinstance(start, (int, float)) or
+        not isinstance(end, (int, float)) or
+        not isinstance(step, (int, float))
+    ):
+        raise TypeError("invalid_for_loop")
+    return _count(start, end, step)
+
+
+def _count(i, end, step):
+    if step > 0:
+        while i <= end:
+            yield i
+            i += step
+    else:
+        while i >= end:
+            yield i
+            i += step
+
+
+def outside_error(signal):
+    """Error for a Completion that reached a statement that cannot handle it"""
+    if signal is BREAK:
+        return RuntimeError("break_outside_loop")
+    if signal is CONTINUE:
+        return RuntimeError("continue_outside_loop")
+    return RuntimeError("return_outside_function")
+
+
+def _nothing():
+    """Closure for an empty statement list or a bare celi"""
+    return None
+
+
+def _run_all(statements):
+    """Build a closure that runs compiled statements and returns the last result"""
+    if not statements:
+        return _nothing
+    if len(statements) == 1:
+        return statements[0]
+
+    def run():
+        result = None
+        for statement in statements:
+            result = statement()
+        return result
+
+    return run
+
+
+def _run_block(statements, abrupt):
+    """Build a closure that runs statements and returns their Completion, if any
+
+    abrupt holds the completes_abruptly flag of each statement; only those
+    statements have their result checked.
+    """
+    if not any(abrupt):
+        if len(statements) == 1:
+            statement = statements[0]
+
+            def run_one():
+                statement()
+
+            return run_one
+
+        def run():
+            for statement in statements:
+                statement()
+
+        return run
+
+    if len(statements) == 1:
+        return statements[0]
+    steps = list(zip(statements, abrupt))
+
+    def run_checked():
+        for statement, may_complete in steps:
+            if may_complete:
+                signal = statement()
+                if signal is not None:
+                    return signal
+            else:
+                statement()
+
+    return run_checked
+
+
+class Compiler:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.scopes = []  # FunctionScopes of the functions being compiled
+        self.statement_compilers = {
+            NodeType.PROGRAM: self.compile_block,
+            NodeType.BLOCK: self.compile_block,
+            NodeType.VARIABLE_DECLARATION: self.compile_var_declaration,
+            NodeType.FUNCTION_DEFINITION: self.compile_function_definition,
+            NodeType.FUNCTION_CALL: self.compile_function_call,
+            NodeType.IF_STATEMENT: self.compile_if_statement,
+            NodeType.SWITCH_STATEMENT: self.compile_switch_statement,
+            NodeType.LOOP_STATEMENT: self.compile_loop_statement,
+            NodeType.WHILE_STATEMENT: self.compile_while_statement,
+            NodeType.BREAK_STATEMENT: self.compile_break,
+            NodeType.CONTINUE_STATEMENT: self.compile_continue,
+            NodeType.RETURN_STATEMENT: self.compile_return,
+            NodeType.IMPORT_STATEMENT: self.compile_import_statement,
+            NodeType.TRY_CATCH: self.compile_try_catch,
+            NodeType.CLASS_DEFINITION: self.compile_class_definition,
+            NodeType.ASSIGNMENT: self.compile_assignment,
+        }
+        self.expression_compilers = {
+            NodeType.LITERAL: self.compile_literal,
+            NodeType.IDENTIFIER: self.compile_identifier,
+            NodeType.BINARY_OPERATION: self.compile_binary_operation,
+            NodeType.UNARY_OPERATION: self.compile_unary_operation,
+            NodeType.LIST_LITERAL: self.compile_list_literal,
+            NodeType.OBJECT_LITERAL: self.compile_object_literal,
+            NodeType.PROPERTY_ACCESS: self.compile_property_access,
+            NodeType.METHOD_CALL: self.compile_method_call,
+            NodeType.INDEX_ACCESS: self.compile_index_access,
+            NodeType.FUNCTION_CALL: self.compile_function_call,
+            NodeType.CONDITIONAL_EXPRESSION: self.compile_conditional_expression,
+        }
+
+    # -----------------------------
+    #  Entry points
+    # -----------------------------
+    def compile_program(self, root):
+        """Compile a PROGRAM node into a closure that runs the whole program"""
+        interpreter = self.interpreter
+        resolve(root, interpreter.globals.values, interpreter.functions)
+        lower(root)
+        body = self.compile_block(root)
+
+        def program():
+            signal = body()
+            if signal is not None:
+                raise outside_error(signal)
+
+        return program
+
+    def compile_statements(self, nodes):
+        statements = [self.compile_statement(node) for node in nodes]
+        profiler = self.interpreter.profiler
+        if profiler is not None:
+            statements = [
+                self._count_line(profiler, node, statement)
+                for node, statement in zip(nodes, statements)
+            ]
+        return statements
+
+    def _count_line(self, profiler, node, statement):
+        """With --profile, count the runs of a statement against its line"""
+        line = getattr(node, "line", None)
+        if line is None:
+            return statement
+        return profiler.count_line(self.interpreter.filename, line, statement)
+
+    def compile_body(self, nodes):
+        """Compile statements into one closure that returns None or a Completion"""
+        return _run_block(
+            self.compile_statements(nodes),
+            [completes_abruptly(node) for node in nodes],
+        )
+
+    def compile_statement(self, node):
+        compiler = self.statement_compilers.get(node.type)
+        if compiler is not None:
+            return compiler(node)
+
+        if node.type in EXPRESSION_STATEMENTS:
+            # Evaluate the expression and discard the result
+            expression = self.compile_expression(node)
+
+            def discard():
+                expression()
+
+            return discard
+
+        node_type = node.type
+
+        def unknown():
+            raise RuntimeError("unknown_node_type", node_type=node_type)
+
+        return unknown
+
+    def compile_expression(self, node):
+        compiler = self.expression_compilers.get(node.type)
+        if compiler is not None:
+            return compiler(node)
+
+        node_type = node.type
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+
+        def unknown():
+            raise RuntimeError(
+                "unknown_node_type", node_type=node_type, line=line, position=position
+            )
+
+        return unknown
+
+    # -----------------------------
+    #  Variable access
+    # -----------------------------
+    def compile_load(self, slot, name, line=None, position=None):
+        """Build a closure reading the variable the Resolver bound to slot"""
+        interpreter = self.interpreter
+
+        if slot is None:
+            values = interpreter.globals.values
+
+            def load_global():
+                try:
+                    return values[name]
+                except KeyError:
+                    value = interpreter.function_value(name)
+                    if value is not None:
+                        return value
+                    raise RuntimeError(
+                        "undefined_variable", name=name, line=line, position=position
+                    )
+
+            return load_global
+
+        depth, index = slot
+        load_unbound = self._load_unbound
+
+        if depth == 0:
+
+            def load_local():
+                value = interpreter.env.slots[index]
+                if value is UNBOUND:
+                    return load_unbound(interpreter.env, name, line, position)
+                return value
+
+            return load_local
+
+        def load_enclosing():
+            frame = interpreter.env.outer(depth)
+            value = frame.slots[index]
+            if value is UNBOUND:
+                return load_unbound(frame, name, line, position)
+            return value
+
+        return load_enclosing
+
+    def _load_unbound(self, frame, name, line, position):
+        # Before its declaration runs, a local name still sees outer scopes;
+        # find_slot skips this frame's own unbound slot and stops at globals
+        found = frame.find_slot(name)
+        if found is not None:
+            outer, slot = found
+            return outer.slots[slot]
+        values = self.interpreter.globals.values
+        if name in values:
+            return values[name]
+        value = self.interpreter.function_value(name)
+        if value is not None:
+            return value
+        raise RuntimeError(
+            "undefined_variable", name=name, line=line, position=position
+        )
+
+    def compile_store(self, slot, name, line=None, position=None):
+        """Build a closure assigning to a variable, enforcing madoor and types"""
+        interpreter = self.interpreter
+
+        if slot is None:
+            global_env = interpreter.globals
+            values = global_env.values
+            constants = global_env.constants
+            types = global_env.types
+            store_variable = interpreter.store_variable
+
+            def store_global(value):
+                if name in values and name not in constants and name not in types:
+                    values[name] = value
+                    return value
+                env = global_env if name in values else None
+                return store_variable(env, name, value, line, position)
+
+            return store_global
+
+        depth, index = slot
+        store_slow = self._store_slot
+        # Only slots with a madoor or typed declaration ever need checks
+        checked = index in self.scopes[-1 - depth].checked
+
+        def store_local(value):
+            frame = interpreter.env.outer(depth) if depth else interpreter.env
+            slots = frame.slots
+            if checked or slots[index] is UNBOUND:
+                return store_slow(frame, index, name, value, line, position)
+            slots[index] = value
+            return value
+
+        return store_local
+
+    def _store_slot(self, frame, index, name, value, line, position):
+        interpreter = self.interpreter
+        if frame.slots[index] is UNBOUND:
+            # Not declared in this call yet: assign in the enclosing scopes
+            found = frame.find_slot(name)
+            if found is not None:
+                outer, slot = found
+                return self._store_slot(outer, slot, name, value, line, position)
+            global_env = interpreter.globals
+            env = global_env if name in global_env.values else None
+            return interpreter.store_variable(env, name, value, line, position)
+
+        if frame.constants is not None and index in frame.constants:
+            raise RuntimeError(
+                "constant_reassignment", name=name, line=line, position=position
+            )
+        if frame.types is not None and index in frame.types:
+            interpreter.validate_type(
+                name,
+                value,
+                frame.types[index],
+                ASTNode(NodeType.ASSIGNMENT, line=line, position=position),
+            )
+        frame.slots[index] = value
+        return value
+
+    def compile_bind(self, slot, name):
+        """Build a closure binding a loop or catch variable without checks"""
+        interpreter = self.interpreter
+        if slot is None:
+            values = interpreter.globals.values
+
+            def bind_global(value):
+                values[name] = value
+
+            return bind_global
+
+        index = slot[1]
+
+        def bind_local(value):
+            interpreter.env.slots[index] = value
+
+        return bind_local
+
+    # -----------------------------
+    #  Statements
+    # -----------------------------
+    def compile_block(self, node):
+        return self.compile_body(node.children)
+
+    def compile_var_declaration(self, node):
+        interpreter = self.interpreter
+        var_name = node.value
+        value = self.compile_expression(node.children[0])
+        var_type = getattr(node, "var_type", None)
+        is_constant = getattr(node, "is_constant", False)
+        validate_type = interpreter.validate_type
+        slot = getattr(node, "slot", None)
+
+        if slot is None:
+            global_env = interpreter.globals
+            values = global_env.values
+
+            if var_type is None and not is_constant:
+
+                def declare():
+                    values[var_name] = value()
+
+                return declare
+
+            def declare_typed():
+                var_value = value()
+                if var_type is not None:
+                    validate_type(var_name, var_value, var_type, node)
+                global_env.define(
+                    var_name, var_value, var_type=var_type, is_constant=is_constant
+                )
+
+            return declare_typed
+
+        index = slot[1]
+
+        if var_type is None and not is_constant:
+
+            def declare_local():
+                interpreter.env.slots[index] = value()
+
+            return declare_local
+
+        def declare_local_typed():
+            var_value = value()
+            frame = interpreter.env
+            if var_type is not None:
+                validate_type(var_name, var_value, var_type, node)
+                if frame.types is None:
+                    frame.types = {}
+                frame.types[index] = var_type
+            if is_constant:
+                if frame.constants is None:
+                    frame.constants = set()
+                frame.constants.add(index)
+            frame.slots[index] = var_value
+
+        return declare_local_typed
+
+    def compile_function_definition(self, node):
+        interpreter = self.interpreter
+        func_name = node.value
+        params, body_nodes = function_parts(node)
+        scope = node.scope
+        line = getattr(node, "line", None)
+        code = self.compile_function_body(scope, body_nodes)
+        functions = interpreter.functions
+        profiler = interpreter.profiler
+        if profiler is not None:
+            key = profiler.function_key(interpreter.filename, line, func_name)
+            code = profiler.time_function(key, code)
+
+        def define():
+            functions[func_name] = {
+                "name": func_name,
+                "line": line,
+                "params": params,
+                "body": body_nodes,
+                "env": interpreter.env,
+                "code": code,
+                "scope": scope,
+            }
+
+        return define
+
+    def compile_function_body(self, scope, body_nodes):
+        """Compile a function body into a closure that returns the call result"""
+        self.scopes.append(scope)
+        try:
+            # A trailing celi is compiled as the body's result expression, so
+            # the common case never builds a Completion
+            tail = None
+            if body_nodes and body_nodes[-1].type == NodeType.RETURN_STATEMENT:
+                last = body_nodes[-1]
+                body_nodes = body_nodes[:-1]
+                if last.children:
+                    tail = self.compile_return_value(last)
+                else:
+                    tail = _nothing
+                profiler = self.interpreter.profiler
+                if profiler is not None:
+                    tail = self._count_line(profiler, last, tail)
+            statements = self.compile_statements(body_nodes)
+            abrupt = [completes_abruptly(node) for node in body_nodes]
+        finally:
+            self.scopes.pop()
+
+        if not any(abrupt):
+            if tail is None:
+                return _run_all(statements)
+            if not statements:
+                return tail
+
+            def run_then_return():
+                for statement in statements:
+                    statement()
+                return tail()
+
+            return run_then_return
+
+        steps = list(zip(statements, abrupt))
+
+        def function_body():
+            result = None
+            for statement, may_complete in steps:
+                result = statement()
+                if may_complete and result is not None:
+                    if result is BREAK or result is CONTINUE:
+                        raise outside_error(result)
+                    return result.value
+            if tail is not None:
+                return tail()
+            return result
+
+        return function_body
+
+    def compile_function_call(self, node):
+        interpreter = self.interpreter
+        func_name = node.value
+        arguments = [self.compile_expression(arg) for arg in node.children]
+        functions = interpreter.functions
+        call_user_function = interpreter.call_user_function
+        profiler = interpreter.profiler
+        entry = None
+        if profiler is not None:
+            # A SamplingProfiler's entry for this call site's call_stack
+            entry = profiler.call_entry(interpreter.filename, node.line, func_name)
+
+        if "." in func_name:
+            obj_name, method_name = func_name.split(".", 1)
+            load = self.compile_load(getattr(node, "slot", None), obj_name)
+            call_dotted_method = interpreter.call_dotted_method
+
+            def call_dotted():
+                args = [argument() for argument in arguments]
+                func = functions.get(func_name)
+                if func is not None:
+                    if callable(func):
+                        return func(*args)
+                    return call_user_function(func, args)
+                try:
+                    obj = load()
+                except RuntimeError:
+                    obj = None
+                return call_dotted_method(obj_name, obj, method_name, args)
+
+            if entry is not None:
+                push = interpreter.call_stack.append
+                pop = interpreter.call_stack.pop
+                plain_call_user_function = call_user_function
+
+                def call_user_function(func, args):
+                    push(entry)
+                    try:
+                        return plain_call_user_function(func, args)
+                    finally:
+                        pop()
+
+            return call_dotted
+
+        call_variable = self._call_variable(node)
+        load_callee = self._load_callee(node)
+
+        if load_callee is not None:
+            # A local such as a parameter holding a hawl comes before any
+            # hawl or built-in of the same name, unless it cannot be called
+            definition_of = interpreter.definition_of
+            call_value = interpreter.call_value
+            if entry is not None:
+                push = interpreter.call_stack.append
+                pop = interpreter.call_stack.pop
+            else:
+                push = pop = None
+
+            def call_local():
+                args = [argument() for argument in arguments]
+                value = load_callee()
+                if not callable(value):
+                    func = functions.get(func_name)
+                    if func is None:
+                        return call_variable(args)
+                    if callable(func):
+                        return func(*args)
+                else:
+                    func = definition_of(value)
+                    if func is None:
+                        return call_value(func_name, value, args)
+                if push is None:
+                    return call_user_function(func, args)
+                push(entry)
+                try:
+                    return call_user_function(func, args)
+                finally:
+                    pop()
+
+            return call_local
+
+        if entry is not None:
+            push = interpreter.call_stack.append
+            pop = interpreter.call_stack.pop
+
+            def sampled_call():
+                args = [argument() for argument in arguments]
+                func = functions.get(func_name)
+                if func is None:
+                    return call_variable(args)
+                if callable(func):
+                    return func(*args)
+                push(entry)
+                try:
+                    return call_user_function(func, args)
+                finally:
+                    pop()
+
+            return sampled_call
+
+        def call():
+            args = [argument() for argument in arguments]
+            func = functions.get(func_name)
+            if func is None:
+                return call_variable(args)
+            if callable(func):
+                # Built-in function (Python function)
+                return func(*args)
+            # User-defined function (Soplang function)
+            return call_user_function(func, args)
+
+        return call
+
+    def _call_variable(self, node):
+        """f(x) where f is a variable holding a hawl rather than a hawl name"""
+        func_name = node.value
+        load = self.compile_load(getattr(node, "slot", None), func_name)
+        call_value = self.interpreter.call_value
+
+        def call_variable(args):
+            try:
+                value = load()
+            except RuntimeError:
+                raise RuntimeError("undefined_function", name=func_name)
+            return call_value(func_name, value, args)
+
+        return call_variable
+
+    def _load_callee(self, node):
+        """For f(x) where the Resolver made f a local: a closure returning the
+        value the running frames bind to f, or UNBOUND; None for other calls
+
+        Callers only call that value when it is callable and otherwise look
+        f up as for any other call.
+        """
+        slot = getattr(node, "slot", None)
+        if slot is None or "." in node.value:
+            return None
+        interpreter = self.interpreter
+        name = node.value
+        depth, index = slot
+
+        def load_callee():
+            frame = interpreter.env.outer(depth) if depth else interpreter.env
+            value = frame.slots[index]
+            if value is UNBOUND:
+                found = frame.find_slot(name)
+                if found is None:
+                    return UNBOUND
+                outer, outer_index = found
+                return outer.slots[outer_index]
+            return value
+
+        return load_callee
+
+    def compile_tail_call(self, node):
+        """Call in tail position: a TailCall for call_user_function to make
+        once the calling hawl's frame is gone, when it calls a hawl"""
+        func_name = node.value
+        arguments = [self.compile_expression(arg) for arg in node.children]
+        interpreter = self.interpreter
+        functions = interpreter.functions
+        call_variable = self._call_variable(node)
+        load_callee = self._load_callee(node)
+
+        if load_callee is not None:
+            definition_of = interpreter.definition_of
+            call_value = interpreter.call_value
+
+            def local_tail_call():
+                args = [argument() for argument in arguments]
+                value = load_callee()
+                if not callable(value):
+                    func = functions.get(func_name)
+                    if func is None:
+                        return call_variable(args)
+                    if callable(func):
+                        return func(*args)
+                    return TailCall(func, args)
+                func = definition_of(value)
+                if func is None:
+                    return call_value(func_name, value, args)
+                return TailCall(func, args)
+
+            return local_tail_call
+
+        def tail_call():
+            args = [argument() for argument in arguments]
+            func = functions.get(func_name)
+            if func is None:
+                return call_variable(args)
+            if callable(func):
+                return func(*args)
+            return TailCall(func, args)
+
+        return tail_call
+
+    def compile_if_statement(self, node):
+        parts = node.parts
+        (condition, body), *branches = [
+            (self.compile_expression(condition), self.compile_body(body))
+            for condition, body in parts.arms
+        ]
+        else_body = None
+        if parts.else_body is not None:
+            else_body = self.compile_body(parts.else_body)
+
+        def if_statement():
+            if condition():
+                return body()
+            for branch_condition, branch_body in branches:
+                if branch_condition():
+                    return branch_body()
+            if else_body is not None:
+                return else_body()
+
+        return if_statement
+
+    def compile_switch_statement(self, node):
+        parts = node.parts
+        subject = self.compile_expression(parts.subject)
+        table, ordered = parts.table, parts.ordered
+        bodies = [self.compile_body(body) for _, body in parts.cases]
+        default_body = None
+        if parts.default_body is not None:
+            default_body = self.compile_body(parts.default_body)
+        miss = len(bodies)
+
+        if not ordered:
+            # Every case value is a literal: one dict lookup picks the case
+            def switch_statement():
+                index = case_index(table, subject(), miss)
+                if index < miss:
+                    return bodies[index]()
+                if default_body is not None:
+                    return default_body()
+
+            return switch_statement
+
+        # Other cases are compared in order, but only up to the literal case
+        # the lookup found, since that one would match first otherwise
+        cases = [
+            (index, self.compile_expression(parts.cases[index][0]))
+            for index in ordered
+        ]
+
+        def switch_statement():
+            switch_value = subject()
+            index = case_index(table, switch_value, miss)
+            for case, case_value in cases:
+                if case > index:
+                    break
+                if switch_value == case_value():
+                    index = case
+                    break
+            if index < miss:
+                return bodies[index]()
+            if default_body is not None:
+                return default_body()
+
+        return switch_statement
+
+    def _compile_loop_body(self, nodes):
+        """Compile a loop body as (statements, None) when it cannot complete
+        abruptly, so the loop can run it inline, or as (None, body closure)"""
+        if any(completes_abruptly(node) for node in nodes):
+            return None, self.compile_body(nodes)
+        return self.compile_statements(nodes), None
+
+    def compile_loop_statement(self, node):
+        parts = node.parts
+        interpreter = self.interpreter
+        slot = getattr(node, "slot", None)
+        name = node.value
+        start = self.compile_expression(parts.start)
+        end = self.compile_expression(parts.end)
+        step = None
+        if parts.step is not None:
+            step = self.compile_expression(parts.step)
+        statements, body = self._compile_loop_body(parts.body)
+
+        def loop_statement():
+            counter = loop_range(start(), end(), step() if step is not None else 1)
+            # The counter is stored straight into its global or frame slot;
+            # calls in the body switch interpreter.env but restore it
+            if slot is None:
+                scope, key = interpreter.globals.values, name
+            else:
+                scope, key = interpreter.env.slots, slot[1]
+
+            if body is None:
+                for i in counter:
+                    scope[key] = i
+                    for statement in statements:
+                        statement()
+                return None
+
+            for i in counter:
+                scope[key] = i
+                signal = body()
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+
+        return loop_statement
+
+    def compile_while_statement(self, node):
+        condition = self.compile_expression(node.children[0])
+        statements, body = self._compile_loop_body(node.children[1:])
+
+        def while_statement():
+            if body is None:
+                while condition():
+                    for statement in statements:
+                        statement()
+                return None
+
+            while condition():
+                signal = body()
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+
+        return while_statement
+
+    def compile_break(self, node):
+        return lambda: BREAK
+
+    def compile_continue(self, node):
+        return lambda: CONTINUE
+
+    def compile_return(self, node):
+        if not node.children:
+            return lambda: RETURN_NONE
+
+        value = self.compile_return_value(node)
+
+        def return_statement():
+            return Completion(value())
+
+        return return_statement
+
+    def compile_return_value(self, node):
+        parts = node.parts
+        # Profiled hawl make every call, so each one is counted and timed
+        if parts.tail_call and self.interpreter.profiler is None:
+            return self.compile_tail_call(parts.value)
+        return self.compile_expression(parts.value)
+
+    def compile_import_statement(self, node):
+        interpreter = self.interpreter
+
+        def import_statement():
+            interpreter.execute_import_statement(node)
+
+        return import_statement
+
+    def compile_try_catch(self, node):
+        bind = self.compile_bind(getattr(node, "slot", None), node.value)
+        try_body = self.compile_block(node.children[0])
+        catch_body = self.compile_block(node.children[1])
+
+        def try_catch():
+            try:
+                return try_body()
+            except Exception as e:
+                # Store the error in the variable and execute the catch block
+                bind(str(e))
+                return catch_body()
+
+        return try_catch
+
+    def compile_class_definition(self, node):
+        interpreter = self.interpreter
+        if isinstance(node.value, tuple):
+            class_name, parent_name = node.value
+        else:
+            class_name = node.value
+            parent_name = None
+
+        # Process class body
+        methods = {}
+        body = []
+        for child in node.children:
+            if child.type == NodeType.FUNCTION_DEFINITION:
+                methods[child.value] = child
+            elif child.type == NodeType.VARIABLE_DECLARATION:
+                body.append((child.value, self.compile_expression(child.children[0])))
+            else:
+                # Execute any statements in the class (like qor())
+                body.append((None, self.compile_body([child])))
+        classes = interpreter.classes
+
+        def class_definition():
+            # Validate parent class exists if specified
+            if parent_name and parent_name not in classes:
+                raise RuntimeError("parent_class_not_found", parent_name=parent_name)
+            class_def = {
+                "name": class_name,
+                "parent": parent_name,
+                "methods": dict(methods),
+                "fields": {},
+            }
+            fields = class_def["fields"]
+            for field_name, code in body:
+                if field_name is None:
+                    signal = code()
+                    if signal is not None:
+                        # A class body is not a loop or function body
+                        raise outside_error(signal)
+                else:
+                    fields[field_name] = code()
+            classes[class_name] = class_def
+            return class_def
+
+        return class_definition
+
+    def compile_assignment(self, node):
+        target = node.children[0]
+        value = self.compile_expression(node.children[1])
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+
+        if target.type == NodeType.IDENTIFIER:
+            store = self.compile_store(
+                getattr(target, "slot", None), target.value, line, position
+            )
+
+            def assign():
+                return store(value())
+
+            return assign
+
+        if target.type == NodeType.PROPERTY_ACCESS:
+            obj_expr = self.compile_expression(target.children[0])
+            prop_name = target.value
+
+            def assign_property():
+                new_value = value()
+                obj = obj_expr()
+                if not isinstance(obj, dict):
+                    raise TypeError(
+                        "property_access", prop=prop_name, line=line, position=position
+                    )
+                obj[prop_name] = new_value
+                return new_value
+
+            return assign_property
+
+        if target.type == NodeType.INDEX_ACCESS:
+            arr_expr = self.compile_expression(target.children[0])
+            index_expr = self.compile_expression(target.children[1])
+
+            def assign_index():
+                new_value = value()
+                arr = arr_expr()
+                if not isinstance(arr, list):
+                    raise TypeError("index_access", line=line, position=position)
+                arr[self._check_index(arr, index_expr(), line, position)] = new_value
+                return new_value
+
+            return assign_index
+
+        target_type = target.type
+
+        def invalid_target():
+            value()
+            raise RuntimeError(
+                "invalid_syntax",
+                detail=f"Invalid assignment target: {target_type}",
+                line=line,
+                position=position,
+            )
+
+        return invalid_target
+
+    # -----------------------------
+    #  Expressions
+    # -----------------------------
+    def compile_literal(self, node):
+        value = node.value
+        return lambda: value
+
+    def compile_identifier(self, node):
+        return self.compile_load(
+            getattr(node, "slot", None),
+            node.value,
+            getattr(node, "line", None),
+            getattr(node, "position", None),
+        )
+
+    def compile_binary_operation(self, node):
+        left_node, right_node = node.children
+        left = self.compile_expression(left_node)
+        right = self.compile_expression(right_node)
+        operator = node.value
+        function = OPERATORS.get(operator)
+
+        if function is None:
+
+            def unknown_operator():
+                left()
+                right()
+                raise RuntimeError("unknown_operator", operator=operator)
+
+            return unknown_operator
+        if operator == "&&":
+
+            def logical_and():
+                return bool(left()) and bool(right())
+
+            return logical_and
+        if operator == "||":
+
+            def logical_or():
+                return bool(left()) or bool(right())
+
+            return logical_or
+
+        # A literal operand is captured as a value instead of called
+        left_value = right_value = UNBOUND
+        if right_node.type == NodeType.LITERAL:
+            right_value = right_node.value
+        elif left_node.type == NodeType.LITERAL:
+            left_value = left_node.value
+
+        if operator == "+":
+            # Adding to a string literal always concatenates
+            if isinstance(right_value, str):
+                return lambda: to_string(left()) + right_value
+            if isinstance(left_value, str):
+                return lambda: left_value + to_string(right())
+
+        native = NATIVE.get(operator)
+        if native is not None:
+            # Speculate on the native operator until it first raises, which
+            # deoptimizes the closure to the generic function for good
+            speculating = True
+
+            if right_value is not UNBOUND:
+
+                def speculate_right():
+                    nonlocal speculating
+                    a = left()
+                    if speculating:
+                        try:
+                            return native(a, right_value)
+                        except SPECULATION_ERRORS:
+                            speculating = False
+                    return function(a, right_value)
+
+                return speculate_right
+            if left_value is not UNBOUND:
+
+                def speculate_left():
+                    nonlocal speculating
+                    b = right()
+                    if speculating:
+                        try:
+                            return native(left_value, b)
+                        except SPECULATION_ERRORS:
+                            speculating = False
+                    return function(left_value, b)
+
+                return speculate_left
+
+            def speculate():
+                nonlocal speculating
+                a = left()
+                b = right()
+                if speculating:
+                    try:
+                        return native(a, b)
+                    except SPECULATION_ERRORS:
+                        speculating = False
+                return function(a, b)
+
+            return speculate
+
+        if right_value is not UNBOUND:
+            return lambda: function(left(), right_value)
+        if left_value is not UNBOUND:
+            return lambda: function(left_value, right())
+        return lambda: function(left(), right())
+
+    def compile_conditional_expression(self, node):
+        condition, when_true, when_false = (
+            self.compile_expression(child) for child in node.children
+        )
+
+        def conditional():
+            if condition():
+                return when_true()
+            return when_false()
+
+        return conditional
+
+    def compile_unary_operation(self, node):
+        operand = self.compile_expression(node.children[0])
+        if node.value == "!":
+            return lambda: not bool(operand())
+
+        operator = node.value
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+
+        def unknown_operator():
+            operand()
+            raise RuntimeError(
+                "unknown_operator", operator=operator, line=line, position=position
+            )
+
+        return unknown_operator
+
+    def compile_list_literal(self, node):
+        elements = [self.compile_expression(element) for element in node.children]
+        return lambda: [element() for element in elements]
+
+    def compile_object_literal(self, node):
+        properties = [
+            (prop.value, self.compile_expression(prop.children[0]))
+            for prop in node.children
+        ]
+
+        def object_literal():
+            obj = {}
+            for key, value in properties:
+                obj[key] = value()
+            return obj
+
+        return object_literal
+
+    def compile_property_access(self, node):
+        obj_expr = self.compile_expression(node.children[0])
+        prop_name = node.value
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+
+        def property_access():
+            obj = obj_expr()
+            if not isinstance(obj, dict):
+                raise TypeError(
+                    "property_access", prop=prop_name, line=line, position=position
+                )
+            if prop_name not in obj:
+                raise RuntimeError(
+                    "property_not_found",
+                    prop_name=prop_name,
+                    line=line,
+                    position=position,
+                )
+            return obj[prop_name]
+
+        return property_access
+
+    def compile_method_call(self, node):
+        interpreter = self.interpreter
+        obj_expr = self.compile_expression(node.children[0])
+        arguments = [self.compile_expression(arg) for arg in node.children[1:]]
+        cache = MethodCache(interpreter, node.value)
+
+        # shaandhee may receive a function by name instead of a value; it is
+        # only a teed method, so these arguments go to every builtin it finds
+        builtin_arguments = arguments
+        if node.value == "shaandhee":
+            builtin_arguments = []
+            for arg_node, argument in zip(node.children[1:], arguments):
+                if arg_node.type == NodeType.IDENTIFIER:
+                    argument = self._function_reference(arg_node, argument)
+                builtin_arguments.append(argument)
+
+        def call_uncached(obj, method):
+            if method is not None:
+                return method(obj, *[argument() for argument in builtin_arguments])
+            # A hawl stored on the walax itself
+            member = cache.member(obj)
+            return member(*[argument() for argument in arguments])
+
+        profiler = interpreter.profiler
+        if profiler is not None:
+            # Count hits too, for the profile report
+            line = getattr(node, "line", None)
+            profiler.track_cache(interpreter.filename, line, cache)
+
+            def method_call():
+                obj = obj_expr()
+                if type(obj) is cache.type:
+                    cache.hits += 1
+                    args = [argument() for argument in builtin_arguments]
+                    return cache.method(obj, *args)
+                return call_uncached(obj, cache.miss(obj))
+
+            return method_call
+
+        def method_call():
+            obj = obj_expr()
+            if type(obj) is cache.type:
+                args = [argument() for argument in builtin_arguments]
+                return cache.method(obj, *args)
+            return call_uncached(obj, cache.miss(obj))
+
+        return method_call
+
+    def _function_reference(self, node, argument):
+        """Pass a function name through when it names a defined function"""
+        functions = self.interpreter.functions
+        func_name = node.value
+
+        def reference():
+            if func_name in functions:
+                return func_name
+            return argument()
+
+        return reference
+
+    def compile_index_access(self, node):
+        arr_expr = self.compile_expression(node.children[0])
+        index_expr = self.compile_expression(node.children[1])
+        line = getattr(node, "line", None)
+        position = getattr(node, "position", None)
+        check_index = self._check_index
+
+        def index_access():
+            arr = arr_expr()
+            if not isinstance(arr, list):
+                raise TypeError("index_access", line=line, position=position)
+            return arr[check_index(arr, index_expr(), line, position)]
+
+        return index_access
+
+    @staticmethod
+    def _check_index(arr, idx, line, position):
+        """Validate a list index and normalize negative indices"""
+        if not isinstance(idx, (int, float)) or int(idx) != idx:
+            raise TypeError(
+                "invalid_operand",
+                operator="[]",
+                type_name="abn",
+                line=line,
+                position=position,
+            )
+
+        idx = int(idx)
+        # Support negative indexing (e.g., -1 for last element)
+        if idx < 0:
+            idx = len(arr) + idx
+
+        if idx < 0 or idx >= len(arr):
+            raise RuntimeError(
+                "index_out_of_range", index=idx, line=line, position=position
+            )
+        return idx
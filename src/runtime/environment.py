@@ -0,0 +1,93 @@
+"""
+Soplang scope environments.
+
+An Environment is a single scope frame (variables, static types and constants)
+with a link to the enclosing scope. Function calls push a fresh frame whose
+parent is the scope the function was defined in, so the cost of a call does
+not depend on how many variables exist in the enclosing scopes.
+
+Compiled functions use a FunctionFrame instead: the Resolver has already
+numbered their locals, so a call only fills a list of slots.
+"""
+
+# Marks a local slot whose declaration has not run yet in the current call
+UNBOUND = object()
+
+
+class Environment:
+    __slots__ = ("values", "types", "constants", "parent")
+
+    def __init__(self, parent=None):
+        self.values = {}  # Variable name -> value
+        self.types = {}  # Variable name -> declared static type
+        self.constants = set()  # Names declared with madoor
+        self.parent = parent  # Enclosing scope (None for globals)
+
+    def find(self, name):
+        """Return the nearest environment that defines name, or None"""
+        env = self
+        while env is not None:
+            if name in env.values:
+                return env
+            env = env.parent
+        return None
+
+    def lookup(self, name):
+        """Return the value bound to name, raising KeyError if it is undefined"""
+        env = self
+        while env is not None:
+            values = env.values
+            if name in values:
+                return values[name]
+            env = env.parent
+        raise KeyError(name)
+
+    def define(self, name, value, var_type=None, is_constant=False):
+        """Bind name in this frame, recording its static type and constness"""
+        if var_type is not None:
+            self.types[name] = var_type
+        if is_constant:
+            self.constants.add(name)
+        self.values[name] = value
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def __repr__(self):
+        depth = 0
+        env = self.parent
+        while env is not None:
+            depth += 1
+            env = env.parent
+        return f"Environment(depth={depth}, names={list(self.values)})"
+
+
+class FunctionFrame:
+    __slots__ = ("slots", "scope", "parent", "types", "constants")
+
+    def __init__(self, scope, slots, parent):
+        self.slots = slots  # Slot index -> value (UNBOUND until declared)
+        self.scope = scope  # FunctionScope describing the slots
+        self.parent = parent  # Defining FunctionFrame, or the global Environment
+        self.types = None  # Slot -> static type, once a typed declaration ran
+        self.constants = None  # Slots whose madoor declaration ran
+
+    def find_slot(self, name):
+        """Return (frame, slot) of the nearest bound local named name, or None"""
+        frame = self
+        while isinstance(frame, FunctionFrame):
+            slot = frame.scope.slot_map.get(name)
+            if slot is not None and frame.slots[slot] is not UNBOUND:
+                return frame, slot
+            frame = frame.parent
+        return None
+
+    def outer(self, depth):
+        """Return the frame depth levels out from this one"""
+        frame = self
+        for _ in range(depth):
+            frame = frame.parent
+        return frame
+
+    def __repr__(self):
+        return f"FunctionFrame({self.scope.name}, slots={self.scope.names})"
@@ -1,7 +1,16 @@
+import builtins
 import os
+import sys
+import threading
 
 from src.core.ast import ASTNode, NodeType
+from src.core.lowering import case_index, lower
 from src.core.tokens import TokenType
+from src.runtime.compiler import Compiler, TailCall, loop_range
+from src.runtime.environment import UNBOUND, Environment, FunctionFrame
+from src.runtime.method_cache import MethodCache
+from src.runtime.modules import ModuleRegistry
+from src.runtime.operators import OPERATORS, OperatorSite
 from src.stdlib.builtins import (
     SoplangBuiltins,
     get_builtin_functions,
@@ -12,31 +21,173 @@ from src.stdlib.builtins import (
 from src.utils.errors import (
     BreakSignal,
     ContinueSignal,
-    ImportError,
     ReturnSignal,
     RuntimeError,
     TypeError,
 )
 
 
-class Interpreter:
+# Containers whose statements are counted by the profiler, not themselves
+UNCOUNTED = (NodeType.PROGRAM, NodeType.BLOCK)
+
+# How deep hawl calls may nest, unless an engine is given another max_depth.
+# The outermost call is at depth 0, so a recursion that goes max_depth levels
+# down still runs and one level more raises max_depth_exceeded
+DEFAULT_MAX_DEPTH = 100_000
+
+# Python frames set aside per nested hawl call until a thread has measured
+# them: a call takes four to six in the closure compiler and the tree walker,
+# and more with the expressions between them
+FRAMES_PER_CALL = 20
+# Python frames every thread keeps free for builtins and error handling
+STACK_MARGIN = 100
+# Threads call_on_new_stack may have waiting at once. A thread holds a few
+# hundred hawl calls, so the closure compiler and the tree walker reach
+# somewhat past DEFAULT_MAX_DEPTH and then raise max_depth_exceeded; the VM
+# keeps its frames in a list and only stops at max_depth
+MAX_STACK_THREADS = 1000
+
+
+def stack_size():
+    """Python frames on the running thread's stack"""
+    # sys._getframe(n) fails past the outermost frame; find where by
+    # doubling n and then bisecting
+    low, high = 0, 64
+    while True:
+        try:
+            sys._getframe(high)
+        except ValueError:
+            break
+        low, high = high, high * 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        try:
+            sys._getframe(middle)
+            low = middle
+        except ValueError:
+            high = middle
+    return low
+
+
+class Function:
+    """
+    A hawl used as a value: assigned to a variable, stored in a teed or
+    walax, or passed to shaandhee/aaddin. Calling it runs the hawl in its
+    own engine like a direct call, binding only its parameter frame.
+    """
+
+    __slots__ = ("engine", "definition")
+
+    def __init__(self, engine, definition):
+        self.engine = engine
+        self.definition = definition  # The dict stored in engine.functions
+
+    def __call__(self, *args):
+        return self.engine.call_user_function(self.definition, list(args))
+
+    def __repr__(self):
+        return f"<hawl {self.definition.get('name')}>"
+
+
+class CallDepth:
+    """
+    How deep the hawl calls of one program nest, and how much Python stack
+    they have left. The engine a program starts in shares it with the
+    engines that run its modules, so calls into a module count towards
+    max_depth and use the stack measurements of their caller.
+    """
+
+    __slots__ = (
+        "depth",
+        "limit",
+        "frames_per_call",
+        "base",
+        "interrupted",
+        "threads",
+        "runs",
+    )
+
     def __init__(self):
-        self.variables = {}  # Global variables
-        self.variable_types = {}  # Store static types
-        self.constant_variables = set()  # Keep track of which variables are constants
+        # Hawl calls running in the closure compiler and the tree walker
+        self.depth = 0
+        # Depth at which a call takes the slow path in call_user_function:
+        # past max_depth, or where the Python stack of the running thread is
+        # full and the call continues on a new one
+        self.limit = 0
+        # Python frames set aside per hawl call, and (depth, Python frames in
+        # use) where the running thread last measured them
+        self.frames_per_call = FRAMES_PER_CALL
+        self.base = (0, 0)
+        # Set by Ctrl+C while a call runs on another thread; the next hawl
+        # call then raises KeyboardInterrupt there
+        self.interrupted = False
+        # Threads started by call_on_new_stack that are running now
+        self.threads = 0
+        # Frame lists of the VM runs in progress, outermost first
+        self.runs = []
+
+
+class Interpreter:
+    def __init__(
+        self,
+        tree_walk=False,
+        optimize=False,
+        filename=None,
+        search_path=None,
+        profiler=None,
+        max_depth=None,
+    ):
+        self.globals = Environment()  # Global scope
+        self.env = self.globals  # Scope currently executing
+        self.variables = self.globals.values  # Global variables
+        self.variable_types = self.globals.types  # Store static types
+        self.constant_variables = self.globals.constants  # Global constants
         self.functions = get_builtin_functions()  # Built-in functions
         self.list_methods = get_list_methods()
         self.object_methods = get_object_methods()
         self.string_methods = get_string_methods()  # String methods
         self.classes = {}  # Store class definitions
-        self.call_stack = []  # Track function calls if needed
+        # MethodCache of every obj.method() the tree walker has run
+        self.method_caches = {}
+        # OperatorSite of every binary operation the tree walker has run
+        self.operator_sites = {}
+        # How deep hawl calls may nest, and how deep they do now
+        self.max_depth = DEFAULT_MAX_DEPTH if max_depth is None else max_depth
+        self.call_depth = CallDepth()
+        # (hawl name, file, line it was called from) per running call, kept
+        # up to date only while a SamplingProfiler is attached
+        self.call_stack = []
+        # The tree walker is kept as the reference mode; by default programs
+        # are compiled into closures once and then run
+        self.tree_walk = tree_walk
+        # Imported files go through the AST optimizer as well when it is on
+        self.optimize = optimize
+        self.compiler = Compiler(self)
+        # File being run, if any; ka_keen paths are looked up next to it
+        self.filename = filename
+        # Modules loaded by ka_keen, shared with the engines that run them
+        self.modules = ModuleRegistry(search_path)
+        # Profiler told about every hawl call and statement, with --profile
+        self.profiler = profiler
 
     def interpret(self, root):
         if root.type != NodeType.PROGRAM:
             raise RuntimeError("invalid_syntax", detail="Root node must be PROGRAM")
+        call_depth = self.call_depth
+        if call_depth.depth == 0:
+            call_depth.interrupted = False
+            call_depth.base = (0, 0)
+            call_depth.limit = self.stack_limit()
+        if not self.tree_walk:
+            self.compiler.compile_program(root)()
+            return
+        lower(root)
+        self.execute_program(root)
+
+    def execute_program(self, root):
         for statement in root.children:
             try:
-                result = self.execute(statement)
+                self.execute(statement)
             except BreakSignal:
                 raise RuntimeError("break_outside_loop")
             except ContinueSignal:
@@ -44,10 +195,88 @@ class Interpreter:
             except ReturnSignal:
                 raise RuntimeError("return_outside_function")
 
+    def stack_limit(self):
+        """Depth up to which hawl calls fit on the Python stack this thread
+        has left, or max_depth + 1 if that is lower
+
+        The calls still to come on this thread are assumed to take as many
+        Python frames each as the calls since the last measurement on it
+        did. A new thread has measured nothing yet and sets aside twice
+        what the last thread measured.
+        """
+        call_depth = self.call_depth
+        used = stack_size()
+        depth = call_depth.depth
+        frames_per_call = call_depth.frames_per_call
+        base_depth, base_used = call_depth.base
+        if depth > base_depth and used > base_used:
+            frames_per_call = (used - base_used) / (depth - base_depth)
+            call_depth.frames_per_call = max(int(2 * frames_per_call), 4)
+        call_depth.base = (depth, used)
+        room = (sys.getrecursionlimit() - STACK_MARGIN - used) / frames_per_call
+        return min(depth + max(int(room), 0), self.max_depth + 1)
+
+    def call_on_new_stack(self, user_func, args):
+        """Make a hawl call on a new thread with an empty Python stack and
+        wait for it, so deep recursion never needs a higher recursion limit
+
+        Only one thread runs the program at a time; the others wait for the
+        call they started. Ctrl+C reaches the thread the program started on,
+        which stops the program at the next hawl call on any thread. Once
+        MAX_STACK_THREADS are waiting, or no thread can be started, the call
+        raises max_depth_exceeded with the depth reached.
+        """
+        call_depth = self.call_depth
+        if call_depth.threads >= MAX_STACK_THREADS:
+            raise RuntimeError(
+                "max_depth_exceeded",
+                name=user_func.get("name"),
+                max_depth=call_depth.depth,
+            )
+        outcome = []
+
+        def target():
+            call_depth.limit = self.stack_limit()
+            try:
+                outcome.append((self.call_user_function(user_func, args), None))
+            except BaseException as error:
+                outcome.append((None, error))
+
+        limit = call_depth.limit
+        base = call_depth.base
+        thread = threading.Thread(target=target, name="soplang", daemon=True)
+        try:
+            thread.start()
+        except builtins.RuntimeError:
+            # Out of threads or memory for their stacks
+            raise RuntimeError(
+                "max_depth_exceeded",
+                name=user_func.get("name"),
+                max_depth=call_depth.depth,
+            )
+        call_depth.threads += 1
+        try:
+            thread.join()
+        except KeyboardInterrupt:
+            call_depth.interrupted = True
+            call_depth.limit = 0
+            thread.join()
+            raise
+        finally:
+            call_depth.threads -= 1
+        call_depth.limit = limit
+        call_depth.base = base
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
     # -----------------------------
     #  Execute Statement
     # -----------------------------
     def execute(self, node):
+        if self.profiler is not None and node.type not in UNCOUNTED:
+            self.profiler.hit(self.filename, node.line)
         if node.type == NodeType.PROGRAM:
             for child in node.children:
                 self.execute(child)
@@ -70,13 +299,15 @@ class Interpreter:
         elif node.type == NodeType.CONTINUE_STATEMENT:
             raise ContinueSignal()
         elif node.type == NodeType.RETURN_STATEMENT:
-            if node.children:
-                # Return the evaluated expression
-                return_value = self.evaluate(node.children[0])
-                raise ReturnSignal(return_value)
-            else:
+            parts = node.parts
+            if parts.value is None:
                 # Return with no value
                 raise ReturnSignal(None)
+            if parts.tail_call and self.profiler is None:
+                # Made by call_user_function once this hawl's frame is gone
+                raise ReturnSignal(self.tail_call(parts.value))
+            # Return the evaluated expression
+            raise ReturnSignal(self.evaluate(parts.value))
         elif node.type == NodeType.BLOCK:
             return self.execute_block(node)
         elif node.type == NodeType.IMPORT_STATEMENT:
@@ -94,6 +325,7 @@ class Interpreter:
             NodeType.PROPERTY_ACCESS,
             NodeType.METHOD_CALL,
             NodeType.INDEX_ACCESS,
+            NodeType.CONDITIONAL_EXPRESSION,
             NodeType.IDENTIFIER,
             NodeType.LITERAL,
         ):
@@ -110,20 +342,19 @@ class Interpreter:
         var_name = node.value
         var_value = self.evaluate(node.children[0])  # expression
 
-        # If this is a static type declaration, store the type and enforce it
-        if hasattr(node, "var_type") and node.var_type is not None:
-            # Store the type information
-            self.variable_types[var_name] = node.var_type
-
+        # If this is a static type declaration, enforce it before binding
+        var_type = getattr(node, "var_type", None)
+        if var_type is not None:
             # Validate the value against the declared type
-            self.validate_type(var_name, var_value, node.var_type, node)
-
-        # Check if this is a constant variable (madoor)
-        if hasattr(node, "is_constant") and node.is_constant:
-            # Add to the set of constant variables
-            self.constant_variables.add(var_name)
-
-        self.variables[var_name] = var_value
+            self.validate_type(var_name, var_value, var_type, node)
+
+        # Bind in the current scope, remembering the type and madoor flag
+        self.env.define(
+            var_name,
+            var_value,
+            var_type=var_type,
+            is_constant=getattr(node, "is_constant", False),
+        )
         return var_value
 
     # -----------------------------
@@ -195,26 +426,31 @@ class Interpreter:
     # -----------------------------
     def assign_variable(self, var_name, value, line=None, position=None):
         """Assign a value to a variable, with type checking if it's statically typed"""
-        if var_name not in self.variables:
+        # Assign in the nearest scope that defines the variable
+        return self.store_variable(
+            self.env.find(var_name), var_name, value, line, position
+        )
+
+    def store_variable(self, env, var_name, value, line=None, position=None):
+        """Assign in env (None if undefined), enforcing madoor and static types"""
+        if env is None:
             raise RuntimeError(
                 "undefined_variable", name=var_name, line=line, position=position
             )
 
         # Check if trying to reassign a constant
-        if var_name in self.constant_variables:
+        if var_name in env.constants:
             raise RuntimeError(
                 "constant_reassignment", name=var_name, line=line, position=position
             )
 
         # If it's a statically typed variable, validate the type
-        if var_name in self.variable_types:
+        if var_name in env.types:
             # Create a temporary node with line/position for validation
             temp_node = ASTNode(NodeType.ASSIGNMENT, line=line, position=position)
-            self.validate_type(
-                var_name, value, self.variable_types[var_name], temp_node
-            )
+            self.validate_type(var_name, value, env.types[var_name], temp_node)
 
-        self.variables[var_name] = value
+        env.values[var_name] = value
         return value
 
     # -----------------------------
@@ -286,8 +522,21 @@ class Interpreter:
     #  Function Call
     # -----------------------------
     def execute_function_call(self, node):
-        func_name = node.value
         args = [self.evaluate(arg) for arg in node.children]
+        return self.call_function(node.value, args)
+
+    def call_function(self, func_name, args):
+        """Call a built-in or user-defined function with evaluated arguments"""
+        # A local such as a parameter holding a hawl comes before any hawl
+        # or built-in of the same name; a local that cannot be called, such
+        # as a number, does not hide them
+        if self.env is not self.globals and "." not in func_name:
+            value = self.local_value(func_name)
+            if callable(value):
+                func = self.definition_of(value)
+                if func is None:
+                    return self.call_value(func_name, value, args)
+                return self.call_user_function(func, args)
 
         # Check if it's a built-in function
         if func_name in self.functions:
@@ -296,210 +545,257 @@ class Interpreter:
                 return self.functions[func_name](*args)
             else:
                 # User-defined function (Soplang function)
-                user_func = self.functions[func_name]
-                params = user_func["params"]
-                body = user_func["body"]
+                return self.call_user_function(self.functions[func_name], args)
 
-                # Create a new scope for function execution
-                old_vars = self.variables.copy()
+        # Check if it's a method call on an object or list
+        elif "." in func_name:
+            obj_name, method_name = func_name.split(".", 1)
+            env = self.env.find(obj_name)
+            obj = env.values[obj_name] if env is not None else None
+            return self.call_dotted_method(obj_name, obj, method_name, args)
+        else:
+            # A variable holding a hawl, as in f(x) after door f = labanlaab
+            env = self.env.find(func_name)
+            if env is None:
+                raise RuntimeError("undefined_function", name=func_name)
+            return self.call_value(func_name, env.values[func_name], args)
+
+    def call_value(self, name, value, args):
+        """Call the value of variable name with evaluated arguments"""
+        if callable(value):
+            return value(*args)
+        raise TypeError(
+            "not_callable", name=name, type_name=SoplangBuiltins.nooc(value)
+        )
+
+    def function_value(self, name):
+        """The hawl or built-in called name as a value, or None"""
+        func = self.functions.get(name)
+        if func is None or callable(func):
+            return func
+        value = func.get("value")
+        if value is None:
+            # One Function per definition, so the same hawl compares equal
+            value = func["value"] = Function(self, func)
+        return value
+
+    def local_value(self, name):
+        """Value the running hawl frames bind to name, or UNBOUND"""
+        env = self.env
+        if isinstance(env, FunctionFrame):
+            found = env.find_slot(name)
+            if found is None:
+                return UNBOUND
+            frame, slot = found
+            return frame.slots[slot]
+        env = env.find(name)
+        if env is None or env is self.globals:
+            return UNBOUND
+        return env.values[name]
+
+    def definition_of(self, value):
+        """The definition of a hawl value this engine made, or None"""
+        if value.__class__ is Function and value.engine is self:
+            return value.definition
+        return None
+
+    def call_dotted_method(self, obj_name, obj, method_name, args):
+        """Call a method written as a dotted function name (obj.method)"""
+        if obj is None:
+            raise RuntimeError("undefined_variable", name=obj_name)
+
+        if isinstance(obj, list) and method_name in self.list_methods:
+            # Call list method
+            return self.list_methods[method_name](obj, *args)
+        elif isinstance(obj, dict) and method_name in self.object_methods:
+            # Call object method
+            return self.object_methods[method_name](obj, *args)
+        elif isinstance(obj, str) and method_name in self.string_methods:
+            # Call string method
+            return self.string_methods[method_name](obj, *args)
+        elif isinstance(obj, dict) and callable(obj.get(method_name)):
+            # Function stored on an object, such as a module's hawl
+            return obj[method_name](*args)
+        else:
+            raise RuntimeError(
+                "method_not_found",
+                method_name=method_name,
+                type_name=SoplangBuiltins.nooc(obj),
+            )
 
-                # Bind arguments to parameters
-                for i, param in enumerate(params):
-                    if i < len(args):
-                        self.variables[param] = args[i]
+    def call_user_function(self, user_func, args):
+        """Run a user-defined function in a fresh frame bound to its parameters
+
+        Only the parameters and locals are dropped when the call returns.
+        Assignments to globals or to locals of an enclosing hawl write
+        through the scope chain and stay visible to the caller; they are not
+        rolled back after the call.
+
+        A body that ends in a tail call returns a TailCall instead of making
+        it, and the callee then runs here in place of the caller, so a chain
+        of tail calls takes one level of max_depth however long it gets.
+        Non-tail calls past what fits on this thread's Python stack continue
+        on a new thread (call_on_new_stack).
+        """
+        call_depth = self.call_depth
+        depth = call_depth.depth
+        if depth >= call_depth.limit:
+            if call_depth.interrupted:
+                raise KeyboardInterrupt
+            if depth > self.max_depth:
+                raise RuntimeError(
+                    "max_depth_exceeded",
+                    name=user_func.get("name"),
+                    max_depth=self.max_depth,
+                )
+            limit = self.stack_limit()
+            if limit <= depth:
+                return self.call_on_new_stack(user_func, args)
+            call_depth.limit = limit
+        call_depth.depth = depth + 1
+        saved_env = self.env
+        try:
+            while True:
+                # The new frame only holds the parameters and locals; names
+                # from the defining scope are reached through the parent link
+                scope = user_func.get("scope")
+                if scope is not None:
+                    # Compiled function: locals live in the slots the
+                    # Resolver assigned
+                    param_count = len(scope.params)
+                    if len(args) >= param_count:
+                        slots = args[:param_count]
                     else:
                         # Default to None if not enough arguments
-                        self.variables[param] = None
+                        slots = list(args) + [None] * (param_count - len(args))
+                    slots += [UNBOUND] * (len(scope.names) - param_count)
+                    self.env = FunctionFrame(scope, slots, user_func["env"])
+                else:
+                    self.env = frame = Environment(user_func.get("env", self.globals))
+                    values = frame.values
+                    params = user_func["params"]
+                    for i, param in enumerate(params):
+                        # Default to None if not enough arguments
+                        values[param] = args[i] if i < len(args) else None
 
-                # Execute function body
                 result = None
+                code = user_func.get("code")
+                # Compiled bodies are timed by a wrapper the Compiler puts
+                # around them
+                profiler = self.profiler if code is None else None
+                if profiler is not None:
+                    profiler.enter(
+                        profiler.function_key(
+                            self.filename, user_func.get("line"), user_func.get("name")
+                        )
+                    )
                 try:
-                    for statement in body:
-                        result = self.execute(statement)
+                    if code is not None:
+                        # Body compiled into closures by the Compiler
+                        result = code()
+                    else:
+                        for statement in user_func["body"]:
+                            result = self.execute(statement)
                 except ReturnSignal as ret:
                     result = ret.value
-
-                # Restore the previous scope
-                self.variables = old_vars
-
-                return result
-
-        # Check if it's a method call on an object or list
-        elif "." in func_name:
-            obj_name, method_name = func_name.split(".", 1)
-            obj = self.variables.get(obj_name)
-
-            if obj is None:
-                raise RuntimeError("undefined_variable", name=obj_name)
-
-            if isinstance(obj, list) and method_name in self.list_methods:
-                # Call list method
-                return self.list_methods[method_name](obj, *args)
-            elif isinstance(obj, dict) and method_name in self.object_methods:
-                # Call object method
-                return self.object_methods[method_name](obj, *args)
-            elif isinstance(obj, str) and method_name in self.string_methods:
-                # Call string method
-                return self.string_methods[method_name](obj, *args)
-            else:
-                raise RuntimeError(
-                    "method_not_found",
-                    method_name=method_name,
-                    type_name=SoplangBuiltins.nooc(obj),
-                )
-        else:
-            raise RuntimeError("undefined_function", name=func_name)
+                except BreakSignal:
+                    raise RuntimeError("break_outside_loop")
+                except ContinueSignal:
+                    raise RuntimeError("continue_outside_loop")
+                finally:
+                    if profiler is not None:
+                        profiler.exit()
+
+                if result.__class__ is not TailCall:
+                    return result
+                user_func = result.definition
+                args = result.args
+        finally:
+            # Restore the caller's scope
+            self.env = saved_env
+            call_depth.depth = depth
+
+    def tail_call(self, node):
+        """Evaluate a call in tail position: a TailCall when it calls a hawl"""
+        args = [self.evaluate(arg) for arg in node.children]
+        if self.env is not self.globals and "." not in node.value:
+            value = self.local_value(node.value)
+            if callable(value):
+                func = self.definition_of(value)
+                if func is None:
+                    return self.call_value(node.value, value, args)
+                return TailCall(func, args)
+        func = self.functions.get(node.value)
+        if func is not None and not callable(func):
+            return TailCall(func, args)
+        return self.call_function(node.value, args)
 
     # -----------------------------
     #  If Statement
     # -----------------------------
     def execute_if_statement(self, node):
-        # children[0]: condition
-        # rest: if-body, elif-blocks, else-block
-        condition_value = self.evaluate(node.children[0])
-        index = 1
-
-        if condition_value:
-            # Execute statements until we reach an IF_STATEMENT or BLOCK
-            while index < len(node.children):
-                child = node.children[index]
-                if child.type in (NodeType.IF_STATEMENT, NodeType.BLOCK):
-                    break
-                self.execute(child)
-                index += 1
-            return
-
-        # If the main if is false, check elif
-        executed_elif = False
-        while index < len(node.children):
-            child = node.children[index]
-            if child.type == NodeType.IF_STATEMENT:
-                # Found an elif block
-                elif_condition = self.evaluate(child.children[0])
-                if elif_condition:
-                    # Execute the elif body and exit
-                    for stmt in child.children[1:]:
-                        if stmt.type in (NodeType.IF_STATEMENT, NodeType.BLOCK):
-                            break
-                        self.execute(stmt)
-                    executed_elif = True
-                    break
-            elif child.type == NodeType.BLOCK:
-                # Found the else block, execute unconditionally
-                for stmt in child.children:
+        parts = node.parts
+        for condition, body in parts.arms:
+            if self.evaluate(condition):
+                for stmt in body:
                     self.execute(stmt)
                 return
-            index += 1
+        if parts.else_body is not None:
+            for stmt in parts.else_body:
+                self.execute(stmt)
 
     # -----------------------------
     #  Switch Statement
     # -----------------------------
     def execute_switch_statement(self, node):
-        # First child is the switch expression
-        switch_value = self.evaluate(node.children[0])
-
-        # Remaining children are the cases and default case
-        found_match = False
-        default_case = None
-
-        # Find the matching case or default case
-        for i in range(1, len(node.children)):
-            case_node = node.children[i]
-
-            # Skip empty cases
-            if len(case_node.children) == 0:
-                continue
-
-            # In our parser implementation, default cases can be identified by checking
-            # if they don't have a case value child at the beginning
-            # (since the parser puts the case value as the first child of each case node)
-            is_default = False
-
-            # Check if this might be a default case - no values to compare
-            if case_node.children and case_node.children[0].type == NodeType.BLOCK:
-                # This is likely a default case since it has no value to compare
-                default_case = case_node
-                is_default = True
-
-            if not is_default:
-                # For regular cases, evaluate the case value and compare
-                case_value = self.evaluate(case_node.children[0])
-
-                # If the switch value matches this case value
-                if switch_value == case_value:
-                    # Execute this case
-                    for stmt in case_node.children[1:]:
-                        self.execute(stmt)
-                    found_match = True
-                    break
-
-        # If no matching case found and we have a default case, execute it
-        if not found_match and default_case is not None:
-            # For a default block, execute all its children
-            for stmt in default_case.children:
+        parts = node.parts
+        switch_value = self.evaluate(parts.subject)
+        cases = parts.cases
+
+        # Literal case values are looked up; any other case before the one
+        # found still has to be evaluated and compared first, in order
+        index = case_index(parts.table, switch_value, len(cases))
+        for i in parts.ordered:
+            if i > index:
+                break
+            if switch_value == self.evaluate(cases[i][0]):
+                index = i
+                break
+
+        if index < len(cases):
+            for stmt in cases[index][1]:
+                self.execute(stmt)
+        elif parts.default_body is not None:
+            for stmt in parts.default_body:
                 self.execute(stmt)
 
     # -----------------------------
     #  Loop Statement (for/kuceli)
     # -----------------------------
     def execute_loop_statement(self, node):
-        # node.value = loop_var name
-        # node.children[0] = start
-        # node.children[1] = end
-        # node.children[2] = step (optional)
-        # node.children[2...] or node.children[3...] = body
+        parts = node.parts
         loop_var = node.value
-        start_value = self.evaluate(node.children[0])
-        end_value = self.evaluate(node.children[1])
-
-        # Check if there's a step parameter
-        step_value = 1  # Default step
-        body_start_index = 2
-
-        # If we have at least 3 children before the body, the 3rd one is the step
-        if len(node.children) > 2 and (
-            node.children[2].type == NodeType.LITERAL or
-            node.children[2].type == NodeType.IDENTIFIER or
-            node.children[2].type == NodeType.BINARY_OPERATION
-        ):
-            step_value = self.evaluate(node.children[2])
-            body_start_index = 3
-
-        # Ensure all values are numbers
-        if (
-            not isinstance(start_value, (int, float)) or
-            not isinstance(end_value, (int, float)) or
-            not isinstance(step_value, (int, float))
-        ):
-            raise TypeError("invalid_for_loop")
-
-        i = start_value
-        # Check step direction to determine the appropriate comparison
-        if step_value > 0:
-
-            def condition():
-                return i <= end_value
-
-        else:
-
-            def condition():
-                return i >= end_value
+        counter = loop_range(
+            self.evaluate(parts.start),
+            self.evaluate(parts.end),
+            1 if parts.step is None else self.evaluate(parts.step),
+        )
 
-        while condition():
-            # Set the loop variable in scope
-            self.variables[loop_var] = i
+        scope = self.env.values
+        body = parts.body
+        for i in counter:
+            # Set the loop variable in the current scope
+            scope[loop_var] = i
 
             # Execute the body
             try:
-                for stmt_index in range(body_start_index, len(node.children)):
-                    self.execute(node.children[stmt_index])
+                for stmt in body:
+                    self.execute(stmt)
             except BreakSignal:
                 break  # Exit the loop
             except ContinueSignal:
                 pass  # Skip to the next iteration
 
-            i += step_value
-
     # -----------------------------
     #  While Statement
     # -----------------------------
@@ -536,38 +832,56 @@ class Interpreter:
 
         try:
             self.execute_block(node.children[0])
+        except (BreakSignal, ContinueSignal, ReturnSignal):
+            # jooji, soco and celi are control flow, not errors to catch
+            raise
         except Exception as e:
             # Store the error in the variable and execute the catch block
-            self.variables[error_var] = str(e)
+            self.env.values[error_var] = str(e)
             self.execute_block(node.children[1])
 
     # -----------------------------
     #  Import Statement
     # -----------------------------
     def execute_import_statement(self, node):
-        filename = node.value
-
-        try:
-            with open(filename, "r") as f:
-                code = f.read()
-
-            # Import the modules only when needed
-            from src.core.lexer import Lexer
-            from src.core.parser import Parser
-
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            ast = parser.parse()
-
-            # Execute the imported program
-            for stmt in ast.children:
-                self.execute(stmt)
-
-        except FileNotFoundError:
-            raise ImportError("file_not_found", module=filename)
-        except Exception as e:
-            raise ImportError("import_error", filename=filename, error=str(e))
+        self.import_file(node.value)
+
+    def import_file(self, filename):
+        """Bind the module for filename, loading it on first import"""
+        module = self.modules.load(filename, self)
+        self.globals.values[module.name] = module
+
+    def module_engine(self, filename):
+        """A new engine of this kind, sharing the module registry and the
+        call depth, to run an imported file in its own namespace"""
+        engine = type(self)(
+            tree_walk=self.tree_walk,
+            optimize=self.optimize,
+            filename=filename,
+            max_depth=self.max_depth,
+        )
+        engine.modules = self.modules
+        engine.profiler = self.profiler
+        engine.call_stack = self.call_stack
+        engine.call_depth = self.call_depth
+        return engine
+
+    def run_file(self, filename, source):
+        """Parse and run source loaded from filename"""
+        # Import the modules only when needed
+        from src.core.lexer import Lexer
+        from src.core.parser import Parser
+
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        if self.optimize:
+            from src.core.optimizer import optimize
+
+            optimize(ast)
+        if self.profiler is not None:
+            # Account the module's top level to its own <program>
+            self.profiler.run_program(filename, lambda: self.interpret(ast))
+            return
+        self.interpret(ast)
 
     # -----------------------------
     #  Class Definition
@@ -620,16 +934,39 @@ class Interpreter:
         if node.type == NodeType.LITERAL:
             return node.value
         if node.type == NodeType.IDENTIFIER:
-            if node.value in self.variables:
-                return self.variables[node.value]
-            else:
-                raise RuntimeError(
-                    "undefined_variable", name=node.value, line=line, position=position
-                )
+            # Walk the scope chain from the innermost frame outwards
+            env = self.env
+            name = node.value
+            while env is not None:
+                if name in env.values:
+                    return env.values[name]
+                env = env.parent
+            value = self.function_value(name)
+            if value is not None:
+                return value
+            raise RuntimeError(
+                "undefined_variable", name=name, line=line, position=position
+            )
         if node.type == NodeType.BINARY_OPERATION:
             left_val = self.evaluate(node.children[0])
+            # && and || only evaluate the right operand when it decides the result
+            if node.value == "&&":
+                return bool(left_val) and bool(self.evaluate(node.children[1]))
+            if node.value == "||":
+                return bool(left_val) or bool(self.evaluate(node.children[1]))
             right_val = self.evaluate(node.children[1])
-            return self.apply_operator(node.value, left_val, right_val)
+            site = self.operator_sites.get(node)
+            if site is None:
+                site = self.operator_sites[node] = OperatorSite(node.value)
+            if site.left is None or (
+                type(left_val) is site.left and type(right_val) is site.right
+            ):
+                return site.function(left_val, right_val)
+            return site.apply(left_val, right_val)
+        if node.type == NodeType.CONDITIONAL_EXPRESSION:
+            if self.evaluate(node.children[0]):
+                return self.evaluate(node.children[1])
+            return self.evaluate(node.children[2])
         if node.type == NodeType.UNARY_OPERATION:
             # For unary operations, only evaluate the operand
             operand_val = self.evaluate(node.children[0])
@@ -676,52 +1013,36 @@ class Interpreter:
         if node.type == NodeType.METHOD_CALL:
             # Evaluate the object expression (first child)
             obj = self.evaluate(node.children[0])
-            method_name = node.value
-
-            # For built-in list methods
-            if isinstance(obj, list) and method_name in self.list_methods:
-                # Arguments start from the second child
-                args = []
-                for arg in node.children[1:]:
-                    # Special handling for identifiers that might be function references
-                    if method_name == "shaandhee" and arg.type == NodeType.IDENTIFIER:
-                        func_name = arg.value
-                        if func_name in self.functions:
-                            # If the function exists, we'll pass the name and handle it in execute_list_method
-                            args.append(func_name)
-                        else:
-                            # Otherwise evaluate normally
-                            args.append(self.evaluate(arg))
-                    else:
-                        # Normal argument evaluation
-                        args.append(self.evaluate(arg))
-
-                return self.execute_list_method(method_name, obj, args)
-
-            # For built-in object methods
-            elif isinstance(obj, dict) and method_name in self.object_methods:
-                # Arguments start from the second child
-                args = [self.evaluate(arg) for arg in node.children[1:]]
-                return self.execute_object_method(method_name, obj, args)
-
-            # For built-in string methods
-            elif isinstance(obj, str) and method_name in self.string_methods:
-                # Arguments start from the second child
-                args = [self.evaluate(arg) for arg in node.children[1:]]
-                return self.execute_string_method(method_name, obj, args)
-
-            # For user-defined object methods
-            elif isinstance(obj, dict) and method_name in obj:
-                if callable(obj[method_name]):
-                    # Arguments start from the second child
-                    args = [self.evaluate(arg) for arg in node.children[1:]]
-                    return obj[method_name](*args)
-
-            raise RuntimeError(
-                "method_not_found",
-                method_name=method_name,
-                type_name=SoplangBuiltins.nooc(obj),
-            )
+            cache = self.method_caches.get(node)
+            if cache is None:
+                cache = self.method_caches[node] = MethodCache(self, node.value)
+                if self.profiler is not None:
+                    self.profiler.track_cache(self.filename, line, cache)
+
+            if type(obj) is cache.type:
+                cache.hits += 1
+                method = cache.method
+            else:
+                method = cache.miss(obj)
+            if method is None:
+                # A hawl stored on the walax itself
+                member = cache.member(obj)
+                return member(*[self.evaluate(arg) for arg in node.children[1:]])
+
+            # Arguments start from the second child
+            args = []
+            for arg in node.children[1:]:
+                # shaandhee may be given a function by name;
+                # execute_list_method resolves it
+                if (
+                    node.value == "shaandhee" and
+                    arg.type == NodeType.IDENTIFIER and
+                    arg.value in self.functions
+                ):
+                    args.append(arg.value)
+                else:
+                    args.append(self.evaluate(arg))
+            return method(obj, *args)
 
         if node.type == NodeType.INDEX_ACCESS:
             # Evaluate the array expression
@@ -782,45 +1103,10 @@ class Interpreter:
 
     def apply_operator(self, operator, left, right):
         """Apply an operator to two values."""
-        if operator == "+":
-            # Handle string concatenation
-            if isinstance(left, str) or isinstance(right, str):
-                # Import SoplangBuiltins for proper string conversion
-                from src.stdlib.builtins import SoplangBuiltins
-
-                # Use qoraal for proper string conversion (including booleans to been/run)
-                return SoplangBuiltins.qoraal(left) + SoplangBuiltins.qoraal(right)
-            return left + right
-        elif operator == "-":
-            return left - right
-        elif operator == "*":
-            return left * right
-        elif operator == "/":
-            if right == 0:
-                raise RuntimeError("division_by_zero")
-            return left / right
-        elif operator == "%":
-            if right == 0:
-                raise RuntimeError("modulo_by_zero")
-            return left % right
-        elif operator == "==":
-            return left == right
-        elif operator == "!=":
-            return left != right
-        elif operator == ">":
-            return left > right
-        elif operator == "<":
-            return left < right
-        elif operator == ">=":
-            return left >= right
-        elif operator == "<=":
-            return left <= right
-        elif operator == "&&":
-            return bool(left) and bool(right)
-        elif operator == "||":
-            return bool(left) or bool(right)
-        else:
+        function = OPERATORS.get(operator)
+        if function is None:
             raise RuntimeError("unknown_operator", operator=operator)
+        return function(left, right)
 
     # Define a function and store it in the functions dictionary
     def define_function(self, node):
@@ -841,10 +1127,13 @@ class Interpreter:
             else:
                 body_nodes.append(child)
 
-        # Store the function definition
+        # Store the function definition along with its defining scope
         self.functions[func_name] = {
+            "name": func_name,
+            "line": node.line,
             "params": [param.value for param in param_nodes],
             "body": body_nodes,
+            "env": self.env,
         }
 
     def execute_method_call(self, node):
@@ -910,26 +1199,12 @@ class Interpreter:
                     # Create a wrapper function that calls the Soplang function
 
                     def user_func_wrapper(arg):
-                        # Save current variables
-                        old_vars = self.variables.copy()
-                        # Set up the parameter
-                        self.variables[user_func["params"][0]] = arg
-                        # Execute function body
-                        result = None
-                        try:
-                            for statement in user_func["body"]:
-                                result = self.execute(statement)
-                        except ReturnSignal as ret:
-                            result = ret.value
-                        # Restore variables
-                        self.variables = old_vars
-                        return result
+                        # Only the parameter frame is created per element
+                        return self.call_user_function(user_func, [arg])
 
                     args[0] = user_func_wrapper
 
-        method = self.list_methods[method_name]
-        args.insert(0, obj)  # Insert the list as the first argument
-        return method(*args)
+        return self.list_methods[method_name](obj, *args)
 
     def execute_object_method(self, method_name, obj, args):
         """Execute an object method"""
@@ -945,9 +1220,7 @@ class Interpreter:
                 "method_not_found", method_name=method_name, type_name="walax"
             )
 
-        method = self.object_methods[method_name]
-        args.insert(0, obj)  # Insert the object as the first argument
-        return method(*args)
+        return self.object_methods[method_name](obj, *args)
 
     def execute_string_method(self, method_name, obj, args):
         """Execute a string method"""
@@ -963,6 +1236,4 @@ class Interpreter:
                 "method_not_found", method_name=method_name, type_name="qoraal"
             )
 
-        method = self.string_methods[method_name]
-        args.insert(0, obj)  # Insert the string as the first argument
-        return method(*args)
+        return self.string_methods[method_name](obj, *args)
@@ -17,18 +17,62 @@ from src.runtime.interpreter import Interpreter
 from src.utils.errors import SoplangError
 
 
-def run_soplang_file(filename):
+def report_node_counts(before, after):
+    """Print the optimizer's before/after AST node counts to stderr"""
+    print(f"Optimizer: {before} → {after} nodes", file=sys.stderr)
+
+
+def run_soplang_file(
+    filename,
+    tree_walk=False,
+    vm=False,
+    optimize=False,
+    search_path=None,
+    profile=False,
+    profile_sort="tottime",
+    profile_output=None,
+    sample=None,
+    sample_interval=None,
+    max_depth=None,
+):
     """
     Run a Soplang file through the lexer, parser, and interpreter
 
     This function handles the complete execution pipeline:
     1. Read the source file
-    2. Tokenize the source code
+    2. Tokenize the source code, one token at a time as the parser asks
     3. Parse tokens into an abstract syntax tree
-    4. Interpret and execute the program
+    4. Compile the AST into closures and execute the program
+
+    With vm=True the program is compiled to bytecode instead and cached in a
+    .sopc file; when that cache is fresh, steps 2 and 3 are skipped.
+
+    With optimize=True the AST is rewritten by the optimizer between steps 3
+    and 4, and the node counts before and after are printed to stderr.
+
+    With profile=True every hawl call and statement is recorded, and a
+    profile report is printed to stderr when the program ends. With sample
+    set, the Soplang call stack is sampled instead and written to that file
+    as folded stacks for flamegraph tools. Either way the program runs on
+    the closure compiler or the tree walker, never the VM.
 
     Args:
         filename (str): Path to the Soplang file to execute
+        tree_walk (bool): Use the reference tree-walking interpreter instead
+            of the closure compiler
+        vm (bool): Run on the bytecode virtual machine
+        optimize (bool): Run the AST optimizer before executing
+        search_path (list): Extra directories to look in for ka_keen files
+        profile (bool): Profile the program
+        profile_sort (str): Column the report is sorted by (see SORT_KEYS
+            in src/runtime/profiler.py)
+        profile_output (str): File to also write the profile to, as JSON
+            if it ends in .json and in pstats format otherwise
+        sample (str): File to write sampled call stacks to
+        sample_interval (float): Seconds between samples (default
+            DEFAULT_INTERVAL in src/runtime/profiler.py)
+        max_depth (int): Levels deep hawl calls may nest below the outermost one
+            (default DEFAULT_MAX_DEPTH in src/runtime/interpreter.py)
 
     Returns:
         int: Exit code (0 for success, 1 for error)
@@ -37,57 +81,245 @@ def run_soplang_file(filename):
         with open(filename, "r") as file:
             code = file.read()
 
-        # Ensure code ends with a newline to avoid parsing issues
-        if not code.endswith("\n"):
-            code += "\n"
+        execute_source(
+            code,
+            filename,
+            tree_walk,
+            vm,
+            optimize,
+            search_path,
+            profile,
+            profile_sort,
+            profile_output,
+            sample,
+            sample_interval,
+            max_depth,
+        )
+        # No status indication - clean execution completes silently
+        return 0  # Success
 
-        # 1) Tokenize the source code
-        lexer = Lexer(code)
-        tokens = lexer.tokenize()
+    except FileNotFoundError:
+        # File not found error in Somali
+        print(f"✗ Khalad: Faylka '{os.path.basename(filename)}' ma helin.")
+        return 1  # Error
+    except Exception as e:
+        return report_error(e)
 
-        # 2) Parse tokens into an AST
-        parser = Parser(tokens)
-        ast = parser.parse()
 
-        # 3) Interpret and execute the AST
-        inter = Interpreter()
+def run_soplang_code(
+    code,
+    tree_walk=False,
+    vm=False,
+    optimize=False,
+    search_path=None,
+    profile=False,
+    profile_sort="tottime",
+    profile_output=None,
+    sample=None,
+    sample_interval=None,
+    max_depth=None,
+):
+    """
+    Run a snippet of Soplang code, as given to main.py -c
+
+    The snippet goes through the same pipeline as a file, without a .sopc
+    cache; ka_keen paths are relative to the working directory.
+
+    Args:
+        code (str): Soplang source code to execute
+        tree_walk (bool): Use the reference tree-walking interpreter instead
+            of the closure compiler
+        vm (bool): Run on the bytecode virtual machine
+        optimize (bool): Run the AST optimizer before executing
+        search_path (list): Extra directories to look in for ka_keen files
+        profile (bool): Profile the snippet, as run_soplang_file does
+        profile_sort (str): Column the profile report is sorted by
+        profile_output (str): File to also write the profile to
+        sample (str): File to write sampled call stacks to
+        sample_interval (float): Seconds between samples
+        max_depth (int): Levels deep hawl calls may nest below the outermost one
+
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    try:
+        execute_source(
+            code,
+            None,
+            tree_walk,
+            vm,
+            optimize,
+            search_path,
+            profile,
+            profile_sort,
+            profile_output,
+            sample,
+            sample_interval,
+            max_depth,
+        )
+        return 0  # Success
+    except Exception as e:
+        return report_error(e)
+
+
+def execute_source(
+    code,
+    filename,
+    tree_walk,
+    vm,
+    optimize,
+    search_path,
+    profile=False,
+    profile_sort="tottime",
+    profile_output=None,
+    sample=None,
+    sample_interval=None,
+    max_depth=None,
+):
+    """Lex, parse and run code; filename is None for code not read from a file"""
+    # Ensure code ends with a newline to avoid parsing issues
+    if not code.endswith("\n"):
+        code += "\n"
+
+    if vm and not (profile or sample):
+        # Import the VM only when needed, to keep startup fast
+        from src.runtime.vm import VirtualMachine, load_program
+
+        # Bytecode is loaded from the cache or compiled and cached
+        program = load_program(filename, code, optimize, report_node_counts)
+        engine = VirtualMachine(
+            optimize=optimize,
+            filename=filename,
+            search_path=search_path,
+            max_depth=max_depth,
+        )
+        engine.run_code(program)
+        return
+
+    # 1) Tokenize the source code, lazily
+    lexer = Lexer(code)
+    tokens = lexer.iter_tokens()
+
+    # 2) Parse tokens into an AST as they are produced
+    parser = Parser(tokens)
+    ast = parser.parse()
+    if optimize:
+        from src.core.optimizer import optimize as optimize_ast
+
+        report_node_counts(*optimize_ast(ast))
+
+    # 3) Interpret and execute the AST
+    inter = Interpreter(
+        tree_walk=tree_walk,
+        optimize=optimize,
+        filename=filename,
+        search_path=search_path,
+        max_depth=max_depth,
+    )
+    if sample:
+        run_sampled(inter, ast, filename, sample, sample_interval)
+        return
+    if not profile:
         # Clean output without any headers or decorations
         inter.interpret(ast)
+        return
 
-        # No status indication - clean execution completes silently
-        return 0  # Success
+    from src.runtime.profiler import Profiler
+
+    inter.profiler = profiler = Profiler()
+    try:
+        profiler.run_program(filename, lambda: inter.interpret(ast))
+    finally:
+        # Report even when the program fails; that run may be the slow one
+        print(profiler.report(profile_sort), file=sys.stderr)
+        if profile_output:
+            profiler.dump(profile_output)
+
+
+def run_sampled(inter, ast, filename, path, interval=None):
+    """Run ast while sampling its call stack, then write the folded stacks"""
+    from src.runtime.profiler import DEFAULT_INTERVAL, SamplingProfiler
+
+    sampler = SamplingProfiler(inter.call_stack, interval or DEFAULT_INTERVAL)
+    inter.profiler = sampler
+    sampler.start()
+    try:
+        sampler.run_program(filename, lambda: inter.interpret(ast))
+    finally:
+        sampler.stop()
+        sampler.dump(path)
+        print(
+            f"Sampler: {sampler.sample_count()} samples, one every "
+            f"{sampler.interval * 1000:g} ms, written to {path}",
+            file=sys.stderr,
+        )
+
+
+def report_error(e):
+    """Print an error raised while running a program in Somali; returns 1"""
+    if isinstance(e, SoplangError):
+        # Display error message - already formatted in Somali
+        print(f"✗ {e}")
+        return 1  # Error
+
+    # Convert Python exceptions to Somali error messages
+    from src.utils.errors import RuntimeError
+
+    # Format different types of Python errors as Somali errors
+    if "missing 1 required positional argument" in str(e):
+        # Function missing argument
+        func_name = str(e).split(".")[0]
+        error = RuntimeError(
+            "missing_argument", func_name=func_name, expected="1", provided="0"
+        )
+    elif "division by zero" in str(e):
+        # Division by zero
+        error = RuntimeError("division_by_zero")
+    elif "list index out of range" in str(e):
+        # List index out of range
+        error = RuntimeError("index_out_of_range", index="?")
+    else:
+        # Generic error
+        error = RuntimeError(f"Khalad: {str(e)}")
+
+    print(f"✗ {error}")
+    return 1  # Error
+
+
+def check_soplang_file(filename):
+    """
+    Statically check a Soplang file without running it
 
+    The file is parsed and resolved; every name that can never be bound is
+    reported as an undefined variable.
+
+    Args:
+        filename (str): Path to the Soplang file to check
+
+    Returns:
+        int: Exit code (0 if no problems were found, 1 otherwise)
+    """
+    try:
+        with open(filename, "r") as file:
+            code = file.read()
+        if not code.endswith("\n"):
+            code += "\n"
+
+        from src.core.resolver import resolve
+        from src.stdlib.builtins import get_builtin_functions
+
+        ast = Parser(Lexer(code).iter_tokens()).parse()
+        diagnostics = resolve(ast, known_functions=get_builtin_functions())
     except FileNotFoundError:
-        # File not found error in Somali
         print(f"✗ Khalad: Faylka '{os.path.basename(filename)}' ma helin.")
-        return 1  # Error
+        return 1
     except SoplangError as e:
-        # Display error message - already formatted in Somali
         print(f"✗ {e}")
-        return 1  # Error
-    except Exception as e:
-        # Convert Python exceptions to Somali error messages
-        from src.utils.errors import RuntimeError
-
-        # Format different types of Python errors as Somali errors
-        if "missing 1 required positional argument" in str(e):
-            # Function missing argument
-            func_name = str(e).split(".")[0]
-            error = RuntimeError(
-                "missing_argument", func_name=func_name, expected="1", provided="0"
-            )
-        elif "division by zero" in str(e):
-            # Division by zero
-            error = RuntimeError("division_by_zero")
-        elif "list index out of range" in str(e):
-            # List index out of range
-            error = RuntimeError("index_out_of_range", index="?")
-        else:
-            # Generic error
-            error = RuntimeError(f"Khalad: {str(e)}")
+        return 1
 
+    for error in diagnostics:
         print(f"✗ {error}")
-        return 1  # Error
+    return 1 if diagnostics else 0
 
 
 def print_usage():
@@ -0,0 +1,86 @@
+"""
+Soplang method call inline caches.
+
+Every obj.method(...) call site owns a MethodCache. It remembers the type
+of the last receiver and the builtin teed, walax or qoraal method that type
+resolved to, so a following call whose receiver has exactly that type goes
+straight to the method: one type comparison instead of the isinstance chain
+and registry lookups. Any other receiver is a miss, which runs the full
+lookup and, when it finds a builtin, caches it in place of the old entry.
+Members stored on a walax itself (its own hawl, or a module's exports)
+depend on the object rather than its type and are never cached.
+
+Engines check `type(obj) is cache.type` inline and call cache.method on a
+hit. Hits are only counted where something reads them: by the tree walker,
+and by the closure compiler while a Profiler is attached, whose report
+lists each call site's hits and misses.
+"""
+
+from src.stdlib.builtins import SoplangBuiltins
+from src.utils.errors import RuntimeError
+
+# List methods that may be given a hawl by name instead of as a value
+CALLBACK_METHODS = ("shaandhee", "aaddin")
+
+
+class MethodCache:
+    """Inline cache of one method call site"""
+
+    __slots__ = ("engine", "name", "type", "method", "hits", "misses")
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.name = name
+        self.type = None  # Receiver type of the cached entry
+        self.method = None  # Called as method(obj, *args)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, obj):
+        """The builtin method obj.name resolves to, or None"""
+        engine = self.engine
+        name = self.name
+        if isinstance(obj, list) and name in engine.list_methods:
+            if name in CALLBACK_METHODS:
+                return self._list_callback_method
+            return engine.list_methods[name]
+        if isinstance(obj, dict) and name in engine.object_methods:
+            return engine.object_methods[name]
+        if isinstance(obj, str) and name in engine.string_methods:
+            return engine.string_methods[name]
+        return None
+
+    def miss(self, obj):
+        """Look the method up for obj and cache it; None when it is not a builtin"""
+        self.misses += 1
+        method = self.lookup(obj)
+        if method is not None:
+            self.type = type(obj)
+            self.method = method
+        return method
+
+    def member(self, obj):
+        """The hawl obj holds under the method name, for a walax receiver"""
+        if isinstance(obj, dict) and self.name in obj:
+            member = obj[self.name]
+            if callable(member):
+                return member
+        raise RuntimeError(
+            "method_not_found",
+            method_name=self.name,
+            type_name=SoplangBuiltins.nooc(obj),
+        )
+
+    def call(self, obj, args):
+        """Call obj.name(*args) through the cache"""
+        if type(obj) is self.type:
+            self.hits += 1
+            return self.method(obj, *args)
+        method = self.miss(obj)
+        if method is not None:
+            return method(obj, *args)
+        return self.member(obj)(*args)
+
+    def _list_callback_method(self, obj, *args):
+        # Resolves a hawl given by name before calling shaandhee or aaddin
+        return self.engine.execute_list_method(self.name, obj, list(args))
@@ -0,0 +1,182 @@
+"""
+Soplang module registry.
+
+ka_keen "waddo/magac.sop" runs the file at most once per program, in a new
+engine of the same kind as the importer, so the module has its own globals,
+functions and classes. A Module holding its exports is then bound to the
+global `magac` of the importer:
+
+    ka_keen "xisaab.sop"
+    qor(xisaab.PI)
+    qor(xisaab.isku_dar(2, 3))
+
+Relative paths are looked up next to the importing file first, then in each
+directory of the search path (--path and SOPLANG_PATH), then in the working
+directory. Modules are cached by resolved path. A later import reuses the
+cached Module unless the file's modification time or size has changed and
+its contents hash differently.
+"""
+
+import os
+
+from src.core.resolver import import_name
+from src.runtime.environment import UNBOUND
+from src.utils.errors import ImportError
+
+# Environment variable holding extra module directories, os.pathsep separated
+SEARCH_PATH_VARIABLE = "SOPLANG_PATH"
+
+
+def default_search_path():
+    """Directories listed in SOPLANG_PATH"""
+    value = os.environ.get(SEARCH_PATH_VARIABLE, "")
+    return [entry for entry in value.split(os.pathsep) if entry]
+
+
+class ModuleFunction:
+    """A hawl exported by a module; calling it runs in the module's engine"""
+
+    __slots__ = ("module", "name")
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def __call__(self, *args):
+        return self.module.engine.call_function(self.name, list(args))
+
+    def __repr__(self):
+        return f"<hawl {self.module.name}.{self.name}>"
+
+
+class ExportedGlobals(dict):
+    """Global variables of a module's engine; each assignment is copied into
+    the module's exports, so they stay current without rescanning"""
+
+    __slots__ = ("module",)
+
+    def __setitem__(self, name, value):
+        dict.__setitem__(self, name, value)
+        if value is not UNBOUND:
+            module = self.module
+            # A hawl of the same name is exported instead
+            if not isinstance(module.get(name), ModuleFunction):
+                dict.__setitem__(module, name, value)
+
+
+class ExportedFunctions(dict):
+    """Function table of a module's engine; each hawl defined in it is
+    exported as a ModuleFunction"""
+
+    __slots__ = ("module",)
+
+    def __setitem__(self, name, func):
+        dict.__setitem__(self, name, func)
+        # Built-ins are Python callables; only hawl definitions are exported
+        module = self.module
+        if not callable(func) and not isinstance(module.get(name), ModuleFunction):
+            dict.__setitem__(module, name, ModuleFunction(module, name))
+
+
+class Module(dict):
+    """
+    Exports of an imported file: its global variables, and its functions as
+    ModuleFunctions. Being a dict, it works with property access and
+    obj.method() calls in every engine without special cases.
+
+    The engine's globals and function table are replaced by ExportedGlobals
+    and ExportedFunctions before the file runs, so the exports follow every
+    later assignment, including those made by the module's own hawls.
+    """
+
+    def __init__(self, name, path, engine):
+        super().__init__()
+        self.name = name
+        self.path = path
+        self.engine = engine  # Interpreter or VM that runs the module
+        variables = ExportedGlobals()
+        variables.module = self
+        functions = ExportedFunctions()
+        functions.module = self
+        for key, func in engine.functions.items():
+            functions[key] = func
+        for key, value in engine.globals.values.items():
+            variables[key] = value
+        engine.globals.values = engine.variables = variables
+        engine.functions = functions
+
+
+class ModuleEntry:
+    __slots__ = ("stamp", "digest", "module")
+
+    def __init__(self, stamp, digest, module):
+        self.stamp = stamp  # (mtime_ns, size) when the file was loaded
+        self.digest = digest  # sha256 of the source
+        self.module = module
+
+
+class ModuleRegistry:
+    """Loaded modules, shared by a program and every module it imports"""
+
+    def __init__(self, search_path=None):
+        if search_path is None:
+            search_path = []
+        self.search_path = list(search_path) + default_search_path()
+        self.entries = {}  # Real path -> ModuleEntry
+        self.loading = set()  # Real paths whose top level is running
+
+    def find(self, filename, importer_dir=None):
+        """Return the path ka_keen filename refers to, or raise ImportError"""
+        if os.path.isabs(filename):
+            candidates = [filename]
+        else:
+            candidates = []
+            if importer_dir is not None:
+                candidates.append(os.path.join(importer_dir, filename))
+            candidates.extend(
+                os.path.join(directory, filename) for directory in self.search_path
+            )
+            candidates.append(filename)
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+        raise ImportError("file_not_found", module=filename)
+
+    def load(self, filename, importer):
+        """Return the Module for filename as imported by importer"""
+        importer_dir = None
+        if importer.filename is not None:
+            importer_dir = os.path.dirname(os.path.abspath(importer.filename))
+        path = self.find(filename, importer_dir)
+        key = os.path.realpath(path)
+
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(key)
+        if entry is not None and entry.stamp == stamp:
+            return entry.module
+        if key in self.loading:
+            raise ImportError("circular_import", module=filename)
+
+        with open(path, "r") as f:
+            source = f.read()
+        import hashlib
+
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        if entry is not None and entry.digest == digest:
+            # Touched but unchanged
+            entry.stamp = stamp
+            return entry.module
+
+        engine = importer.module_engine(path)
+        module = Module(import_name(filename), path, engine)
+        self.loading.add(key)
+        try:
+            engine.run_file(path, source)
+        except Exception as e:
+            raise ImportError("import_error", filename=filename, error=str(e))
+        finally:
+            self.loading.discard(key)
+
+        self.entries[key] = ModuleEntry(stamp, digest, module)
+        return module
@@ -0,0 +1,160 @@
+"""
+Soplang binary operators.
+
+Every binary operator resolves to one operator function in OPERATORS, looked
+up once per node rather than by comparing the operator string on every
+operation. Those functions are the reference semantics: + concatenates the
+qoraal of both operands when either is a string, / and % reject a zero
+divisor with a Soplang error, and && and || compare truthiness.
+
+The tree walker quickens each binary operation node through an OperatorSite.
+The first evaluation looks up SPECIALIZED for its exact operand types (int
+and float arithmetic, string concatenation) and, when there is an entry,
+rewrites the site to that function behind a guard on the two types. An
+operation whose operands fail the guard deoptimizes the site back to the
+generic function and requickens it for the new types; after DEOPT_LIMIT
+deoptimizations the site runs the generic function unguarded. Sites of the
+other operators always do: comparisons, - and * resolve to the operator
+module's functions, which are already as direct as it gets.
+
+The closure compiler and the VM speculate instead, since a type guard costs
+them as much as the generic function: they apply the native Python operator
+in NATIVE, whose own type dispatch is the guard, and deoptimize for good the
+first time it raises, which it does for a string concatenated with another
+type or a zero divisor. The compiler resolves every other operator straight
+to its function and captures literal operands as values, and the VM quickens
+BINARY_ADD in place to BINARY_ADD_NATIVE.
+"""
+
+import operator
+
+from src.stdlib.builtins import SoplangBuiltins
+from src.utils.errors import RuntimeError
+
+# Times a site may deoptimize before it stops quickening
+DEOPT_LIMIT = 8
+
+# What the native operator raises where the generic function takes over
+SPECULATION_ERRORS = (TypeError, ZeroDivisionError)
+
+
+to_string = SoplangBuiltins.qoraal
+
+
+def add(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return to_string(a) + to_string(b)
+    return a + b
+
+
+def divide(a, b):
+    if b == 0:
+        raise RuntimeError("division_by_zero")
+    return a / b
+
+
+def modulo(a, b):
+    if b == 0:
+        raise RuntimeError("modulo_by_zero")
+    return a % b
+
+
+def logical_and(a, b):
+    return bool(a) and bool(b)
+
+
+def logical_or(a, b):
+    return bool(a) or bool(b)
+
+
+OPERATORS = {
+    "+": add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": divide,
+    "%": modulo,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "&&": logical_and,
+    "||": logical_or,
+}
+
+# Native operators that +, / and % speculate on
+NATIVE = {"+": operator.add, "/": operator.truediv, "%": operator.mod}
+
+
+def divide_numbers(a, b):
+    """/ for two numbers, where only a zero divisor needs checking"""
+    try:
+        return a / b
+    except ZeroDivisionError:
+        raise RuntimeError("division_by_zero")
+
+
+def modulo_numbers(a, b):
+    """% for two numbers, where only a zero divisor needs checking"""
+    try:
+        return a % b
+    except ZeroDivisionError:
+        raise RuntimeError("modulo_by_zero")
+
+
+# (operator, left type, right type) -> specialized operator function
+SPECIALIZED = {("+", str, str): operator.add}
+for _left in (int, float):
+    for _right in (int, float):
+        SPECIALIZED["+", _left, _right] = operator.add
+        SPECIALIZED["/", _left, _right] = divide_numbers
+        SPECIALIZED["%", _left, _right] = modulo_numbers
+
+
+# Operators that have specializations
+QUICKENED = frozenset(key[0] for key in SPECIALIZED)
+
+
+class Unseen:
+    """Operand type of a site that has not run yet, which no value has"""
+
+
+class OperatorSite:
+    """Quickened binary operation of one node
+
+    Engines call function(a, b) when left is None, for a site that runs its
+    operator unguarded, or when a and b have exactly the types left and
+    right, and apply(a, b) otherwise.
+    """
+
+    __slots__ = ("operator", "generic", "left", "right", "function", "deopts")
+
+    def __init__(self, operator):
+        self.operator = operator
+        self.generic = OPERATORS.get(operator)
+        self.function = self.generic
+        self.deopts = 0
+        if operator in QUICKENED or self.generic is None:
+            self.left = self.right = Unseen
+        else:
+            self.left = self.right = None
+
+    def apply(self, a, b):
+        """Apply the operator to operands that failed the guard, and requicken"""
+        if self.generic is None:
+            raise RuntimeError("unknown_operator", operator=self.operator)
+        if self.left is not Unseen:
+            self.deopts += 1
+        if self.deopts < DEOPT_LIMIT:
+            # Guard on these types, with the generic function when no
+            # specialization fits them
+            self.left = type(a)
+            self.right = type(b)
+            self.function = SPECIALIZED.get((self.operator, self.left, self.right))
+            if self.function is None:
+                self.function = self.generic
+        else:
+            self.left = self.right = None
+            self.function = self.generic
+        return self.function(a, b)
@@ -0,0 +1,400 @@
+"""
+Soplang profilers.
+
+With --profile the engine is given a Profiler, which is told about every
+hawl call and every statement that runs:
+
+- per hawl: calls, exclusive time (spent in the hawl's own statements) and
+  inclusive time (including the hawl it calls); time spent in recursive
+  calls is counted once in the outermost call's inclusive time
+- per source line: how many times a statement on that line ran, using the
+  line numbers the parser records on AST nodes
+- per obj.method() call site: hits and misses of its inline MethodCache
+
+Top-level code is accounted to a pseudo function named <program>. The
+closure compiler installs the hooks at compile time, so programs run
+without --profile pay nothing for them.
+
+The report is plain text sorted by any column. dump() writes the same data
+as JSON, for diffing between releases, or in the marshal format read by
+Python's pstats module.
+
+With --sample the engine is given a SamplingProfiler instead. Through the
+same hooks it keeps Interpreter.call_stack up to date, one entry per
+running hawl call pushed at the call site, and a background thread copies
+that stack every few milliseconds. Statements are not instrumented and
+nothing is timed per call, so tiny hot hawl are not distorted the way
+they are by the deterministic profiler. The samples are written as folded
+stacks, one `frame;frame;... count` line per distinct stack, the input
+format of flamegraph.pl and speedscope, with frames such as
+`fib (fib.sop:5)`.
+"""
+
+import json
+import linecache
+import marshal
+import threading
+import time
+
+# Name under which top-level code is reported
+PROGRAM = "<program>"
+
+# Shown as the file of code given with -c
+NO_FILE = "<string>"
+
+# Seconds between two samples of the call stack
+DEFAULT_INTERVAL = 0.005
+
+# Report columns a --profile-sort key orders by, largest first
+SORT_KEYS = {
+    "calls": lambda item: item[1].calls,
+    "tottime": lambda item: item[1].exclusive,
+    "cumtime": lambda item: item[1].inclusive,
+    "name": lambda item: (item[0][2], item[0][0], item[0][1]),
+    "line": lambda item: (item[0][0], item[0][1]),
+}
+
+# Keys whose natural order is ascending
+ASCENDING = ("name", "line")
+
+
+class FunctionStats:
+    __slots__ = ("calls", "primitive_calls", "exclusive", "inclusive", "callers")
+
+    def __init__(self):
+        self.calls = 0
+        self.primitive_calls = 0  # Calls not made from inside the same hawl
+        self.exclusive = 0.0
+        self.inclusive = 0.0
+        self.callers = {}  # Caller key -> number of calls from it
+
+
+class Profiler:
+    """Collects hawl timings and line hit counts for one program run"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.functions = {}  # (file, line, name) -> FunctionStats
+        self.lines = {}  # (file, line) -> hits
+        self.stack = []  # [key, start time, time spent in callees] per call
+        self.active = {}  # key -> number of its calls currently running
+        self.caches = []  # ((file, line), MethodCache) per method call site
+
+    # -----------------------------
+    #  Recording
+    # -----------------------------
+    def enter(self, key):
+        """Start timing a call of the hawl identified by key"""
+        stats = self.functions.get(key)
+        if stats is None:
+            stats = self.functions[key] = FunctionStats()
+        stats.calls += 1
+        depth = self.active.get(key, 0)
+        if depth == 0:
+            stats.primitive_calls += 1
+        self.active[key] = depth + 1
+        if self.stack:
+            caller = self.stack[-1][0]
+            stats.callers[caller] = stats.callers.get(caller, 0) + 1
+        self.stack.append([key, self.clock(), 0.0])
+
+    def exit(self):
+        """Stop timing the innermost call"""
+        key, start, callees = self.stack.pop()
+        elapsed = self.clock() - start
+        stats = self.functions[key]
+        stats.exclusive += elapsed - callees
+        depth = self.active[key] - 1
+        self.active[key] = depth
+        if depth == 0:
+            stats.inclusive += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def hit(self, filename, line):
+        """Count one run of a statement on line"""
+        if line is None:
+            return
+        key = (filename or NO_FILE, line)
+        self.lines[key] = self.lines.get(key, 0) + 1
+
+    def function_key(self, filename, line, name):
+        return (filename or NO_FILE, line or 0, name)
+
+    def track_cache(self, filename, line, cache):
+        """Report the hits and misses of the method call cache on line"""
+        self.caches.append(((filename or NO_FILE, line or 0), cache))
+
+    def run_program(self, filename, run):
+        """Call run(), accounting its time to the top-level <program>"""
+        self.enter(self.function_key(filename, 0, PROGRAM))
+        try:
+            return run()
+        finally:
+            self.exit()
+
+    # -----------------------------
+    #  Wrappers used by the closure compiler
+    # -----------------------------
+    def count_line(self, filename, line, statement):
+        """Wrap a compiled statement so each run is counted against line"""
+        lines = self.lines
+        key = (filename or NO_FILE, line)
+
+        def counted():
+            lines[key] = lines.get(key, 0) + 1
+            return statement()
+
+        return counted
+
+    def call_entry(self, filename, line, name):
+        # Calls are timed in the callee, by time_function
+        return None
+
+    def time_function(self, key, body):
+        """Wrap a compiled hawl body so each call is timed under key"""
+        enter = self.enter
+        exit = self.exit
+
+        def timed():
+            enter(key)
+            try:
+                return body()
+            finally:
+                exit()
+
+        return timed
+
+    # -----------------------------
+    #  Output
+    # -----------------------------
+    def sorted_functions(self, sort="tottime"):
+        items = list(self.functions.items())
+        items.sort(key=SORT_KEYS[sort], reverse=sort not in ASCENDING)
+        return items
+
+    def report(self, sort="tottime", limit=20):
+        """Return the profile as a text report, hawl sorted by sort"""
+        total = sum(stats.exclusive for stats in self.functions.values())
+        calls = sum(
+            stats.calls
+            for (_, _, name), stats in self.functions.items()
+            if name != PROGRAM
+        )
+        out = [f"{calls} hawl calls in {total:.3f} seconds", ""]
+        out.append(
+            f"{'calls':>10} {'tottime':>9} {'percall':>9} "
+            f"{'cumtime':>9} {'percall':>9}  file:line(hawl)"
+        )
+        for (filename, line, name), stats in self.sorted_functions(sort):
+            if stats.calls == stats.primitive_calls:
+                count = str(stats.calls)
+            else:
+                count = f"{stats.calls}/{stats.primitive_calls}"
+            out.append(
+                f"{count:>10} {stats.exclusive:>9.4f} "
+                f"{stats.exclusive / stats.calls:>9.6f} {stats.inclusive:>9.4f} "
+                f"{stats.inclusive / stats.primitive_calls:>9.6f}  "
+                f"{filename}:{line}({name})"
+            )
+
+        if self.lines:
+            hottest = sorted(self.lines.items(), key=lambda item: (-item[1], item[0]))
+            out.append("")
+            out.append(f"{'hits':>10}  file:line  source")
+            for (filename, line), hits in hottest[:limit]:
+                source = linecache.getline(filename, line).strip()
+                out.append(f"{hits:>10}  {filename}:{line}  {source}")
+
+        caches = [item for item in self.caches if item[1].hits or item[1].misses]
+        if caches:
+            caches.sort(key=lambda item: (-(item[1].hits + item[1].misses), item[0]))
+            hits = sum(cache.hits for _, cache in caches)
+            misses = sum(cache.misses for _, cache in caches)
+            out.append("")
+            out.append(
+                f"{hits + misses} method calls, "
+                f"{hits / (hits + misses):.1%} inline cache hits"
+            )
+            out.append(
+                f"{'hits':>10} {'misses':>9} {'hit rate':>9}  file:line(.method)"
+            )
+            for (filename, line), cache in caches[:limit]:
+                rate = cache.hits / (cache.hits + cache.misses)
+                out.append(
+                    f"{cache.hits:>10} {cache.misses:>9} {rate:>9.1%}  "
+                    f"{filename}:{line}(.{cache.name})"
+                )
+        return "\n".join(out)
+
+    def to_json(self):
+        """The profile as JSON-compatible data, in a stable order"""
+        return {
+            "functions": [
+                {
+                    "file": filename,
+                    "line": line,
+                    "name": name,
+                    "calls": stats.calls,
+                    "primitive_calls": stats.primitive_calls,
+                    "tottime": stats.exclusive,
+                    "cumtime": stats.inclusive,
+                    "callers": [
+                        {"file": f, "line": l, "name": n, "calls": count}
+                        for (f, l, n), count in sorted(stats.callers.items())
+                    ],
+                }
+                for (filename, line, name), stats in sorted(self.functions.items())
+            ],
+            "lines": [
+                {"file": filename, "line": line, "hits": hits}
+                for (filename, line), hits in sorted(self.lines.items())
+            ],
+            "method_caches": [
+                {
+                    "file": filename,
+                    "line": line,
+                    "method": cache.name,
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                }
+                for (filename, line), cache in sorted(
+                    self.caches, key=lambda item: (item[0], item[1].name)
+                )
+            ],
+        }
+
+    def to_pstats(self):
+        """The profile in the layout pstats.Stats loads from a file"""
+        return {
+            key: (
+                stats.primitive_calls,
+                stats.calls,
+                stats.exclusive,
+                stats.inclusive,
+                dict(stats.callers),
+            )
+            for key, stats in self.functions.items()
+        }
+
+    def dump(self, path):
+        """Write the profile to path: JSON for a .json file, else pstats"""
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(self.to_json(), f, indent=2)
+                f.write("\n")
+        else:
+            with open(path, "wb") as f:
+                marshal.dump(self.to_pstats(), f)
+
+
+class SamplingProfiler:
+    """Samples the Soplang call stack from a background thread"""
+
+    def __init__(self, call_stack, interval=DEFAULT_INTERVAL):
+        # Interpreter.call_stack: (hawl name, file, line it was called
+        # from) per running call, the first entry being the <program>
+        self.call_stack = call_stack
+        self.interval = interval
+        self.samples = {}  # Snapshot of call_stack -> times seen
+        self.definitions = {}  # hawl name -> (file, line) it is defined at
+        self.line = 0  # Tree walker only: line of the running statement
+        self.stopped = threading.Event()
+        self.thread = None
+
+    # -----------------------------
+    #  Call stack upkeep, through the same hooks as Profiler
+    # -----------------------------
+    def call_entry(self, filename, line, name):
+        """The entry a compiled call site pushes onto call_stack around each
+        call of a hawl; arguments are evaluated before it is pushed"""
+        return (name, filename or NO_FILE, line)
+
+    def time_function(self, key, body):
+        # Compiled hawl need no wrapper; remember where they are defined
+        self.definitions[key[2]] = key[:2]
+        return body
+
+    def count_line(self, filename, line, statement):
+        return statement
+
+    def track_cache(self, filename, line, cache):
+        pass
+
+    def hit(self, filename, line):
+        if line is not None:
+            self.line = line
+
+    def enter(self, key):
+        filename, line, name = key
+        self.definitions[name] = (filename, line)
+        self.call_stack.append((name, filename, self.line))
+
+    def exit(self):
+        # Back in the caller, on the line that made the call
+        self.line = self.call_stack.pop()[2]
+
+    def function_key(self, filename, line, name):
+        return (filename or NO_FILE, line or 0, name)
+
+    def run_program(self, filename, run):
+        """Call run() inside a top-level <program> entry"""
+        self.call_stack.append((PROGRAM, filename or NO_FILE, 0))
+        try:
+            return run()
+        finally:
+            self.call_stack.pop()
+
+    # -----------------------------
+    #  Sampling
+    # -----------------------------
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.sample, name="soplang-sampler", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def sample(self):
+        samples = self.samples
+        call_stack = self.call_stack
+        while not self.stopped.wait(self.interval):
+            # The entries are tuples, so one copy is a consistent snapshot
+            stack = tuple(call_stack)
+            if stack:
+                samples[stack] = samples.get(stack, 0) + 1
+
+    # -----------------------------
+    #  Output
+    # -----------------------------
+    def sample_count(self):
+        return sum(self.samples.values())
+
+    def frame_names(self, stack):
+        """Name each frame by its hawl and the line it is running: the line
+        of the call it is making, or for the innermost frame, where its
+        hawl is defined"""
+        names = []
+        for (name, filename, _), (_, here, line) in zip(stack, stack[1:]):
+            names.append(f"{name} ({here}:{line})")
+        name, filename, _ = stack[-1]
+        filename, line = self.definitions.get(name, (filename, 0))
+        names.append(f"{name} ({filename}:{line})")
+        return names
+
+    def folded(self):
+        """The samples as folded stack lines, most frequent first"""
+        counts = {}
+        for stack, count in self.samples.items():
+            frames = ";".join(self.frame_names(stack))
+            counts[frames] = counts.get(frames, 0) + count
+        ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return "".join(f"{frames} {count}\n" for frames, count in ordered)
+
+    def dump(self, path):
+        """Write the folded stacks to path"""
+        with open(path, "w") as f:
+            f.write(self.folded())
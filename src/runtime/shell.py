@@ -30,18 +30,30 @@ else:
     except ImportError:
         USE_PROMPT_TOOLKIT = False
 
-from src.core.lexer import Lexer, Token
+from src.core.ast import ASTNode, NodeType
+from src.core.lexer import Lexer
 from src.core.parser import Parser
 from src.core.tokens import TokenType
 from src.runtime.interpreter import Interpreter
 from src.utils.errors import (
+    ErrorMessageManager,
     ImportError,
-    LexerError,
     ParserError,
-    RuntimeError,
     SoplangError,
 )
 
+# Expression statements whose value the shell prints; calls are left out,
+# since qor and most hawl already print what they return
+ECHOED_EXPRESSIONS = (
+    NodeType.LITERAL,
+    NodeType.IDENTIFIER,
+    NodeType.BINARY_OPERATION,
+    NodeType.UNARY_OPERATION,
+    NodeType.INDEX_ACCESS,
+    NodeType.PROPERTY_ACCESS,
+    NodeType.CONDITIONAL_EXPRESSION,
+)
+
 
 class SoplangShell:
     def __init__(self):
@@ -166,8 +178,7 @@ class SoplangShell:
                 break
 
     def execute_code(self, code):
-        """Execute Soplang code snippet using special shell handling"""
-        original_code = code
+        """Execute Soplang code in the shell's interpreter, keeping its state"""
         code = code.strip()
 
         # Skip empty lines and comments
@@ -178,431 +189,26 @@ class SoplangShell:
         code = self._format_code(code)
 
         try:
-            # DIRECT EXECUTION OF COMMON PATTERNS
-            # This bypasses the normal parser for better interactive experience
-
-            # Case 1: Print statements (qor)
-            if code.startswith("qor"):
-                # Extract the content to print (remove the trailing semicolon if present)
-                code_without_semicolon = code[:-1] if code.endswith(";") else code
-                match = re.search(
-                    r'qor\s*\(\s*["\'](.*?)[\'"]\s*\)', code_without_semicolon
-                )
-                if match:
-                    # Direct execution of print
-                    print(match.group(1))
-                    return
-
-                # Handle print with variable or expression
-                match = re.search(r"qor\s*\(\s*(.*?)\s*\)", code_without_semicolon)
-                if match:
-                    expr = match.group(1)
-
-                    # Handle simple arithmetic with + operator
-                    if "+" in expr and not any(c in expr for c in "\"'"):
-                        try:
-                            # Check if we're dealing with numeric variables
-                            parts = expr.split("+")
-                            total = 0
-                            for part in parts:
-                                part = part.strip()
-                                if part in self.interpreter.variables:
-                                    # Get the variable value
-                                    value = self.interpreter.variables[part]
-                                    if isinstance(value, (int, float)):
-                                        total += value
-                                    else:
-                                        # Not numeric, switch to string concatenation
-                                        raise ValueError("Non-numeric value")
-                                else:
-                                    # Try parsing as a number
-                                    try:
-                                        total += float(part)
-                                    except ValueError:
-                                        # Not a number, switch to string concatenation
-                                        raise ValueError("Not a number")
-
-                            # If we got here, all parts were numeric
-                            print(total)
-                            return
-                        except ValueError:
-                            # Fall back to string concatenation
-                            pass
-
-                    # Handle string concatenation with + operator
-                    if "+" in expr:
-                        parts = expr.split("+")
-                        result = ""
-                        for part in parts:
-                            part = part.strip()
-                            # Check if it's a variable
-                            if part in self.interpreter.variables:
-                                value = self.interpreter.variables[part]
-                                result += str(value)
-                            # Check if it's a string literal
-                            elif (part.startswith('"') and part.endswith('"')) or (
-                                part.startswith("'") and part.endswith("'")
-                            ):
-                                result += part[1:-1]
-                            # Check if it's a function call like qoraal()
-                            elif part.startswith("qoraal(") and part.endswith(")"):
-                                var_name = part[len("qoraal(") : -1].strip()
-                                if var_name in self.interpreter.variables:
-                                    value = str(self.interpreter.variables[var_name])
-                                    result += value
-                            else:
-                                # Try as a raw value
-                                result += part
-
-                        print(result)
-                        return
-
-                    # Handle direct variable access
-                    if expr in self.interpreter.variables:
-                        print(self.interpreter.variables[expr])
-                        return
-
-                    # Try evaluating as a simple numeric expression
-                    try:
-                        # Replace variable names with their values
-                        eval_expr = expr
-                        for var_name, var_value in self.interpreter.variables.items():
-                            if (
-                                isinstance(var_value, (int, float))
-                                and var_name in eval_expr
-                            ):
-                                eval_expr = eval_expr.replace(var_name, str(var_value))
-
-                        # Evaluate the expression if it looks safe
-                        if all(c in "0123456789+-*/() " for c in eval_expr):
-                            result = eval(eval_expr)
-                            print(result)
-                            return
-                    except:
-                        # If evaluation fails, continue with other methods
-                        pass
-
-            # Case 2: Variable declaration with door (dynamic typing)
-            if code.startswith("door "):
-                # Remove semicolon for regex processing if present
-                code_without_semicolon = code[:-1] if code.endswith(";") else code
-                # Match pattern: door name = value
-                match = re.search(r"door\s+(\w+)\s*=\s*(.+)", code_without_semicolon)
-                if match:
-                    var_name = match.group(1)
-                    var_value = match.group(2).strip()
-
-                    # Handle string values
-                    if (var_value.startswith('"') and var_value.endswith('"')) or (
-                        var_value.startswith("'") and var_value.endswith("'")
-                    ):
-                        try:
-                            # Extract the actual string value
-                            string_value = var_value[1:-1]
-                            # Assign it directly to the interpreter's variables
-                            self.interpreter.variables[var_name] = string_value
-                            print(f'\033[32m=> {var_name} = "{string_value}"\033[0m')
-                            return
-                        except Exception as e:
-                            # Create a proper Soplang error for any issues
-                            from src.utils.errors import RuntimeError
-
-                            error = RuntimeError(f"Khalad fulinta: {str(e)}")
-                            print(f"\033[31m{error.message}\033[0m")
-                            return
-
-                    # Handle numeric values
-                    try:
-                        if "." in var_value:
-                            self.interpreter.variables[var_name] = float(var_value)
-                        else:
-                            self.interpreter.variables[var_name] = int(var_value)
-                        print(
-                            f"\033[32m=> {var_name} = {self.interpreter.variables[var_name]}\033[0m"
-                        )
-                        return
-                    except ValueError:
-                        # Check if it's a variable reference
-                        if var_value in self.interpreter.variables:
-                            self.interpreter.variables[var_name] = (
-                                self.interpreter.variables[var_value]
-                            )
-                            print(
-                                f"\033[32m=> {var_name} = {self.interpreter.variables[var_name]}\033[0m"
-                            )
-                            return
-
-                        # Try evaluating as a simple numeric expression
-                        try:
-                            # Replace variable names with their values
-                            eval_expr = var_value
-                            for vname, vvalue in self.interpreter.variables.items():
-                                if (
-                                    isinstance(vvalue, (int, float))
-                                    and vname in eval_expr
-                                ):
-                                    eval_expr = eval_expr.replace(vname, str(vvalue))
-
-                            # Evaluate the expression if it looks safe
-                            if all(c in "0123456789+-*/() " for c in eval_expr):
-                                result = eval(eval_expr)
-                                self.interpreter.variables[var_name] = result
-                                print(f"\033[32m=> {var_name} = {result}\033[0m")
-                                return
-                        except:
-                            # If evaluation fails, continue with other methods
-                            pass
-
-            # Case 3: Static typing (abn, qoraal)
-            if code.startswith("abn ") or code.startswith("qoraal "):
-                # Remove semicolon for regex processing if present
-                code_without_semicolon = code[:-1] if code.endswith(";") else code
-                type_name = code_without_semicolon.split(" ")[0]  # abn or qoraal
-                # Match pattern: type name = value
-                match = re.search(
-                    rf"{type_name}\s+(\w+)\s*=\s*(.+)", code_without_semicolon
-                )
-                if match:
-                    var_name = match.group(1)
-                    var_value = match.group(2).strip()
-
-                    if type_name == "abn":
-                        try:
-                            # Try direct number conversion
-                            self.interpreter.variables[var_name] = int(var_value)
-                            self.interpreter.variable_types[var_name] = "abn"
-                            print(
-                                f"\033[32m=> {var_name} = {self.interpreter.variables[var_name]} (abn)\033[0m"
-                            )
-                            return
-                        except ValueError:
-                            # Try numeric expression
-                            try:
-                                # Replace variable names with their values
-                                eval_expr = var_value
-                                for vname, vvalue in self.interpreter.variables.items():
-                                    if (
-                                        isinstance(vvalue, (int, float))
-                                        and vname in eval_expr
-                                    ):
-                                        eval_expr = eval_expr.replace(
-                                            vname, str(vvalue)
-                                        )
-
-                                # Evaluate the expression if it looks safe
-                                if all(c in "0123456789+-*/() " for c in eval_expr):
-                                    result = int(eval(eval_expr))
-                                    self.interpreter.variables[var_name] = result
-                                    self.interpreter.variable_types[var_name] = "abn"
-                                    print(
-                                        f"\033[32m=> {var_name} = {result} (abn)\033[0m"
-                                    )
-                                    return
-                            except:
-                                pass
-
-                            # Use the exact error format from errors.py
-                            from src.utils.errors import TypeError
-
-                            error = TypeError(
-                                "type_mismatch",
-                                var_name=var_name,
-                                expected_type="abn",
-                                value=var_value,
-                            )
-                            print(f"\033[31m{error.message}\033[0m")
-                            return
-
-                    elif type_name == "qoraal":
-                        if (var_value.startswith('"') and var_value.endswith('"')) or (
-                            var_value.startswith("'") and var_value.endswith("'")
-                        ):
-                            self.interpreter.variables[var_name] = var_value[1:-1]
-                            self.interpreter.variable_types[var_name] = "qoraal"
-                            print(
-                                f'\033[32m=> {var_name} = "{self.interpreter.variables[var_name]}" (qoraal)\033[0m'
-                            )
-                            return
-                        else:
-                            # Use the exact error format from errors.py
-                            from src.utils.errors import TypeError
-
-                            error = TypeError(
-                                "type_mismatch",
-                                var_name=var_name,
-                                expected_type="qoraal",
-                                value=var_value,
-                            )
-                            print(f"\033[31m{error.message}\033[0m")
-                            return
-
-            # Case 4: Direct expression evaluation (calculator mode)
-            if all(c in "0123456789+-*/() " for c in code.rstrip(";")):
-                # Remove semicolon for eval if present
-                code_without_semicolon = code[:-1] if code.endswith(";") else code
-                try:
-                    result = eval(code_without_semicolon)
-                    print(f"\033[32m=> {result}\033[0m")
-                    return
-                except:
-                    pass
-
-            # If we got here, fall back to using the main.py to handle the input
-            print("\033[33m// Using main interpreter...\033[0m")
-
-            # Create a temporary file for the code
-            import tempfile
-
-            with tempfile.NamedTemporaryFile(suffix=".so", delete=False) as f:
-                temp_filename = f.name
-                f.write(original_code.encode("utf-8"))
-
-            try:
-                # Run the code with main.py
-                main_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                    "main.py",
-                )
-
-                # Check if main.py exists before trying to run it
-                if not os.path.exists(main_path):
-                    # Use Soplang's ParserError
-                    from src.utils.errors import ParserError
-
-                    # Create a proper Soplang parser error
-                    error = ParserError(
-                        "invalid_syntax", detail="Qoraalka syntax-kiisa waa khalad"
-                    )
-                    print(f"\033[31m{error.message}\033[0m")
-                    return
-
-                # Use subprocess instead of os.system to capture output and errors
-                import subprocess
-
-                try:
-                    # Use a modified Python PATH so main.py can find its imports
-                    env = os.environ.copy()
-                    env["PYTHONPATH"] = os.path.dirname(
-                        os.path.dirname(os.path.abspath(__file__))
-                    )
-
-                    # Run the command and capture output
-                    process = subprocess.run(
-                        ["python", main_path, temp_filename],
-                        env=env,
-                        capture_output=True,
-                        text=True,
-                        check=False,
-                    )
+            # Every input goes through the real lexer, parser and interpreter,
+            # in this process, so definitions stay in scope for later lines
+            ast = self.parse_input(code)
+            statement = ast.children[0] if len(ast.children) == 1 else None
+
+            # A lone expression is evaluated and its value echoed
+            if statement is not None and statement.type in ECHOED_EXPRESSIONS:
+                result = self.interpreter.evaluate(statement)
+                print(f"\033[32m=> {result}\033[0m")
+                return
 
-                    # Print stdout if available
-                    if process.stdout:
-                        print(process.stdout)
-
-                    # Handle error gracefully using Soplang's error system
-                    if process.returncode != 0:
-                        from src.utils.errors import (
-                            ParserError,
-                            RuntimeError,
-                            SoplangError,
-                            TypeError,
-                        )
-
-                        stderr = process.stderr
-                        # Try to extract the actual Soplang error message if it exists
-                        if "Khalad" in stderr:
-                            # Find the error message which starts with "Khalad"
-                            for line in stderr.split("\n"):
-                                if line.strip().startswith("Khalad") or "❌" in line:
-                                    print(f"\033[31m{line.strip()}\033[0m")
-                                    return
-
-                        # If we couldn't find a Soplang error, create an appropriate one using the ErrorMessageManager
-                        if "ModuleNotFoundError" in stderr or "ImportError" in stderr:
-                            from src.utils.errors import (
-                                ErrorMessageManager,
-                                ImportError,
-                            )
-
-                            error_msg = ErrorMessageManager.get_import_error(
-                                "import_error",
-                                filename=temp_filename,
-                                error="Module not found",
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-                        elif "FileNotFoundError" in stderr:
-                            from src.utils.errors import (
-                                ErrorMessageManager,
-                                ImportError,
-                            )
-
-                            error_msg = ErrorMessageManager.get_import_error(
-                                "file_not_found", module=temp_filename
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-                        elif "SyntaxError" in stderr or "unexpected token" in stderr:
-                            from src.utils.errors import (
-                                ErrorMessageManager,
-                                ParserError,
-                            )
-
-                            error_msg = ErrorMessageManager.get_parser_error(
-                                "invalid_syntax",
-                                detail="Khalad syntax ah ama qeexis khalad ah",
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-                        elif "TypeError" in stderr:
-                            from src.utils.errors import ErrorMessageManager, TypeError
-
-                            error_msg = ErrorMessageManager.get_type_error(
-                                "invalid_operand", operator="?", type_name="?"
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-                        elif "NameError" in stderr:
-                            # Try to extract the variable name from the NameError message
-                            from src.utils.errors import (
-                                ErrorMessageManager,
-                                RuntimeError,
-                            )
-
-                            var_match = re.search(
-                                r"name '([^']+)' is not defined", stderr
-                            )
-                            var_name = var_match.group(1) if var_match else "?"
-                            error_msg = ErrorMessageManager.get_runtime_error(
-                                "undefined_variable", name=var_name
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-                        else:
-                            from src.utils.errors import (
-                                ErrorMessageManager,
-                                RuntimeError,
-                            )
-
-                            error_msg = ErrorMessageManager.get_runtime_error(
-                                "Khalad fulinta: Qalad aan la aqoonsan"
-                            )
-                            print(f"\033[31m{error_msg}\033[0m")
-
-                except subprocess.SubprocessError:
-                    from src.utils.errors import ErrorMessageManager, RuntimeError
+            self.interpreter.interpret(ast)
 
-                    error_msg = ErrorMessageManager.get_runtime_error(
-                        "Khalad fulinta: Ma awoodin inaan koodka fuliyo"
-                    )
-                    print(f"\033[31m{error_msg}\033[0m")
-
-            finally:
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_filename)
-                except:
-                    pass
+            # Echo the variable a lone declaration bound
+            if statement is not None:
+                if statement.type == NodeType.VARIABLE_DECLARATION:
+                    self.echo_variable(statement.value, statement.var_type)
 
         except Exception as e:
             # Convert Python exception to Soplang error using ErrorMessageManager
-            from src.utils.errors import ErrorMessageManager, RuntimeError, SoplangError
-
             # If it's already a SoplangError, use its message
             if isinstance(e, SoplangError):
                 print(f"\033[31m{e.message}\033[0m")
@@ -692,6 +298,35 @@ class SoplangShell:
             print(f"\033[90m// Processing: {code}\033[0m")
         return code
 
+    def parse_input(self, code):
+        """Parse shell input into a PROGRAM node
+
+        Input that is not a statement, such as `x + 2` in calculator mode,
+        is parsed again as a single expression.
+        """
+        # Statements need no semicolon, but the shell has always accepted one
+        if code.endswith(";"):
+            code = code[:-1]
+        code += "\n"
+        try:
+            return Parser(Lexer(code).iter_tokens()).parse()
+        except ParserError as error:
+            parser = Parser(Lexer(code).iter_tokens())
+            try:
+                expression = parser.parse_conditional_expression()
+            except SoplangError:
+                raise error
+            if parser.current_token.type != TokenType.EOF:
+                raise error
+            return ASTNode(NodeType.PROGRAM, children=[expression])
+
+    def echo_variable(self, name, var_type=None):
+        """Print a variable's new value, with its static type if it has one"""
+        value = self.interpreter.variables.get(name)
+        shown = f'"{value}"' if isinstance(value, str) else value
+        suffix = f" ({var_type.value})" if var_type else ""
+        print(f"\033[32m=> {name} = {shown}{suffix}\033[0m")
+
     def process_command(self, command):
         """Process shell commands"""
         cmd_parts = command.split(maxsplit=1)
@@ -760,7 +395,9 @@ class SoplangShell:
         except Exception as e:
             print(f"\033[31mError loading file: {e}\033[0m")
 
-    def run_file(self, filename):
+    def run_file(
+        self, filename, tree_walk=False, vm=False, optimize=False, search_path=None
+    ):
         """Run a Soplang file"""
         if not filename:
             print("\033[31mFilename required. Usage: :run filename\033[0m")
@@ -772,7 +409,13 @@ class SoplangShell:
 
             # Call the function that properly tokenizes, parses, and interprets the file
             # The run_soplang_file function now handles all output formatting
-            run_soplang_file(filename)
+            run_soplang_file(
+                filename,
+                tree_walk=tree_walk,
+                vm=vm,
+                optimize=optimize,
+                search_path=search_path,
+            )
 
         except FileNotFoundError:
             print(f"\033[31mFile not found: {filename}\033[0m")
@@ -885,6 +528,7 @@ class SoplangShell:
 
         for name, value in self.interpreter.variables.items():
             var_type = self.interpreter.variable_types.get(name, "dynamic")
+            var_type = getattr(var_type, "value", var_type)  # abn, not TokenType.abn
             print(f"  {name} = {value} ({var_type})")
 
 
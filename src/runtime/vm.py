@@ -0,0 +1,728 @@
+"""
+Soplang virtual machine.
+
+Runs CodeObjects produced by the BytecodeCompiler with a single dispatch
+loop. Calls between Soplang functions push frames on an explicit frame stack
+instead of recursing in Python, locals live in slot lists, and try/catch is a
+per-frame handler stack that is consulted when an error unwinds.
+
+Programs loaded from a file go through the .sopc cache, so a fresh cache
+skips the lexer and parser completely.
+"""
+
+from src.core.ast import ASTNode, NodeType
+from src.core.lowering import case_index
+from src.runtime import bytecode as bc
+from src.runtime.codegen import BytecodeCompiler
+from src.runtime.compiler import Compiler, loop_range
+from src.runtime.environment import UNBOUND
+from src.runtime.interpreter import Function, Interpreter
+from src.runtime.method_cache import MethodCache
+from src.runtime.operators import SPECULATION_ERRORS, add
+from src.stdlib.builtins import SoplangBuiltins
+from src.utils.errors import RuntimeError, TypeError
+
+
+class Frame:
+    """Execution state of one running CodeObject"""
+
+    __slots__ = (
+        "code",
+        "locals",
+        "stack",
+        "pc",
+        "closure",
+        "handlers",
+        "types",
+        "constants",
+    )
+
+    def __init__(self, code, local_values, closure):
+        self.code = code
+        self.locals = local_values  # Values indexed by slot
+        self.stack = []  # Operand stack
+        self.pc = 0  # Next instruction to run
+        self.closure = closure  # Frame the function was defined in
+        self.handlers = None  # (handler pc, stack depth) for active try blocks
+        self.types = None  # Slot -> declared static type
+        self.constants = None  # Slots declared with madoor
+
+    def __repr__(self):
+        return f"Frame({self.code.name}, pc={self.pc})"
+
+
+def load_program(filename, source, optimize=False, report=None):
+    """Return the CodeObject for source, using the .sopc cache when fresh
+
+    With optimize the AST goes through the optimizer before compiling, and
+    report (if given) is called with the node counts before and after.
+    Source that was not read from a file (filename None) is never cached.
+    """
+    if filename is not None:
+        code = bc.load_cached(filename, source, optimize)
+        if code is not None:
+            return code
+
+    from src.core.lexer import Lexer
+    from src.core.parser import Parser
+
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    if optimize:
+        from src.core.optimizer import optimize as optimize_ast
+
+        counts = optimize_ast(ast)
+        if report is not None:
+            report(*counts)
+    code = BytecodeCompiler().compile_program(ast)
+    if filename is not None:
+        bc.store_cached(filename, source, code, optimize)
+    return code
+
+
+class VirtualMachine(Interpreter):
+    """Bytecode engine; reuses the Interpreter's scopes, registries and helpers"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # CodeObject -> MethodCache per instruction, made by its CALL_METHOD
+        self.code_caches = {}
+
+    def interpret(self, root):
+        if root.type != NodeType.PROGRAM:
+            raise RuntimeError("invalid_syntax", detail="Root node must be PROGRAM")
+        self.run_code(BytecodeCompiler().compile_program(root))
+
+    def run_code(self, code):
+        """Run a module-level CodeObject in the global scope"""
+        return self.run(Frame(code, [], None))
+
+    def run_file(self, filename, source):
+        """Run source loaded from filename, compiling it only on a cache miss"""
+        return self.run_code(load_program(filename, source, self.optimize))
+
+    # -----------------------------
+    #  Calls from Python code
+    # -----------------------------
+    def call_user_function(self, user_func, args):
+        """Run a user-defined function to completion and return its result"""
+        code = user_func.get("bytecode")
+        if code is None:
+            return super().call_user_function(user_func, args)
+        return self.run(self.make_frame(user_func, args))
+
+    def caches_for(self, code):
+        """The inline cache list of code, one entry per instruction"""
+        caches = self.code_caches.get(code)
+        if caches is None:
+            caches = self.code_caches[code] = [None] * len(code.instructions)
+        return caches
+
+    def make_frame(self, user_func, args):
+        code = user_func["bytecode"]
+        param_count = len(code.params)
+        if len(args) >= param_count:
+            local_values = args[:param_count]
+        else:
+            # Default to None if not enough arguments
+            local_values = list(args) + [None] * (param_count - len(args))
+        local_values += [UNBOUND] * (len(code.varnames) - param_count)
+        return Frame(code, local_values, user_func["closure"])
+
+    # -----------------------------
+    #  Name resolution helpers
+    # -----------------------------
+    def load_outer(self, frame, name, position):
+        """Look up name in the frames enclosing frame, then in the globals"""
+        outer = frame.closure
+        while outer is not None:
+            slot = outer.code.slot_map.get(name)
+            if slot is not None and outer.locals[slot] is not UNBOUND:
+                return outer.locals[slot]
+            outer = outer.closure
+        values = self.globals.values
+        if name in values:
+            return values[name]
+        value = self.function_value(name)
+        if value is not None:
+            return value
+        line, pos = position or (None, None)
+        raise RuntimeError("undefined_variable", name=name, line=line, position=pos)
+
+    def local_value(self, frame, name):
+        """Value of name in frame or the frames enclosing it, or UNBOUND"""
+        while frame is not None:
+            slot = frame.code.slot_map.get(name)
+            if slot is not None and frame.locals[slot] is not UNBOUND:
+                return frame.locals[slot]
+            frame = frame.closure
+        return UNBOUND
+
+    def store_slot(self, frame, slot, value, position):
+        """Assign to a local slot, falling back outwards if it is not bound yet"""
+        if frame.locals[slot] is UNBOUND:
+            name = frame.code.varnames[slot]
+            outer = frame.closure
+            while outer is not None:
+                outer_slot = outer.code.slot_map.get(name)
+                if (
+                    outer_slot is not None and
+                    outer.locals[outer_slot] is not UNBOUND
+                ):
+                    return self.store_slot(outer, outer_slot, value, position)
+                outer = outer.closure
+            line, pos = position or (None, None)
+            return self.assign_variable(name, value, line, pos)
+
+        if frame.constants and slot in frame.constants:
+            line, pos = position or (None, None)
+            raise RuntimeError(
+                "constant_reassignment",
+                name=frame.code.varnames[slot],
+                line=line,
+                position=pos,
+            )
+        if frame.types and slot in frame.types:
+            self.validate_type(
+                frame.code.varnames[slot],
+                value,
+                frame.types[slot],
+                self._position_node(position),
+            )
+        frame.locals[slot] = value
+        return value
+
+    @staticmethod
+    def _position_node(position):
+        line, pos = position or (None, None)
+        return ASTNode(NodeType.ASSIGNMENT, line=line, position=pos)
+
+    # -----------------------------
+    #  Dispatch loop
+    # -----------------------------
+    def run(self, frame):
+        """Run frame (and every frame it calls) until it returns"""
+        frames = [frame]
+        runs = self.call_depth.runs
+        runs.append(frames)
+        try:
+            while True:
+                try:
+                    return self._dispatch(frames)
+                except Exception as error:
+                    if not self._unwind(frames, error):
+                        raise
+        finally:
+            runs.pop()
+
+    @staticmethod
+    def _unwind(frames, error):
+        """Transfer control to the innermost isku_day handler, if there is one"""
+        while True:
+            frame = frames[-1]
+            if frame.handlers:
+                target, depth = frame.handlers.pop()
+                del frame.stack[depth:]
+                frame.stack.append(str(error))
+                frame.pc = target
+                return True
+            if len(frames) == 1:
+                return False
+            frames.pop()
+
+    def _dispatch(self, frames):
+        frame = frames[-1]
+        code = frame.code
+        instructions = code.instructions
+        constants = code.constants
+        names = code.names
+        caches_for = self.caches_for
+        caches = caches_for(code)
+        local_values = frame.locals
+        stack = frame.stack
+        push = stack.append
+        pop = stack.pop
+        pc = frame.pc
+
+        global_values = self.globals.values
+        global_types = self.globals.types
+        global_constants = self.globals.constants
+        functions = self.functions
+        max_depth = self.max_depth
+        # The outermost hawl call is at depth 0; a program frame, which has
+        # no enclosing frame, is not a call. Calls running below this run,
+        # in other engines or in VM runs it was started from, count as well
+        call_depth = self.call_depth
+        outer = call_depth.depth
+        for run_frames in call_depth.runs[:-1]:
+            outer += len(run_frames) - (run_frames[0].closure is None)
+        max_frames = max_depth + (frames[0].closure is None) - outer
+        to_string = SoplangBuiltins.qoraal
+        check_index = Compiler._check_index
+
+        LOAD_FAST = bc.LOAD_FAST
+        LOAD_CONST = bc.LOAD_CONST
+        LOAD_GLOBAL = bc.LOAD_GLOBAL
+        STORE_FAST = bc.STORE_FAST
+        STORE_GLOBAL = bc.STORE_GLOBAL
+        BIND_FAST = bc.BIND_FAST
+        BIND_GLOBAL = bc.BIND_GLOBAL
+        BINARY_ADD = bc.BINARY_ADD
+        BINARY_ADD_NATIVE = bc.BINARY_ADD_NATIVE
+        BINARY_SUBTRACT = bc.BINARY_SUBTRACT
+        BINARY_MULTIPLY = bc.BINARY_MULTIPLY
+        COMPARE_LT = bc.COMPARE_LT
+        COMPARE_LE = bc.COMPARE_LE
+        COMPARE_GT = bc.COMPARE_GT
+        COMPARE_EQ = bc.COMPARE_EQ
+        POP_JUMP_IF_FALSE = bc.POP_JUMP_IF_FALSE
+        JUMP = bc.JUMP
+        FOR_ITER = bc.FOR_ITER
+        CALL_FUNCTION = bc.CALL_FUNCTION
+        TAIL_CALL = bc.TAIL_CALL
+        RETURN_VALUE = bc.RETURN_VALUE
+        RETURN_NONE = bc.RETURN_NONE
+        RARE = bc.DUP_TOP
+
+        while True:
+            op, arg = instructions[pc]
+            pc += 1
+
+            # Hot instructions are split into groups of eight by opcode so no
+            # instruction needs more than a dozen comparisons to be found
+            if op < BINARY_ADD:
+                if op == LOAD_FAST:
+                    value = local_values[arg]
+                    if value is UNBOUND:
+                        value = self.load_outer(
+                            frame, code.varnames[arg], code.positions[pc - 1]
+                        )
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(constants[arg])
+                elif op == LOAD_GLOBAL:
+                    try:
+                        push(global_values[names[arg]])
+                    except KeyError:
+                        value = self.function_value(names[arg])
+                        if value is not None:
+                            push(value)
+                            continue
+                        line, pos = code.positions[pc - 1] or (None, None)
+                        raise RuntimeError(
+                            "undefined_variable",
+                            name=names[arg],
+                            line=line,
+                            position=pos,
+                        )
+                elif op == STORE_FAST:
+                    value = pop()
+                    if (
+                        local_values[arg] is UNBOUND or
+                        frame.constants is not None or
+                        frame.types is not None
+                    ):
+                        self.store_slot(frame, arg, value, code.positions[pc - 1])
+                    else:
+                        local_values[arg] = value
+                elif op == STORE_GLOBAL:
+                    value = pop()
+                    name = names[arg]
+                    if name in global_values and not (
+                        name in global_constants or name in global_types
+                    ):
+                        global_values[name] = value
+                    else:
+                        line, pos = code.positions[pc - 1] or (None, None)
+                        self.assign_variable(name, value, line, pos)
+                elif op == BIND_FAST:
+                    local_values[arg] = pop()
+                elif op == BIND_GLOBAL:
+                    global_values[names[arg]] = pop()
+                else:  # POP_TOP
+                    pop()
+
+            elif op < POP_JUMP_IF_FALSE:
+                b = pop()
+                if op == BINARY_ADD_NATIVE:
+                    try:
+                        stack[-1] = stack[-1] + b
+                    except SPECULATION_ERRORS:
+                        # A string met another type: deoptimize for good
+                        instructions[pc - 1] = (BINARY_ADD, True)
+                        stack[-1] = add(stack[-1], b)
+                elif op == BINARY_ADD:
+                    a = stack[-1]
+                    if isinstance(a, str) or isinstance(b, str):
+                        stack[-1] = to_string(a) + to_string(b)
+                    else:
+                        stack[-1] = a + b
+                    if arg is None:
+                        # Quicken: speculate on the native + from now on
+                        instructions[pc - 1] = (BINARY_ADD_NATIVE, None)
+                elif op == BINARY_SUBTRACT:
+                    stack[-1] = stack[-1] - b
+                elif op == BINARY_MULTIPLY:
+                    stack[-1] = stack[-1] * b
+                elif op == COMPARE_LT:
+                    stack[-1] = stack[-1] < b
+                elif op == COMPARE_LE:
+                    stack[-1] = stack[-1] <= b
+                elif op == COMPARE_GT:
+                    stack[-1] = stack[-1] > b
+                elif op == COMPARE_EQ:
+                    stack[-1] = stack[-1] == b
+                else:  # GET_INDEX
+                    arr = stack[-1]
+                    if not isinstance(arr, list):
+                        line, pos = code.positions[pc - 1] or (None, None)
+                        raise TypeError("index_access", line=line, position=pos)
+                    if type(b) is int and 0 <= b < len(arr):
+                        stack[-1] = arr[b]
+                    else:
+                        line, pos = code.positions[pc - 1] or (None, None)
+                        stack[-1] = arr[check_index(arr, b, line, pos)]
+
+            elif op < RARE:
+                if op == POP_JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == FOR_ITER:
+                    for i in stack[-1]:
+                        push(i)
+                        break
+                    else:
+                        pop()
+                        pc = arg
+                elif op == CALL_FUNCTION or op == TAIL_CALL:
+                    name_index, argc, local = arg
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    func_name = names[name_index]
+                    func = None
+                    if local:
+                        value = self.local_value(frame, func_name)
+                        if callable(value):
+                            if value.__class__ is Function and value.engine is self:
+                                func = value.definition
+                            else:
+                                push(self.call_value(func_name, value, args))
+                                continue
+                    if func is None:
+                        func = functions.get(func_name)
+                    if func is None:
+                        if "." in func_name:
+                            push(self._call_dotted(frame, func_name, args))
+                        else:
+                            push(self._call_variable(frame, func_name, args))
+                        continue
+                    if callable(func):
+                        # Built-in function (Python function)
+                        push(func(*args))
+                        continue
+                    if "bytecode" not in func:
+                        push(super().call_user_function(func, args))
+                        continue
+                    # Switch to the callee without recursing in Python
+                    if op == TAIL_CALL:
+                        # The callee takes the place of this frame
+                        frame = frames[-1] = self.make_frame(func, args)
+                    else:
+                        if len(frames) > max_frames:
+                            raise RuntimeError(
+                                "max_depth_exceeded",
+                                name=func_name,
+                                max_depth=max_depth,
+                            )
+                        frame.pc = pc
+                        frame = self.make_frame(func, args)
+                        frames.append(frame)
+                    code = frame.code
+                    instructions = code.instructions
+                    constants = code.constants
+                    names = code.names
+                    caches = caches_for(code)
+                    local_values = frame.locals
+                    stack = frame.stack
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                elif op == RETURN_VALUE or op == RETURN_NONE:
+                    value = pop() if op == RETURN_VALUE else None
+                    if len(frames) == 1:
+                        frame.pc = pc
+                        return value
+                    frames.pop()
+                    frame = frames[-1]
+                    code = frame.code
+                    instructions = code.instructions
+                    constants = code.constants
+                    names = code.names
+                    caches = caches_for(code)
+                    local_values = frame.locals
+                    stack = frame.stack
+                    push = stack.append
+                    pop = stack.pop
+                    pc = frame.pc
+                    push(value)
+                else:  # CALL_METHOD
+                    name_index, argc = arg
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    cache = caches[pc - 1]
+                    if cache is None:
+                        cache = caches[pc - 1] = MethodCache(self, names[name_index])
+                    obj = stack[-1]
+                    if type(obj) is cache.type:
+                        stack[-1] = cache.method(obj, *args)
+                    else:
+                        stack[-1] = cache.call(obj, args)
+
+            else:
+                self._execute_rare(frame, op, arg, pc)
+                # Rare instructions may jump by updating frame.pc
+                if frame.pc != -1:
+                    pc = frame.pc
+                    frame.pc = -1
+
+    def _execute_rare(self, frame, op, arg, pc):
+        """Run the less frequent instructions outside the hot loop"""
+        code = frame.code
+        stack = frame.stack
+        frame.pc = -1
+
+        if op == bc.DUP_TOP:
+            stack.append(stack[-1])
+        elif op == bc.LOAD_DEREF:
+            depth, slot = arg
+            outer = frame
+            for _ in range(depth):
+                outer = outer.closure
+            value = outer.locals[slot]
+            if value is UNBOUND:
+                value = self.load_outer(
+                    outer, outer.code.varnames[slot], code.positions[pc - 1]
+                )
+            stack.append(value)
+        elif op == bc.STORE_DEREF:
+            depth, slot = arg
+            outer = frame
+            for _ in range(depth):
+                outer = outer.closure
+            self.store_slot(outer, slot, stack.pop(), code.positions[pc - 1])
+        elif op == bc.DECLARE_FAST:
+            slot, var_type, is_constant = arg
+            value = stack.pop()
+            if var_type is not None:
+                self.validate_type(
+                    code.varnames[slot],
+                    value,
+                    var_type,
+                    self._position_node(code.positions[pc - 1]),
+                )
+                if frame.types is None:
+                    frame.types = {}
+                frame.types[slot] = var_type
+            if is_constant:
+                if frame.constants is None:
+                    frame.constants = set()
+                frame.constants.add(slot)
+            frame.locals[slot] = value
+        elif op == bc.DECLARE_GLOBAL:
+            name_index, var_type, is_constant = arg
+            name = code.names[name_index]
+            value = stack.pop()
+            if var_type is not None:
+                self.validate_type(
+                    name, value, var_type, self._position_node(code.positions[pc - 1])
+                )
+            self.globals.define(
+                name, value, var_type=var_type, is_constant=is_constant
+            )
+        elif op == bc.BINARY_DIVIDE:
+            b = stack.pop()
+            if b == 0:
+                raise RuntimeError("division_by_zero")
+            stack[-1] = stack[-1] / b
+        elif op == bc.BINARY_MODULO:
+            b = stack.pop()
+            if b == 0:
+                raise RuntimeError("modulo_by_zero")
+            stack[-1] = stack[-1] % b
+        elif op == bc.COMPARE_NE:
+            b = stack.pop()
+            stack[-1] = stack[-1] != b
+        elif op == bc.COMPARE_GT:
+            b = stack.pop()
+            stack[-1] = stack[-1] > b
+        elif op == bc.COMPARE_GE:
+            b = stack.pop()
+            stack[-1] = stack[-1] >= b
+        elif op == bc.JUMP_IF_FALSE_OR_POP:
+            if stack[-1]:
+                stack.pop()
+            else:
+                stack[-1] = False
+                frame.pc = arg
+        elif op == bc.JUMP_IF_TRUE_OR_POP:
+            if stack[-1]:
+                stack[-1] = True
+                frame.pc = arg
+            else:
+                stack.pop()
+        elif op == bc.TO_BOOL:
+            stack[-1] = bool(stack[-1])
+        elif op == bc.UNARY_NOT:
+            stack[-1] = not bool(stack[-1])
+        elif op == bc.POP_JUMP_IF_TRUE:
+            if stack.pop():
+                frame.pc = arg
+        elif op == bc.BUILD_LIST:
+            if arg:
+                elements = stack[-arg:]
+                del stack[-arg:]
+            else:
+                elements = []
+            stack.append(elements)
+        elif op == bc.BUILD_OBJECT:
+            keys = code.constants[arg]
+            if keys:
+                values = stack[-len(keys):]
+                del stack[-len(keys):]
+            else:
+                values = []
+            stack.append(dict(zip(keys, values)))
+        elif op == bc.GET_PROPERTY:
+            prop_name = code.names[arg]
+            obj = stack[-1]
+            line, pos = code.positions[pc - 1] or (None, None)
+            if not isinstance(obj, dict):
+                raise TypeError(
+                    "property_access", prop=prop_name, line=line, position=pos
+                )
+            if prop_name not in obj:
+                raise RuntimeError(
+                    "property_not_found", prop_name=prop_name, line=line, position=pos
+                )
+            stack[-1] = obj[prop_name]
+        elif op == bc.SET_PROPERTY:
+            prop_name = code.names[arg]
+            obj = stack.pop()
+            value = stack.pop()
+            if not isinstance(obj, dict):
+                line, pos = code.positions[pc - 1] or (None, None)
+                raise TypeError(
+                    "property_access", prop=prop_name, line=line, position=pos
+                )
+            obj[prop_name] = value
+        elif op == bc.SET_INDEX:
+            idx = stack.pop()
+            arr = stack.pop()
+            value = stack.pop()
+            line, pos = code.positions[pc - 1] or (None, None)
+            if not isinstance(arr, list):
+                raise TypeError("index_access", line=line, position=pos)
+            arr[Compiler._check_index(arr, idx, line, pos)] = value
+        elif op == bc.FUNCTION_REF:
+            name_index, target = arg
+            func_name = code.names[name_index]
+            if func_name in self.functions:
+                stack.append(func_name)
+                frame.pc = target
+        elif op == bc.MAKE_FUNCTION:
+            function_code = code.functions[arg]
+            self.functions[function_code.name] = {
+                "params": function_code.params,
+                "body": [],
+                "bytecode": function_code,
+                "closure": frame,
+            }
+        elif op == bc.MAKE_CLASS:
+            class_name, parent_name, methods, fields = code.constants[arg]
+            if fields:
+                values = stack[-len(fields):]
+                del stack[-len(fields):]
+            else:
+                values = []
+            class_def = {
+                "name": class_name,
+                "parent": parent_name,
+                "methods": {name: code.functions[index] for name, index in methods},
+                "fields": dict(zip(fields, values)),
+            }
+            self.classes[class_name] = class_def
+            stack.append(class_def)
+        elif op == bc.CHECK_CLASS_PARENT:
+            parent_name = code.constants[arg]
+            if parent_name not in self.classes:
+                raise RuntimeError("parent_class_not_found", parent_name=parent_name)
+        elif op == bc.IMPORT:
+            self.import_file(code.constants[arg])
+        elif op == bc.FOR_PREP:
+            step_value = stack.pop()
+            end_value = stack.pop()
+            start_value = stack.pop()
+            stack.append(iter(loop_range(start_value, end_value, step_value)))
+        elif op == bc.SETUP_TRY:
+            if frame.handlers is None:
+                frame.handlers = []
+            frame.handlers.append((arg, len(stack)))
+        elif op == bc.POP_TRY:
+            frame.handlers.pop()
+        elif op == bc.RAISE_ERROR:
+            error_code, kwargs = code.constants[arg]
+            line, pos = code.positions[pc - 1] or (None, None)
+            raise RuntimeError(error_code, line=line, position=pos, **dict(kwargs))
+        elif op == bc.SWITCH_JUMP:
+            # Leaving frame.pc at -1 falls through to the next case
+            frame.pc = case_index(code.constants[arg], stack[-1], -1)
+        else:
+            raise RuntimeError("unknown_node_type", node_type=bc.OPNAMES.get(op, op))
+
+    def _call_variable(self, frame, func_name, args):
+        """Call a variable holding a hawl, as in f(x) after door f = labanlaab"""
+        slot = frame.code.slot_map.get(func_name)
+        if slot is not None and frame.locals[slot] is not UNBOUND:
+            value = frame.locals[slot]
+        else:
+            try:
+                value = self.load_outer(frame, func_name, None)
+            except RuntimeError:
+                raise RuntimeError("undefined_function", name=func_name)
+        return self.call_value(func_name, value, args)
+
+    def _call_dotted(self, frame, func_name, args):
+        """Call obj.method written as a plain function name"""
+        obj_name, method_name = func_name.split(".", 1)
+        slot = frame.code.slot_map.get(obj_name)
+        if slot is not None and frame.locals[slot] is not UNBOUND:
+            obj = frame.locals[slot]
+        else:
+            try:
+                obj = self.load_outer(frame, obj_name, None)
+            except RuntimeError:
+                obj = None
+
+        if obj is None:
+            raise RuntimeError("undefined_variable", name=obj_name)
+
+        if isinstance(obj, list) and method_name in self.list_methods:
+            return self.list_methods[method_name](obj, *args)
+        elif isinstance(obj, dict) and method_name in self.object_methods:
+            return self.object_methods[method_name](obj, *args)
+        elif isinstance(obj, str) and method_name in self.string_methods:
+            return self.string_methods[method_name](obj, *args)
+        elif isinstance(obj, dict) and callable(obj.get(method_name)):
+            return obj[method_name](*args)
+        raise RuntimeError(
+            "method_not_found",
+            method_name=method_name,
+            type_name=SoplangBuiltins.nooc(obj),
+        )
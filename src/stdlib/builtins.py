@@ -1,5 +1,8 @@
 from src.utils.errors import TypeError, ValueError
+import builtins
+import heapq
 import math
+import operator
 import random
 
 
@@ -43,6 +46,8 @@ class SoplangBuiltins:
             return "walax"
         elif value is None:
             return "maran"
+        elif callable(value):
+            return "hawl"
         else:
             return "aan la aqoon"
 
@@ -128,13 +133,67 @@ class SoplangBuiltins:
     @staticmethod
     def list_push(lst, item):
         """
-        Add an item to the end of a list
+        Add an item to the end of a list (in-place, amortized constant time)
+        The item is added as one element even if it is itself a list
         """
         if not isinstance(lst, list):
             raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
         lst.append(item)
         return lst
 
+    @staticmethod
+    def list_extend(lst, items):
+        """
+        Add every item of another list to the end of a list (in-place)
+        """
+        if not isinstance(lst, list):
+            raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
+        if not isinstance(items, list):
+            raise TypeError(
+                "Qiimaha labaad ma ahan teed (Second argument is not a list)"
+            )
+        lst.extend(items)
+        return lst
+
+    @staticmethod
+    def _list_position(lst, index, size):
+        """
+        Check an index for list_insert / list_remove_at and return it as a
+        non-negative int; negative indices count from the end of the list
+        """
+        if not isinstance(index, (int, float)) or isinstance(index, bool):
+            raise TypeError("Index waa inuu noqdaa abn (Index must be a number)")
+        position = int(index)
+        if position < 0:
+            position += len(lst)
+        if position < 0 or position >= size:
+            raise ValueError(
+                f"Index {index} waa ka baxsan xadka teedka (Index out of range)"
+            )
+        return position
+
+    @staticmethod
+    def list_insert(lst, index, item):
+        """
+        Insert an item before the given index (in-place)
+        An index equal to the list's length adds the item at the end
+        """
+        if not isinstance(lst, list):
+            raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
+        index = SoplangBuiltins._list_position(lst, index, len(lst) + 1)
+        lst.insert(index, item)
+        return lst
+
+    @staticmethod
+    def list_remove_at(lst, index):
+        """
+        Remove the item at the given index and return it (in-place)
+        """
+        if not isinstance(lst, list):
+            raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
+        index = SoplangBuiltins._list_position(lst, index, len(lst))
+        return lst.pop(index)
+
     @staticmethod
     def list_pop(lst):
         """
@@ -160,8 +219,12 @@ class SoplangBuiltins:
     @staticmethod
     def list_concat(lst1, lst2):
         """
-        Concatenate two lists and return a new list
-        Or add a single item to a list if the second parameter is not a list
+        kudar has two behaviors, chosen by the type of its argument:
+        - teed: return a NEW list holding both lists' items; neither list
+          is changed. This copies lst1, so it is linear in its length
+        - anything else: append the item to lst1 IN PLACE and return lst1,
+          as list_push does
+        To grow a list in place use raaci (append) or ballaari (extend)
         """
         if not isinstance(lst1, list):
             raise TypeError("Qiimaha koowaad ma ahan teed (First value is not a list)")
@@ -381,17 +444,77 @@ class SoplangBuiltins:
         return lst
 
     @staticmethod
-    def list_sort(lst):
+    def _sort_key(key):
         """
-        Sort a list in-place (ascending order)
+        Turn the key argument of habee / ugu_horreeya into a Python key
+        function: a field name sorts a teed of walax by that field, and a
+        hawl or built-in is called on each item
+        """
+        if key is None or callable(key):
+            return key
+        if isinstance(key, str):
+            return operator.itemgetter(key)
+        raise TypeError(
+            "Furaha habee waa inuu noqdaa qoraal ama hawl "
+            "(Sort key must be a field name or a function)"
+        )
+
+    @staticmethod
+    def _ordered(sort, *args, **kwargs):
+        """Run a Python sort, reporting its errors as Soplang errors"""
+        try:
+            return sort(*args, **kwargs)
+        except KeyError as err:
+            raise ValueError(
+                f"Astaanta {err} kuma jirto walax teedka ku jira "
+                f"(Field {err} is missing from a list item)"
+            ) from err
+        except builtins.TypeError as err:
+            raise TypeError(
+                f"Teedka lama habeyn karo (List items cannot be compared): {err}"
+            ) from err
+
+    @staticmethod
+    def list_sort(lst, key=None, descending=False):
+        """
+        Sort a list in-place and return it (ascending order by default)
+
+        Args:
+            lst: The list to sort
+            key: Optional field name, to sort a teed of walax by that field,
+                or a hawl / built-in called once per item to get its sort key
+            descending: Sort largest first when true
+
+        Items whose keys are equal keep their original order.
         """
         if not isinstance(lst, list):
             raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
 
-        # Sort the list in-place (ascending order)
-        lst.sort()
+        SoplangBuiltins._ordered(
+            lst.sort,
+            key=SoplangBuiltins._sort_key(key),
+            reverse=bool(descending),
+        )
         return lst
 
+    @staticmethod
+    def list_top(lst, count, key=None, descending=False):
+        """
+        Return a new list of the first count items the list would have after
+        habee(key, descending), without sorting the whole list. The list
+        itself is not changed.
+        """
+        if not isinstance(lst, list):
+            raise TypeError("Qiimahu ma ahan teed (Value is not a list)")
+        if not isinstance(count, (int, float)) or isinstance(count, bool):
+            raise TypeError("Tirada waa inay noqotaa abn (Count must be a number)")
+
+        # nsmallest / nlargest return the same items as a stable sort would
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return SoplangBuiltins._ordered(
+            select, max(int(count), 0), lst, key=SoplangBuiltins._sort_key(key)
+        )
+
     @staticmethod
     def list_filter(lst, condition_func):
         """
@@ -957,11 +1080,16 @@ def get_list_methods():
         "kasaar": SoplangBuiltins.list_pop,
         "dherer": SoplangBuiltins.list_length,
         "kudar": SoplangBuiltins.list_concat,
+        "raaci": SoplangBuiltins.list_push,
+        "ballaari": SoplangBuiltins.list_extend,
+        "geli": SoplangBuiltins.list_insert,
+        "tir": SoplangBuiltins.list_remove_at,
         "leeyahay": SoplangBuiltins.list_contains,
         "nuqul": SoplangBuiltins.list_copy,
         "nadiifi": SoplangBuiltins.list_clear,
         "rog": SoplangBuiltins.list_reverse,
         "habee": SoplangBuiltins.list_sort,
+        "ugu_horreeya": SoplangBuiltins.list_top,
         "shaandhee": SoplangBuiltins.list_filter,
         "jar": SoplangBuiltins.list_jar,
         "aaddin": SoplangBuiltins.list_map,
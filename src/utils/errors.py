@@ -45,6 +45,7 @@ class ErrorMessageManager:
         "property_access": "Ma heli karo astaanta '{prop}' ee qiimaha aan ahayn walax",
         "index_access": "Ma heli karo tirooyinka ee qiimaha aan ahayn teed",
         "invalid_method": "Ma wici karo habka '{method}' ee qiimaha {type_name}",
+        "not_callable": "'{name}' waa {type_name}, ma ahan hawl la wici karo",
     }
 
     # Runtime errors
@@ -64,6 +65,7 @@ class ErrorMessageManager:
         "invalid_for_loop": "kuceli billowga, dhamaadka iyo tallaabada waa in ay yihiin abn",
         "unknown_node_type": "Nooca cladka aan la aqoon: {node_type}",
         "unknown_operator": "Hawl-gal aan la aqoon: {operator}",
+        "max_depth_exceeded": "Hawsha '{name}' waxay dhaaftay xadka wicitaannada is-dhex-jira: {max_depth}",
         "constant_reassignment": "Ma bedeli kartid qiimaha doorsamaha madoor '{name}'. Doorsooyin madoor ah ma dib loo qiimeyn karo.",
     }
 
@@ -71,6 +73,7 @@ class ErrorMessageManager:
     IMPORT_ERRORS = {
         "file_not_found": "Faylka '{module}' ma helin",
         "import_error": "Qalad baa ka jira file-ka {filename}: {error}",
+        "circular_import": "Faylka '{module}' wuxuu is-keenayaa: soo dejin wareeg ah",
     }
 
     @classmethod
@@ -10,6 +10,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 from tests.test_lexer import TestLexer
 from tests.test_parser import TestParser
 from tests.test_interpreter import TestInterpreter
+from tests.test_compiler import TestCompiler
+from tests.test_vm import TestVirtualMachine
+from tests.test_resolver import TestResolver
+from tests.test_optimizer import TestOptimizer
+from tests.test_lowering import TestLowering
+from tests.test_operators import TestOperators
+from tests.test_modules import TestModules
+from tests.test_main import TestMain
+from tests.test_shell import TestShell
+from tests.test_profiler import TestProfiler
 
 if __name__ == "__main__":
     # Create test loader
@@ -22,6 +32,16 @@ if __name__ == "__main__":
     test_suite.addTests(loader.loadTestsFromTestCase(TestLexer))
     test_suite.addTests(loader.loadTestsFromTestCase(TestParser))
     test_suite.addTests(loader.loadTestsFromTestCase(TestInterpreter))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestCompiler))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestVirtualMachine))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestResolver))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestOptimizer))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestLowering))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestOperators))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestModules))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestMain))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestShell))
+    test_suite.addTests(loader.loadTestsFromTestCase(TestProfiler))
     
     # Run tests with verbose output
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,294 @@
+import contextlib
+import io
+import os
+import random
+import unittest
+
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+from src.runtime.compiler import loop_range
+from src.runtime.interpreter import Interpreter
+from src.runtime.main import run_soplang_file
+from src.utils.errors import RuntimeError, TypeError
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+
+
+def run_file(path, tree_walk):
+    """Run an example file and return everything it printed."""
+    random.seed(0)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_soplang_file(path, tree_walk=tree_walk)
+    return output.getvalue()
+
+
+def run_source(source, tree_walk):
+    """Run a source snippet and return everything it printed."""
+    interpreter = Interpreter(tree_walk=tree_walk)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(Parser(Lexer(source).tokenize()).parse())
+    return output.getvalue()
+
+
+class TestCompiler(unittest.TestCase):
+    def test_examples_match_tree_walker(self):
+        """Test that compiled closures and the tree walker print the same output."""
+        for filename in sorted(os.listdir(EXAMPLES_DIR)):
+            if not filename.endswith(".sop"):
+                continue
+            path = os.path.join(EXAMPLES_DIR, filename)
+            with open(path) as f:
+                if "gelin(" in f.read():
+                    continue  # Needs interactive input
+            with self.subTest(example=filename):
+                self.assertEqual(run_file(path, False), run_file(path, True))
+
+    def test_implicit_return_value(self):
+        """Test that a function without celi returns its last statement's value."""
+        source = '''
+        hawl salaan(magac) {
+            qor("Salaan " + magac)
+        }
+        door natiijo = salaan("Ayaan")
+        qor(natiijo)
+        '''
+        self.assertEqual(run_source(source, False), "Salaan Ayaan\nSalaan Ayaan\n")
+        self.assertEqual(run_source(source, False), run_source(source, True))
+
+    def test_loop_control_flow(self):
+        """Test jooji and soco inside compiled loops."""
+        source = '''
+        door wadar = 0
+        kuceli (i 1 ilaa 20) {
+            haddii (i % 2 == 0) {
+                soco
+            }
+            haddii (i > 11) {
+                jooji
+            }
+            wadar = wadar + i
+        }
+        qor(wadar)
+        '''
+        self.assertEqual(run_source(source, False), "36\n")
+        self.assertEqual(run_source(source, False), run_source(source, True))
+
+    def test_control_flow_is_not_caught(self):
+        """Test that isku_day does not catch jooji, soco or celi."""
+        source = '''
+        hawl raadi() {
+            kuceli (i 1 ilaa 10) {
+                isku_day {
+                    haddii (i == 3) {
+                        celi i
+                    }
+                } qabo (khalad) {
+                    qor("qabtay")
+                }
+            }
+            celi -1
+        }
+        qor(raadi())
+        door n = 0
+        intay (n < 10) {
+            n = n + 1
+            isku_day {
+                haddii (n % 2 == 0) {
+                    soco
+                }
+                haddii (n > 5) {
+                    jooji
+                }
+            } qabo (khalad) {
+                qor("qabtay")
+            }
+            qor(n)
+        }
+        '''
+        self.assertEqual(run_source(source, False), "3\n1\n3\n5\n")
+        self.assertEqual(run_source(source, False), run_source(source, True))
+
+    def test_break_outside_loop_in_function(self):
+        """Test that jooji does not escape from a function into the caller's loop."""
+        source = '''
+        hawl jooji_hawl() {
+            jooji
+        }
+        kuceli (i 1 ilaa 3) {
+            jooji_hawl()
+        }
+        '''
+        for tree_walk in (False, True):
+            with self.assertRaises(RuntimeError):
+                run_source(source, tree_walk)
+
+    def test_loop_range(self):
+        """Test the values loop_range gives a kuceli counter."""
+        self.assertEqual(loop_range(1, 4, 1), range(1, 5))
+        self.assertEqual(list(loop_range(5, 1, -2)), [5, 3, 1])
+        self.assertEqual(list(loop_range(5, 1, 1)), [])
+        self.assertEqual(list(loop_range(1, 5, -1)), [])
+
+        # Float steps are added up one at a time, rounding and all
+        expected = []
+        x = 0
+        while x <= 1:
+            expected.append(x)
+            x += 0.1
+        self.assertEqual(list(loop_range(0, 1, 0.1)), expected)
+        self.assertEqual(len(expected), 11)
+
+        for bounds in (("a", 3, 1), (1, None, 1), (1, 3, "1")):
+            with self.assertRaises(TypeError):
+                loop_range(*bounds)
+
+    def test_short_circuit_operators(self):
+        """Test that && and || never evaluate the right operand needlessly."""
+        source = '''
+        hawl muuji(qiime) {
+            qor("muuji " + qiime)
+            celi qiime
+        }
+        door liis = null
+        qor(liis != null && liis[0] > 0)
+        qor(liis == null || liis[0] > 0)
+        qor(muuji(been) && muuji(run))
+        qor(muuji(run) || muuji(been))
+        qor(muuji(run) && muuji(0))
+        '''
+        expected = "False\nTrue\nmuuji been\nFalse\nmuuji run\nTrue\n"
+        expected += "muuji run\nmuuji 0\nFalse\n"
+        self.assertEqual(run_source(source, False), expected)
+        self.assertEqual(run_source(source, True), expected)
+
+    def test_conditional_expression(self):
+        """Test that only the chosen branch of a conditional expression runs."""
+        source = '''
+        hawl muuji(qiime) {
+            qor("muuji " + qiime)
+            celi qiime
+        }
+        door a = 7
+        qor(a > 5 ? muuji("weyn") : muuji("yar"))
+        qor(a < 5 ? "yar" : a == 7 ? "toddoba" : "kale")
+        '''
+        expected = "muuji weyn\nweyn\ntoddoba\n"
+        self.assertEqual(run_source(source, False), expected)
+        self.assertEqual(run_source(source, True), expected)
+
+    def test_read_before_local_declaration(self):
+        """Test that a hawl reads the global until its own door of that name runs."""
+        source = '''
+        door x = 1
+        hawl f(c) {
+            qor(x)
+            haddii (c == 1) {
+                door x = 5
+            }
+            celi x
+        }
+        qor(f(0))
+        qor(f(1))
+        '''
+        expected = "1\n1\n1\n5\n"
+        self.assertEqual(run_source(source, False), expected)
+        self.assertEqual(run_source(source, True), expected)
+
+    def test_assign_before_local_declaration(self):
+        """Test that assigning before a later local door updates the global."""
+        source = '''
+        door total = 0
+        hawl kordhi(n) {
+            total = total + n
+            haddii (n > 100) {
+                door total = 1
+            }
+        }
+        kordhi(3)
+        kordhi(4)
+        qor(total)
+        '''
+        self.assertEqual(run_source(source, False), "7\n")
+        self.assertEqual(run_source(source, True), "7\n")
+
+    def test_function_body_compiled_once(self):
+        """Test that function definitions carry their compiled body."""
+        interpreter = Interpreter()
+        source = "hawl f(x) {\n celi x + 1\n}\n"
+        interpreter.interpret(Parser(Lexer(source).tokenize()).parse())
+        self.assertTrue(callable(interpreter.functions["f"]["code"]))
+
+    def test_functions_as_values(self):
+        """Test that hawl can be assigned, stored, passed and called as values."""
+        source = '''
+        hawl labanlaab(n) {
+            celi n * 2
+        }
+        hawl codsi(f, x) {
+            celi f(x)
+        }
+        door f = labanlaab
+        door xog = {laban: labanlaab}
+        qor(f(4))
+        qor(codsi(labanlaab, 5))
+        qor(xog.laban(7))
+        qor([1, 2, 3].aaddin(f))
+        qor(nooc(f))
+        isku_day {
+            door y = 3
+            y(1)
+        } qabo (khalad) {
+            qor(khalad)
+        }
+        '''
+        expected = (
+            "8\n10\n14\n[2, 4, 6]\nhawl\n"
+            "Khalad type: 'y' waa abn, ma ahan hawl la wici karo\n"
+        )
+        self.assertEqual(run_source(source, False), expected)
+        self.assertEqual(run_source(source, True), expected)
+
+    def test_parameter_shadows_global_hawl(self):
+        """Test that a hawl parameter shadows a global hawl of the same name."""
+        source = '''
+        hawl f(x) {
+            celi x + 100
+        }
+        hawl g(x) {
+            celi x + 1
+        }
+        hawl codsi(f, x) {
+            celi f(x)
+        }
+        hawl laba_jeer(f, x) {
+            door y = f(x)
+            celi f(y)
+        }
+        qor(codsi(g, 1))
+        qor(laba_jeer(g, 1))
+        qor(f(1))
+        '''
+        expected = "2\n3\n101\n"
+        self.assertEqual(run_source(source, False), expected)
+        self.assertEqual(run_source(source, True), expected)
+
+    def test_non_callable_parameter_keeps_builtin(self):
+        """Test that a parameter that is not a hawl does not hide a built-in."""
+        source = '''
+        hawl f(dherer) {
+            qor(dherer("abc"))
+        }
+        hawl g(dherer) {
+            celi dherer("abcd")
+        }
+        f(5)
+        qor(g(5))
+        '''
+        self.assertEqual(run_source(source, False), "3\n4\n")
+        self.assertEqual(run_source(source, True), "3\n4\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -139,6 +139,101 @@ class TestInterpreter(unittest.TestCase):
         self.assertEqual(output, expected)
         self.assertEqual(len(self.interpreter.variables['numbers']), 4)
 
+    def test_list_mutation_methods(self):
+        """Test in-place raaci/ballaari/geli/tir and the copying kudar(teed)."""
+        source = '''
+        door a = [1, 2]
+        door b = a
+        a.raaci([3])
+        a.ballaari([4, 5])
+        a.geli(0, 0)
+        a.geli(-1, 9)
+        qor(a.tir(-1))
+        qor(a.tir(1))
+        door c = a.kudar([6])
+        qor(b)
+        qor(c)
+        '''
+        output = self._execute_code(source)
+        self.assertEqual(output, "5\n1\n[0, 2, [3], 4, 9]\n[0, 2, [3], 4, 9, 6]")
+        self.assertIs(self.interpreter.variables['a'], self.interpreter.variables['b'])
+
+    def test_list_sort_keys(self):
+        """Test habee by field and by hawl, descending, stability and ugu_horreeya."""
+        source = '''
+        door dad = [
+            {m: "a", da: 30}, {m: "b", da: 25}, {m: "c", da: 30}, {m: "d", da: 19}
+        ]
+        hawl magac(q) {
+            celi q.m
+        }
+        hawl da_kale(q) {
+            celi 0 - q.da
+        }
+        qor(dad.ugu_horreeya(2, "da", run).aaddin(magac))
+        dad.habee("da")
+        qor(dad.aaddin(magac))
+        dad.habee("da", run)
+        qor(dad.aaddin(magac))
+        dad.habee(da_kale)
+        qor(dad.aaddin(magac))
+        qor(dad.ugu_horreeya(3, "da").aaddin(magac))
+        '''
+        output = self._execute_code(source)
+        self.assertEqual(
+            output.splitlines(),
+            [
+                "['a', 'c']",
+                "['d', 'b', 'a', 'c']",
+                "['a', 'c', 'b', 'd']",
+                "['a', 'c', 'b', 'd']",
+                "['d', 'b', 'a']",
+            ],
+        )
+
+    def test_function_locals_do_not_leak(self):
+        """Test that function locals live in their own scope frame."""
+        source = '''
+        door x = 1
+        hawl f(a) {
+            door x = a * 10
+            celi x
+        }
+        qor(f(4))
+        qor(x)
+        '''
+        output = self._execute_code(source)
+        self.assertEqual(output, "40\n1")
+        self.assertNotIn('a', self.interpreter.variables)
+
+    def test_function_assigns_enclosing_variable(self):
+        """Test that assignment inside a function updates the defining scope."""
+        source = '''
+        door tirade = 0
+        hawl kordhi() {
+            tirade = tirade + 1
+        }
+        kordhi()
+        kordhi()
+        qor(tirade)
+        '''
+        output = self._execute_code(source)
+        self.assertEqual(output, "2")
+
+    def test_recursive_function(self):
+        """Test that recursive calls get independent frames."""
+        source = '''
+        hawl fib(n) {
+            haddii (n < 2) {
+                celi n
+            }
+            celi fib(n - 1) + fib(n - 2)
+        }
+        qor(fib(15))
+        '''
+        output = self._execute_code(source)
+        self.assertEqual(output, "610")
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
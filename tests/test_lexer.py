@@ -1,6 +1,7 @@
 import unittest
 from src.core.lexer import Lexer
 from src.core.tokens import TokenType
+from src.utils.errors import LexerError
 
 
 class TestLexer(unittest.TestCase):
@@ -86,6 +87,32 @@ class TestLexer(unittest.TestCase):
         self.assertEqual(identifier_tokens[0].value, "x")
         self.assertEqual(identifier_tokens[1].value, "y")
 
+    def test_token_positions(self):
+        """Test line and column numbers, including after strings and comments."""
+        source = 'door x = "a\nb"\n/* eeg\n */  qor(x)\n'
+        tokens = Lexer(source).tokenize()
+        positions = [(token.value, token.line, token.position) for token in tokens]
+        self.assertEqual(positions, [
+            ("door", 1, 1), ("x", 1, 6), ("=", 1, 8), ("a\nb", 1, 10),
+            ("qor", 4, 6), ("(", 4, 9), ("x", 4, 10), (")", 4, 11), (None, 5, 1),
+        ])
+
+    def test_numbers_and_unicode_identifiers(self):
+        """Test int/float values and identifiers that start outside ASCII."""
+        tokens = Lexer('qiimé = 3.5 + 12 >= xé_2\n').tokenize()
+        self.assertEqual(
+            [token.value for token in tokens],
+            ["qiimé", "=", 3.5, "+", 12, ">=", "xé_2", None],
+        )
+        self.assertIsInstance(tokens[4].value, int)
+
+    def test_errors(self):
+        """Test unterminated strings and comments and unexpected characters."""
+        for source in ('qor("furan', "x = 1 /* furan", "x & y", "_x = 1"):
+            with self.subTest(source=source):
+                with self.assertRaises(LexerError):
+                    Lexer(source).tokenize()
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
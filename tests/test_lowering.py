@@ -0,0 +1,121 @@
+import unittest
+
+from src.core.ast import NodeType
+from src.core.lexer import Lexer
+from src.core.lowering import IfParts, LoopParts, ReturnParts, SwitchParts, lower
+from src.core.parser import Parser
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def values(nodes):
+    """Return the value of every node in nodes."""
+    return [node.value for node in nodes]
+
+
+class TestLowering(unittest.TestCase):
+    def test_if_parts(self):
+        """Test that haddii, haddii_kale and ugudambeyn become arms and an else body."""
+        ast = lower(parse('''
+        haddii (x > 1) {
+            qor("a")
+            qor("b")
+        } haddii_kale (x > 0) {
+            qor("c")
+        } ugudambeyn {
+            qor("d")
+        }
+        '''))
+        parts = ast.children[0].parts
+        self.assertIsInstance(parts, IfParts)
+        self.assertEqual([len(body) for _, body in parts.arms], [2, 1])
+        self.assertEqual(values(parts.arms[1][0].children), ["x", 0])
+        self.assertEqual(len(parts.else_body), 1)
+
+    def test_loop_parts(self):
+        """Test that a kuceli step is split from the body and defaults to None."""
+        ast = lower(parse('''
+        kuceli (i 1 ilaa 10 :: 2) {
+            qor(i)
+        }
+        kuceli (j 1 ilaa 3) {
+            qor(j)
+            qor(j)
+        }
+        '''))
+        stepped, plain = (node.parts for node in ast.children)
+        self.assertIsInstance(stepped, LoopParts)
+        self.assertEqual(values([stepped.start, stepped.end, stepped.step]), [1, 10, 2])
+        self.assertEqual(len(stepped.body), 1)
+        self.assertIsNone(plain.step)
+        self.assertEqual(len(plain.body), 2)
+
+    def test_switch_parts(self):
+        """Test that dooro literal cases go in the table and the rest stay ordered."""
+        ast = lower(parse('''
+        dooro (x) {
+            xaalad 1 {
+                qor("kow")
+            }
+            xaalad y {
+                qor("y")
+            }
+            xaalad "laba" {
+                qor("laba")
+            }
+            xaalad 1 {
+                qor("mar kale")
+            }
+            ugudambeyn {
+                door z = 3
+                qor(z)
+            }
+        }
+        '''))
+        parts = ast.children[0].parts
+        self.assertIsInstance(parts, SwitchParts)
+        self.assertEqual(parts.subject.type, NodeType.IDENTIFIER)
+        self.assertEqual(parts.table, {1: 0, "laba": 2})
+        self.assertEqual(parts.ordered, [1])
+        self.assertEqual(len(parts.cases), 4)
+        self.assertEqual(
+            [node.type for node in parts.default_body],
+            [NodeType.VARIABLE_DECLARATION, NodeType.FUNCTION_CALL],
+        )
+
+    def test_return_parts(self):
+        """Test which celi statements are marked as tail calls."""
+        ast = lower(parse('''
+        hawl f(n) {
+            haddii (n == 0) {
+                celi 0
+            }
+            isku_day {
+                celi f(n - 1)
+            } qabo (khalad) {
+                celi g(khalad)
+            }
+            celi liis.dherer()
+            celi 1 + f(n - 1)
+            celi f(n - 1)
+        }
+        '''))
+        returns = []
+        pending = [ast]
+        while pending:
+            node = pending.pop()
+            if node.type == NodeType.RETURN_STATEMENT:
+                returns.append(node.parts)
+            pending.extend(reversed(node.children))
+        self.assertTrue(all(isinstance(parts, ReturnParts) for parts in returns))
+        self.assertEqual(returns[0].value.type, NodeType.LITERAL)
+        self.assertEqual(
+            [parts.tail_call for parts in returns],
+            [False, False, False, False, False, True],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
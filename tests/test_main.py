@@ -0,0 +1,65 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.runtime.main import run_soplang_code
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs main.py with the given arguments, then lists the interactive-only
+# modules that were imported along the way
+SHOW_SHELL_MODULES = '''
+import sys
+sys.argv = ["main.py"] + sys.argv[1:]
+import main
+main.main()
+print([m for m in ("src.runtime.shell", "colorama", "readline") if m in sys.modules])
+'''
+
+
+def run_code(source, **options):
+    """Run a snippet through run_soplang_code and return everything it printed."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_soplang_code(source, **options)
+    return output.getvalue()
+
+
+class TestMain(unittest.TestCase):
+    def run_main(self, *args):
+        with tempfile.TemporaryDirectory() as home:
+            result = subprocess.run(
+                [sys.executable, "-c", SHOW_SHELL_MODULES, *args],
+                cwd=ROOT,
+                env=dict(os.environ, HOME=home),
+                capture_output=True,
+                text=True,
+            )
+            self.assertFalse(os.path.exists(os.path.join(home, ".soplang_history")))
+        return result.stdout
+
+    def test_startup_skips_shell(self):
+        """Test that running a file or -c snippet never loads the shell."""
+        with tempfile.NamedTemporaryFile("w", suffix=".sop", delete=False) as f:
+            f.write('qor("salaan")\n')
+        try:
+            self.assertEqual(self.run_main(f.name), "salaan\n[]\n")
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(self.run_main("-c", 'qor("salaan")'), "salaan\n[]\n")
+
+    def test_code_snippet(self):
+        """Test that -c snippets run through the full pipeline in every engine."""
+        source = 'door x = 2\nqor(x + 3)\nqor("a" + "b")'
+        for options in ({}, {"tree_walk": True}, {"vm": True}):
+            with self.subTest(**options):
+                self.assertEqual(run_code(source, **options), "5\nab\n")
+        self.assertIn("'y'", run_code("qor(y)"))
+
+
+if __name__ == '__main__':
+    unittest.main()
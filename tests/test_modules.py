@@ -0,0 +1,197 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.runtime.interpreter import Interpreter
+from src.runtime.main import run_soplang_file
+from src.runtime.modules import Module, ModuleFunction, ModuleRegistry
+from src.runtime.vm import VirtualMachine
+from src.utils.errors import ImportError
+
+LIBRARY = '''
+qor("xisaab la raray")
+madoor PI = 3.14
+door tirinta = 0
+hawl caawi(n) {
+    celi n * 2
+}
+hawl isku_dar(a, b) {
+    tirinta = tirinta + 1
+    celi caawi(a) + b
+}
+'''
+
+
+def run_file(path, **options):
+    """Run a file through run_soplang_file and return everything it printed."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_soplang_file(path, **options)
+    return output.getvalue()
+
+
+class TestModules(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, source):
+        path = os.path.join(self.temp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_module_namespace(self):
+        """Test that a module's names are reached through the module only."""
+        self.write("xisaab.sop", LIBRARY)
+        path = self.write("barnaamij.sop", '''
+ka_keen "xisaab.sop"
+qor(xisaab.PI)
+qor(xisaab.isku_dar(2, 3))
+door x = xisaab.isku_dar(1, 1)
+qor(xisaab.tirinta)
+isku_day {
+    qor(caawi(1))
+} qabo (khalad) {
+    qor("caawi lama helin")
+}
+''')
+        expected = "xisaab la raray\n3.14\n7\n2\ncaawi lama helin\n"
+        for options in ({}, {"tree_walk": True}, {"vm": True}):
+            with self.subTest(**options):
+                self.assertEqual(run_file(path, **options), expected)
+
+    def test_module_runs_once(self):
+        """Test that importing again, from anywhere, reuses the loaded module."""
+        self.write("lib/xisaab.sop", LIBRARY)
+        self.write("lib/caawiye.sop", '''
+ka_keen "xisaab.sop"
+hawl labanlaab(n) {
+    celi xisaab.isku_dar(n, 0)
+}
+''')
+        path = self.write("app/barnaamij.sop", '''
+ka_keen "caawiye.sop"
+ka_keen "xisaab.sop"
+hawl f() {
+    kuceli (i 1 ilaa 3) {
+        ka_keen "xisaab.sop"
+    }
+    celi caawiye.labanlaab(5)
+}
+qor(f())
+qor(xisaab.tirinta)
+''')
+        lib = os.path.join(self.temp_dir, "lib")
+        output = run_file(path, search_path=[lib])
+        self.assertEqual(output, "xisaab la raray\n10\n1\n")
+
+    def test_changed_file_is_reloaded(self):
+        """Test that the registry reloads a module whose contents changed."""
+        library = self.write("maktabad.sop", "door qiime = 1\n")
+        registry = ModuleRegistry()
+        importer = Interpreter()
+        importer.modules = registry
+        first = registry.load(library, importer)
+        self.assertIsInstance(first, Module)
+        self.assertEqual(first["qiime"], 1)
+
+        # Same contents with a new timestamp: still the cached module
+        os.utime(library, ns=(1, 1))
+        self.assertIs(registry.load(library, importer), first)
+
+        self.write("maktabad.sop", "door qiime = 22\n")
+        second = registry.load(library, importer)
+        self.assertIsNot(second, first)
+        self.assertEqual(second["qiime"], 22)
+
+    def test_exports_follow_assignments(self):
+        """Test that exports change as the module's globals are assigned."""
+        library = self.write("tiriye.sop", '''
+door tirinta = 0
+hawl kordhi() {
+    tirinta = tirinta + 1
+}
+''')
+        for importer in (Interpreter(), Interpreter(tree_walk=True), VirtualMachine()):
+            with self.subTest(engine=type(importer).__name__):
+                module = ModuleRegistry().load(library, importer)
+                self.assertIsInstance(module["kordhi"], ModuleFunction)
+                module["kordhi"]()
+                module["kordhi"]()
+                self.assertEqual(module["tirinta"], 2)
+                module.engine.globals.values["tirinta"] = 7
+                self.assertEqual(module["tirinta"], 7)
+
+    def test_module_calls_share_call_depth(self):
+        """Test that hawl calls into a module count towards max_depth."""
+        self.write("qoto.sop", '''
+hawl tiri(n) {
+    haddii (n == 0) {
+        celi 0
+    }
+    celi 1 + tiri(n - 1)
+}
+''')
+        path = self.write("barnaamij.sop", '''
+ka_keen "qoto.sop"
+hawl wac(k, n) {
+    haddii (k == 0) {
+        celi qoto.tiri(n)
+    }
+    celi wac(k - 1, n) + 0
+}
+qor(qoto.tiri(10))
+qor(wac(3, 6))
+isku_day {
+    qor(wac(3, 7))
+} qabo (khalad) {
+    qor("qoto badan")
+}
+isku_day {
+    qor(qoto.tiri(11))
+} qabo (khalad) {
+    qor("qoto badan")
+}
+''')
+        expected = "10\n6\nqoto badan\nqoto badan\n"
+        for options in ({}, {"tree_walk": True}, {"vm": True}):
+            with self.subTest(**options):
+                self.assertEqual(run_file(path, max_depth=10, **options), expected)
+
+        # Deep recursion in a module called from a hawl that is already deep
+        path = self.write("qoto_dheer.sop", '''
+ka_keen "qoto.sop"
+hawl wac(k, n) {
+    haddii (k == 0) {
+        celi qoto.tiri(n)
+    }
+    celi wac(k - 1, n) + 0
+}
+qor(wac(20, 3000))
+''')
+        for options in ({}, {"tree_walk": True}, {"vm": True}):
+            with self.subTest(**options):
+                self.assertEqual(run_file(path, **options), "3000\n")
+
+    def test_import_errors(self):
+        """Test missing files and modules that import themselves."""
+        registry = ModuleRegistry()
+        importer = Interpreter()
+        with self.assertRaises(ImportError):
+            registry.load(os.path.join(self.temp_dir, "maqan.sop"), importer)
+
+        path = self.write("wareeg.sop", 'ka_keen "wareeg.sop"\n')
+        importer = Interpreter(filename=path)
+        with self.assertRaises(ImportError):
+            importer.import_file("wareeg.sop")
+
+
+if __name__ == '__main__':
+    unittest.main()
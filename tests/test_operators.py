@@ -0,0 +1,100 @@
+import contextlib
+import io
+import unittest
+
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+from src.runtime import bytecode
+from src.runtime.codegen import BytecodeCompiler
+from src.runtime.interpreter import Interpreter
+from src.runtime.operators import DEOPT_LIMIT, OperatorSite, add, divide_numbers
+from src.runtime.vm import VirtualMachine
+
+
+def run_source(source, engine):
+    """Run a source snippet on the given engine and return everything it printed."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        engine.interpret(Parser(Lexer(source).tokenize()).parse())
+    return output.getvalue()
+
+
+class TestOperators(unittest.TestCase):
+    def test_site_quickens_and_deoptimizes(self):
+        """Test that a site specializes to its operands and falls back on a change."""
+        site = OperatorSite("/")
+        self.assertEqual(site.apply(7, 2), 3.5)
+        self.assertEqual(
+            (site.left, site.right, site.function), (int, int, divide_numbers)
+        )
+
+        self.assertEqual(site.apply(True, 2), 0.5)
+        self.assertEqual((site.left, site.right, site.deopts), (bool, int, 1))
+        self.assertIsNot(site.function, divide_numbers)
+
+        site = OperatorSite("+")
+        for a, b in [("a", 1), (1, 2)] * (DEOPT_LIMIT // 2):
+            site.apply(a, b)
+        self.assertEqual(site.apply(1.5, 1), 2.5)
+        self.assertIsNone(site.left)
+        self.assertIs(site.function, add)
+
+        # Operators without specializations never guard
+        self.assertIsNone(OperatorSite("<").left)
+
+    def test_changing_operand_types(self):
+        """Test that one operation gives the same results for every operand type."""
+        source = '''
+        door qiimayaal = [1, 2.5, "s", run, [1], 0]
+        kuceli (i 0 ilaa 5) {
+            door x = qiimayaal[i]
+            isku_day {
+                qor(x + x)
+                qor(x + 1)
+                qor("k" + x)
+                qor(10 / x)
+                qor(7 % x)
+            } qabo (khalad) {
+                qor(khalad)
+            }
+        }
+        qor(5 + 2 * 3 - 8 / 4 >= 9)
+        '''
+        expected = run_source(source, Interpreter(tree_walk=True))
+        self.assertIn("ks\n", expected)
+        self.assertIn("krun\n", expected)
+        for engine in (Interpreter(), VirtualMachine()):
+            self.assertEqual(run_source(source, engine), expected)
+
+    def test_vm_quickens_add_in_place(self):
+        """Test that BINARY_ADD is rewritten to BINARY_ADD_NATIVE and back."""
+        source = '''
+        door tiro = 0
+        door qoraal_ = ""
+        kuceli (i 1 ilaa 3) {
+            tiro = tiro + i
+            qoraal_ = qoraal_ + i
+        }
+        qor(tiro)
+        qor(qoraal_)
+        '''
+        code = BytecodeCompiler().compile_program(
+            Parser(Lexer(source).tokenize()).parse()
+        )
+        adds = [
+            pc
+            for pc, (op, _) in enumerate(code.instructions)
+            if op == bytecode.BINARY_ADD
+        ]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            VirtualMachine().run_code(code)
+        self.assertEqual(output.getvalue(), "6\n123\n")
+        self.assertEqual(
+            [code.instructions[pc] for pc in adds],
+            [(bytecode.BINARY_ADD_NATIVE, None), (bytecode.BINARY_ADD, True)],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
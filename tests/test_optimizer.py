@@ -0,0 +1,134 @@
+import contextlib
+import io
+import unittest
+
+from src.core.ast import NodeType
+from src.core.lexer import Lexer
+from src.core.optimizer import optimize
+from src.core.parser import Parser
+from src.runtime.interpreter import Interpreter
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def run(ast, tree_walk=False):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        Interpreter(tree_walk=tree_walk).interpret(ast)
+    return output.getvalue()
+
+
+def literals(node):
+    """Return the values of every literal under node, in order."""
+    found = [node.value] if node.type == NodeType.LITERAL else []
+    for child in node.children:
+        found.extend(literals(child))
+    return found
+
+
+class TestOptimizer(unittest.TestCase):
+    def assertSameOutput(self, source, expected):
+        """Assert that source prints expected with and without optimizing."""
+        for tree_walk in (False, True):
+            ast = parse(source)
+            optimize(ast)
+            self.assertEqual(run(ast, tree_walk), expected)
+            self.assertEqual(run(parse(source), tree_walk), expected)
+
+    def test_constant_expressions_are_folded(self):
+        """Test folding of arithmetic, unary minus and string concatenation."""
+        ast = parse('qor(2 + 3 * 4)\nqor(-(2 * 3))\nqor("tiro: " + 5)\n')
+        before, after = optimize(ast)
+        self.assertLess(after, before)
+        self.assertEqual(literals(ast), [14, -6, "tiro: 5"])
+        self.assertEqual(run(ast), "14\n-6\ntiro: 5\n")
+
+    def test_madoor_constants_are_inlined(self):
+        """Test that madoor values reach their uses and then fold."""
+        source = '''
+        madoor tiro = 10
+        qor(tiro * 2)
+        hawl f(tiro) {
+            celi tiro + 1
+        }
+        qor(f(1))
+        '''
+        ast = parse(source)
+        optimize(ast)
+        self.assertIn(20, literals(ast))
+        self.assertSameOutput(source, "20\n2\n")
+
+    def test_rebound_names_are_not_inlined(self):
+        """Test that a name bound twice is left for the engines to look up."""
+        source = '''
+        madoor x = 1
+        kuceli (x 1 ilaa 2) {
+            qor(x)
+        }
+        '''
+        self.assertSameOutput(source, "1\n2\n")
+
+    def test_dead_code_after_celi_is_removed(self):
+        """Test that statements after celi, jooji and soco are dropped."""
+        source = '''
+        hawl f() {
+            celi 1
+            qor("marna")
+        }
+        kuceli (i 1 ilaa 3) {
+            qor(i)
+            jooji
+            qor("marna")
+        }
+        qor(f())
+        '''
+        ast = parse(source)
+        optimize(ast)
+        self.assertNotIn("marna", literals(ast))
+        self.assertSameOutput(source, "1\n1\n")
+
+    def test_constant_branches_are_dropped(self):
+        """Test that haddii on a literal keeps only the branch that runs."""
+        source = '''
+        madoor DEBUG = been
+        haddii (DEBUG) {
+            qor("debug")
+        } haddii_kale (1 + 1 == 2) {
+            qor("xisaab")
+        } ugudambeyn {
+            qor("marna")
+        }
+        '''
+        ast = parse(source)
+        optimize(ast)
+        self.assertEqual(
+            [child.type for child in ast.children],
+            [NodeType.VARIABLE_DECLARATION, NodeType.FUNCTION_CALL],
+        )
+        self.assertSameOutput(source, "xisaab\n")
+
+    def test_implicit_return_value_is_kept(self):
+        """Test that removing code never changes a function's last statement."""
+        source = '''
+        hawl f() {
+            qor("hal")
+            haddii (been) {
+                qor("marna")
+            }
+        }
+        qor(f())
+        '''
+        expected = run(parse(source))
+        self.assertSameOutput(source, expected)
+
+    def test_runtime_errors_are_not_folded(self):
+        """Test that division by zero is left to raise at run time."""
+        ast = parse("door x = 1 / 0\n")
+        optimize(ast)
+        self.assertEqual(ast.children[0].children[0].type, NodeType.BINARY_OPERATION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -138,6 +138,48 @@ class TestParser(unittest.TestCase):
         self.assertIn(0.0, number_values)
         self.assertIn(5.0, number_values)
 
+    def test_conditional_expression(self):
+        """Test parsing of right associative conditional expressions."""
+        tokens = Lexer('door x = a > b ? a : b == 0 ? 0 : b\n').tokenize()
+        self.assertIn(TokenType.QUESTION, [token.type for token in tokens])
+
+        node = Parser(tokens).parse().children[0].children[0]
+        self.assertEqual(node.type, NodeType.CONDITIONAL_EXPRESSION)
+        condition, when_true, when_false = node.children
+        self.assertEqual(condition.type, NodeType.BINARY_OPERATION)
+        self.assertEqual(condition.value, '>')
+        self.assertEqual(when_true.type, NodeType.IDENTIFIER)
+        self.assertEqual(when_false.type, NodeType.CONDITIONAL_EXPRESSION)
+
+    def test_token_stream(self):
+        """Test that the parser pulls tokens from a stream as it needs them."""
+        lexer = Lexer('door x = 1\nqor(x)\n')
+        stream = lexer.iter_tokens()
+        parser = Parser(stream)
+        self.assertEqual(parser.current_token.type, TokenType.DOOR)
+        self.assertEqual(parser.peek(2).type, TokenType.EQUAL)
+        self.assertEqual(parser.peek().type, TokenType.IDENTIFIER)
+        # Only the peeked tokens have been read from the stream
+        self.assertEqual(next(stream).value, 1)
+
+        program = Parser(lexer.iter_tokens()).parse()
+        self.assertEqual(
+            [child.type for child in program.children],
+            [NodeType.VARIABLE_DECLARATION, NodeType.FUNCTION_CALL],
+        )
+        self.assertEqual(len(Parser(iter([])).parse().children), 0)
+
+    def test_compact_nodes(self):
+        """Test that nodes and tokens have no __dict__ and leaves share children."""
+        tokens = Lexer('door x = y + 1\n').tokenize()
+        declaration = Parser(tokens).parse().children[0]
+        left, right = declaration.children[0].children
+        self.assertIs(left.children, right.children)
+        self.assertEqual(len(left.children), 0)
+        self.assertFalse(hasattr(declaration, "__dict__"))
+        self.assertFalse(hasattr(tokens[0], "__dict__"))
+        self.assertFalse(hasattr(left, "slot"))
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
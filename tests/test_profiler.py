@@ -0,0 +1,170 @@
+import contextlib
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+from src.runtime.interpreter import Interpreter
+from src.runtime.profiler import PROGRAM, Profiler, SamplingProfiler
+
+SOURCE = '''hawl fib(n) {
+    haddii (n < 2) {
+        celi n
+    }
+    celi fib(n - 1) + fib(n - 2)
+}
+hawl wadar(liis) {
+    door s = 0
+    kuceli (i 0 ilaa 3) {
+        s = s + fib(i)
+    }
+    celi s
+}
+qor(wadar([]))
+'''
+
+
+def profile_source(source, tree_walk):
+    """Run source under a Profiler and return it."""
+    profiler = Profiler()
+    interpreter = Interpreter(tree_walk=tree_walk, filename="p.sop")
+    interpreter.profiler = profiler
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    with contextlib.redirect_stdout(io.StringIO()):
+        profiler.run_program("p.sop", lambda: interpreter.interpret(ast))
+    return profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_calls_and_lines(self):
+        """Test call counts and line hits in the compiler and the tree walker."""
+        for tree_walk in (False, True):
+            with self.subTest(tree_walk=tree_walk):
+                profiler = profile_source(SOURCE, tree_walk)
+                fib = profiler.functions[("p.sop", 1, "fib")]
+                wadar = profiler.functions[("p.sop", 7, "wadar")]
+                self.assertEqual((fib.calls, fib.primitive_calls), (10, 4))
+                self.assertEqual(
+                    fib.callers, {("p.sop", 7, "wadar"): 4, ("p.sop", 1, "fib"): 6}
+                )
+                self.assertEqual(wadar.calls, 1)
+                self.assertGreaterEqual(wadar.inclusive, fib.inclusive)
+                self.assertIn(("p.sop", 0, PROGRAM), profiler.functions)
+                self.assertEqual(profiler.lines[("p.sop", 2)], 10)
+                self.assertEqual(profiler.lines[("p.sop", 3)], 7)
+                self.assertEqual(profiler.lines[("p.sop", 10)], 4)
+                self.assertEqual(profiler.lines[("p.sop", 14)], 1)
+
+        self.assertEqual(
+            profile_source(SOURCE, False).lines, profile_source(SOURCE, True).lines
+        )
+
+    def test_report_and_dumps(self):
+        """Test the text report and the JSON and pstats files."""
+        profiler = profile_source(SOURCE, False)
+        report = profiler.report(sort="calls")
+        self.assertTrue(report.startswith("11 hawl calls"))
+        self.assertLess(report.index("p.sop:1(fib)"), report.index("p.sop:7(wadar)"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            profiler.dump(path)
+            with open(path) as f:
+                data = json.load(f)
+            fib = [entry for entry in data["functions"] if entry["name"] == "fib"]
+            self.assertEqual(fib[0]["calls"], 10)
+            self.assertIn({"file": "p.sop", "line": 10, "hits": 4}, data["lines"])
+
+            path = os.path.join(directory, "profile.prof")
+            profiler.dump(path)
+            stats = pstats.Stats(path)
+            self.assertEqual(stats.stats[("p.sop", 1, "fib")][:2], (4, 10))
+
+    def test_method_cache_counts(self):
+        """Test inline cache hits and misses when a call site changes receiver type."""
+        source = '''door shay = [1, 2]
+kuceli (i 1 ilaa 6) {
+    haddii (i == 4) {
+        shay = "abc"
+    }
+    haddii (i == 6) {
+        shay = {a: 1}
+    }
+    qor(shay.leeyahay("a"))
+}
+'''
+        for tree_walk in (False, True):
+            with self.subTest(tree_walk=tree_walk):
+                profiler = profile_source(source, tree_walk)
+                [(key, cache)] = profiler.caches
+                self.assertEqual(key, ("p.sop", 9))
+                # teed, teed, teed, qoraal, qoraal, walax
+                self.assertEqual((cache.hits, cache.misses), (3, 3))
+                report = profiler.report()
+                self.assertIn("6 method calls, 50.0% inline cache hits", report)
+                self.assertIn("p.sop:9(.leeyahay)", report)
+                self.assertEqual(
+                    profiler.to_json()["method_caches"],
+                    [
+                        {
+                            "file": "p.sop",
+                            "line": 9,
+                            "method": "leeyahay",
+                            "hits": 3,
+                            "misses": 3,
+                        }
+                    ],
+                )
+
+    def test_sampled_stacks(self):
+        """Test that the sampler names frames by hawl and line, in both engines."""
+        source = SOURCE.replace(
+            "qor(wadar([]))", "kuceli (j 1 ilaa 2000) {\n    wadar([])\n}"
+        )
+        for tree_walk in (False, True):
+            with self.subTest(tree_walk=tree_walk):
+                interpreter = Interpreter(tree_walk=tree_walk, filename="p.sop")
+                sampler = SamplingProfiler(interpreter.call_stack, interval=0.0005)
+                interpreter.profiler = sampler
+                ast = Parser(Lexer(source).iter_tokens()).parse()
+                sampler.start()
+                try:
+                    # Long enough for dozens of samples
+                    sampler.run_program("p.sop", lambda: interpreter.interpret(ast))
+                finally:
+                    sampler.stop()
+                self.assertEqual(interpreter.call_stack, [])
+                self.assertGreater(sampler.sample_count(), 0)
+
+                # A hand-made stack: each frame shows the line of its call,
+                # the innermost one where its hawl is defined
+                stack = (
+                    (PROGRAM, "p.sop", 0),
+                    ("wadar", "p.sop", 15),
+                    ("fib", "p.sop", 10),
+                    ("fib", "p.sop", 5),
+                )
+                self.assertEqual(
+                    sampler.frame_names(stack),
+                    [
+                        "<program> (p.sop:15)",
+                        "wadar (p.sop:10)",
+                        "fib (p.sop:5)",
+                        "fib (p.sop:1)",
+                    ],
+                )
+
+                total = 0
+                for line in sampler.folded().splitlines():
+                    frames, count = line.rsplit(" ", 1)
+                    self.assertTrue(frames.startswith("<program> (p.sop:"))
+                    total += int(count)
+                self.assertEqual(total, sampler.sample_count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from src.core.ast import NodeType
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+from src.core.resolver import resolve
+from src.core.tokens import TokenType
+from src.runtime.environment import FunctionFrame
+from src.runtime.interpreter import Interpreter
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def find_all(node, node_type, value=None):
+    """Return every node of node_type (and value, if given) under node."""
+    found = []
+    if node.type == node_type and (value is None or node.value == value):
+        found.append(node)
+    for child in node.children:
+        found.extend(find_all(child, node_type, value))
+    return found
+
+
+class TestResolver(unittest.TestCase):
+    def test_function_locals_get_slots(self):
+        """Test that parameters and declarations are numbered in order."""
+        ast = parse('''
+        hawl isku_dar(a, b) {
+            door wadar = a + b
+            kuceli (i 1 ilaa 3) {
+                wadar = wadar + i
+            }
+            celi wadar
+        }
+        ''')
+        self.assertEqual(resolve(ast), [])
+        function = ast.children[0]
+        self.assertEqual(function.scope.names, ["a", "b", "wadar", "i"])
+        self.assertEqual(find_all(function, NodeType.LOOP_STATEMENT)[0].slot, (0, 3))
+        for identifier in find_all(function, NodeType.IDENTIFIER, "wadar"):
+            self.assertEqual(identifier.slot, (0, 2))
+
+    def test_enclosing_and_global_names(self):
+        """Test depth for enclosing function locals and None for globals."""
+        ast = parse('''
+        door x = 1
+        hawl outer(a) {
+            hawl inner(b) {
+                celi a + b + x
+            }
+            celi inner(2)
+        }
+        ''')
+        resolve(ast)
+        inner = find_all(ast, NodeType.FUNCTION_DEFINITION, "inner")[0]
+        slots = {
+            node.value: node.slot
+            for node in find_all(inner, NodeType.IDENTIFIER)
+            if hasattr(node, "slot")
+        }
+        self.assertEqual(slots, {"a": (1, 0), "b": (0, 0), "x": None})
+
+    def test_constness_and_types_are_recorded(self):
+        """Test that madoor and static types are recorded per slot."""
+        ast = parse('''
+        hawl f() {
+            madoor abn tiro = 5
+            qoraal magac = "Soplang"
+            door kale = 1
+        }
+        ''')
+        resolve(ast)
+        scope = ast.children[0].scope
+        self.assertEqual(scope.constants, {0})
+        self.assertEqual(scope.types, {0: TokenType.abn, 1: TokenType.QORAAL})
+        self.assertEqual(scope.checked, {0, 1})
+
+    def test_undefined_names_are_reported(self):
+        """Test that names bound nowhere are reported once, with their name."""
+        ast = parse('''
+        hawl f() {
+            celi aan_la_qeexin + 1
+        }
+        qor(aan_la_qeexin)
+        door y = 2
+        qor(y)
+        ''')
+        diagnostics = resolve(ast)
+        self.assertEqual(len(diagnostics), 1)
+        self.assertIn("aan_la_qeexin", str(diagnostics[0]))
+
+    def test_imports_and_function_references_are_not_reported(self):
+        """Test that ka_keen module names and shaandhee function names are defined."""
+        source = '''
+        hawl labanlaab(n) {
+            celi n * 2
+        }
+        door liis = [1, 2]
+        qor(liis.shaandhee(labanlaab))
+        '''
+        self.assertEqual(resolve(parse(source)), [])
+        source = 'ka_keen "maktabad.sop"\nqor(maktabad.qiime)\n'
+        self.assertEqual(resolve(parse(source)), [])
+
+    def test_compiled_calls_use_slot_frames(self):
+        """Test that compiled functions run in FunctionFrames."""
+        interpreter = Interpreter()
+        frames = []
+        interpreter.functions["qabso"] = lambda: frames.append(interpreter.env)
+        interpreter.interpret(parse("hawl f(a) {\n door b = a\n qabso()\n}\nf(3)\n"))
+        self.assertIsInstance(frames[0], FunctionFrame)
+        self.assertEqual(frames[0].slots, [3, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
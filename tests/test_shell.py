@@ -0,0 +1,63 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from src.runtime.shell import SoplangShell
+
+
+class TestShell(unittest.TestCase):
+    def setUp(self):
+        # Leave the user's ~/.soplang_history alone
+        with mock.patch.object(SoplangShell, "setup_history"):
+            self.shell = SoplangShell()
+
+    def run_lines(self, *lines):
+        """Execute each line in the shell and return everything it printed."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for line in lines:
+                self.shell.execute_code(line)
+        return output.getvalue()
+
+    def test_state_persists_between_lines(self):
+        """Test that variables, functions and lists survive from line to line."""
+        output = self.run_lines(
+            "door x = 5",
+            "hawl labanlaab(n) {\n    celi n * x\n}",
+            "x = x + 1",
+            "door liis = [1, 2]",
+            "liis.kudar(labanlaab(2))",
+            "qor(liis)",
+            'qor("a" + x)',
+        )
+        self.assertEqual(output.splitlines()[-2:], ["[1, 2, 12]", "a6"])
+
+    def test_no_subprocess(self):
+        """Test that input the old fast paths did not cover still runs in-process."""
+        with mock.patch("subprocess.run", side_effect=AssertionError):
+            output = self.run_lines(
+                "kuceli (i 1 ilaa 3) {\n    qor(i)\n}",
+                "haddii (run) {\n    qor(\"haa\")\n}",
+            )
+        self.assertEqual(output, "1\n2\n3\nhaa\n")
+
+    def test_echo(self):
+        """Test that declarations and lone expressions echo their values."""
+        output = self.run_lines(
+            "abn n = 4", 'qoraal s = "hi"', "n * 2 + 1", "n > 3 ? 1 : 0"
+        )
+        self.assertIn("=> n = 4 (abn)", output)
+        self.assertIn('=> s = "hi" (qoraal)', output)
+        self.assertIn("=> 9", output)
+        self.assertIn("=> 1", output)
+
+    def test_errors_keep_state(self):
+        """Test that an error is reported without losing earlier definitions."""
+        output = self.run_lines("door x = 1", "qor(maqan)", "x +", "qor(x)")
+        self.assertIn("maqan", output)
+        self.assertTrue(output.endswith("1\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
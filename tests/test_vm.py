@@ -0,0 +1,402 @@
+import builtins
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.core.lexer import Lexer
+from src.core.parser import Parser
+from src.runtime import bytecode, interpreter
+from src.runtime.codegen import BytecodeCompiler
+from src.runtime.interpreter import Interpreter
+from src.runtime.main import run_soplang_file
+from src.runtime.vm import VirtualMachine
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+
+
+def run_source(source, engine):
+    """Run a source snippet on the given engine and return everything it printed."""
+    random.seed(0)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        engine.interpret(Parser(Lexer(source).tokenize()).parse())
+    return output.getvalue()
+
+
+def run_file(path):
+    """Run a file on the VM through run_soplang_file and return its output."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_soplang_file(path, vm=True)
+    return output.getvalue()
+
+
+class TestVirtualMachine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, source):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_examples_match_interpreter(self):
+        """Test that the VM and the closure compiler print the same output."""
+        for filename in sorted(os.listdir(EXAMPLES_DIR)):
+            if not filename.endswith(".sop"):
+                continue
+            with open(os.path.join(EXAMPLES_DIR, filename)) as f:
+                source = f.read() + "\n"
+            if "gelin(" in source:
+                continue  # Needs interactive input
+            with self.subTest(example=filename):
+                try:
+                    expected = run_source(source, Interpreter())
+                except Exception as e:
+                    expected = type(e)
+                try:
+                    actual = run_source(source, VirtualMachine())
+                except Exception as e:
+                    actual = type(e)
+                self.assertEqual(actual, expected)
+
+    def test_locals_and_closures(self):
+        """Test slot locals, enclosing function locals and global assignment."""
+        source = '''
+        door x = 10
+        hawl outer(a) {
+            door y = a * 2
+            hawl inner(b) {
+                celi y + b + x
+            }
+            celi inner(1)
+        }
+        hawl setx(v) {
+            x = v
+        }
+        qor(outer(5))
+        setx(42)
+        qor(x)
+        '''
+        self.assertEqual(run_source(source, VirtualMachine()), "21\n42\n")
+
+    def test_parameter_shadows_global_hawl(self):
+        """Test that a hawl parameter shadows a global hawl of the same name."""
+        source = '''
+        hawl f(x) {
+            celi x + 100
+        }
+        hawl g(x) {
+            celi x + 1
+        }
+        hawl codsi(f, x) {
+            celi f(x)
+        }
+        hawl laba_jeer(f, x) {
+            door y = f(x)
+            celi f(y)
+        }
+        qor(codsi(g, 1))
+        qor(laba_jeer(g, 1))
+        qor(f(1))
+        '''
+        self.assertEqual(run_source(source, VirtualMachine()), "2\n3\n101\n")
+
+    def test_non_callable_parameter_keeps_builtin(self):
+        """Test that a parameter that is not a hawl does not hide a built-in."""
+        source = '''
+        hawl f(dherer) {
+            qor(dherer("abc"))
+        }
+        hawl g(dherer) {
+            celi dherer("abcd")
+        }
+        f(5)
+        qor(g(5))
+        '''
+        self.assertEqual(run_source(source, VirtualMachine()), "3\n4\n")
+
+    def test_control_flow_and_try(self):
+        """Test jumps for loops, switch and isku_day handlers."""
+        source = '''
+        door wadar = 0
+        kuceli (i 1 ilaa 20) {
+            haddii (i % 2 == 0) {
+                soco
+            }
+            haddii (i > 11) {
+                jooji
+            }
+            wadar = wadar + i
+        }
+        dooro (wadar) {
+            xaalad 36 {
+                qor("sax")
+            }
+        }
+        isku_day {
+            qor(1 / 0)
+        } qabo (khalad) {
+            qor(khalad)
+        }
+        '''
+        self.assertEqual(
+            run_source(source, VirtualMachine()),
+            run_source(source, Interpreter()),
+        )
+
+    def test_short_circuit_and_conditional(self):
+        """Test that &&, || and ?: jump over the operands they do not need."""
+        source = '''
+        door liis = null
+        qor(liis != null && liis[0] > 0)
+        qor(liis == null || liis[0] > 0)
+        qor(5 && "")
+        qor(liis == null ? "madhan" : liis[0])
+        '''
+        self.assertEqual(
+            run_source(source, VirtualMachine()), "False\nTrue\nFalse\nmadhan\n"
+        )
+
+    def test_switch_dispatch(self):
+        """Test dooro tables, in-order non-literal cases and ugudambeyn bodies."""
+        source = '''
+        hawl qiime(n) {
+            qor("qiime " + qoraal(n))
+            celi n
+        }
+        kuceli (i 1 ilaa 4) {
+            dooro (i) {
+                xaalad 1 {
+                    qor("kow")
+                }
+                xaalad qiime(2) {
+                    qor("laba")
+                }
+                xaalad 3 {
+                    qor("saddex")
+                }
+                ugudambeyn {
+                    door y = i * 10
+                    qor(y)
+                }
+            }
+        }
+        dooro ([1]) {
+            xaalad 1 {
+                qor("maya")
+            }
+        }
+        '''
+        expected = "kow\nqiime 2\nlaba\nqiime 2\nsaddex\nqiime 2\n40\n"
+        for engine in (Interpreter(tree_walk=True), Interpreter(), VirtualMachine()):
+            self.assertEqual(run_source(source, engine), expected)
+
+    def test_loop_ranges(self):
+        """Test kuceli steps, empty loops and bad bounds on every engine."""
+        source = '''
+        kuceli (i 5 ilaa 1 :: -2) {
+            qor(i)
+        }
+        kuceli (x 0 ilaa 1 :: 0.1) {
+            qor(x)
+        }
+        door k = 99
+        kuceli (k 5 ilaa 1) {
+            qor("mid")
+        }
+        qor(k)
+        kuceli (j 1 ilaa 5) {
+            qor(j)
+            j = j + 10
+        }
+        isku_day {
+            kuceli (m "a" ilaa 3) {
+                qor(m)
+            }
+        } qabo (khalad) {
+            qor(khalad)
+        }
+        '''
+        expected = (
+            "5\n3\n1\n"
+            "0\n0.1\n0.2\n0.30000000000000004\n0.4\n0.5\n0.6\n0.7\n"
+            "0.7999999999999999\n0.8999999999999999\n0.9999999999999999\n"
+            "99\n1\n2\n3\n4\n5\n"
+        )
+        for engine in (Interpreter(tree_walk=True), Interpreter(), VirtualMachine()):
+            with self.subTest(engine=type(engine).__name__):
+                output = run_source(source, engine)
+                self.assertTrue(output.startswith(expected))
+                self.assertIn("invalid_for_loop", output[len(expected):])
+
+    def test_deep_recursion(self):
+        """Test that calls between Soplang functions do not use the Python stack."""
+        source = '''
+        hawl tiri(n) {
+            haddii (n == 0) {
+                celi 0
+            }
+            celi 1 + tiri(n - 1)
+        }
+        qor(tiri(800))
+        '''
+        self.assertEqual(run_source(source, VirtualMachine()), "800\n")
+
+    def test_recursion_depth_and_tail_calls(self):
+        """Test deep recursion, tail calls and max_depth on every engine."""
+        source = '''
+        hawl tiri(n) {
+            haddii (n == 0) {
+                celi 0
+            }
+            celi 1 + tiri(n - 1)
+        }
+        hawl wareeg(n, wadar) {
+            haddii (n == 0) {
+                celi wadar
+            }
+            celi wareeg(n - 1, wadar + n)
+        }
+        hawl ilaali(n) {
+            isku_day {
+                celi wareeg_khalad(n)
+            } qabo (khalad) {
+                celi "qabtay"
+            }
+        }
+        hawl wareeg_khalad(n) {
+            haddii (n == 0) {
+                celi qoraal(1) / 0
+            }
+            celi wareeg_khalad(n - 1)
+        }
+        qor(tiri(20000))
+        qor(wareeg(50000, 0))
+        qor(ilaali(100))
+        '''
+        expected = "20000\n1250025000\nqabtay\n"
+        for engine in (Interpreter(tree_walk=True), Interpreter(), VirtualMachine()):
+            with self.subTest(engine=type(engine).__name__):
+                self.assertEqual(run_source(source, engine), expected)
+
+        # A chain of tail calls takes one level however long it is, while
+        # other recursion may go max_depth levels down and no further
+        source = '''
+        hawl wareeg(n) {
+            haddii (n == 0) {
+                celi "dhammaad"
+            }
+            celi wareeg(n - 1)
+        }
+        hawl tiri(n) {
+            haddii (n == 0) {
+                celi 0
+            }
+            celi 1 + tiri(n - 1)
+        }
+        qor(wareeg(1000))
+        qor(tiri(50))
+        isku_day {
+            tiri(51)
+        } qabo (khalad) {
+            qor(khalad)
+        }
+        '''
+        for engine in (
+            Interpreter(tree_walk=True, max_depth=50),
+            Interpreter(max_depth=50),
+            VirtualMachine(max_depth=50),
+        ):
+            with self.subTest(engine=type(engine).__name__):
+                output = run_source(source, engine).splitlines()
+                self.assertEqual(output[:2], ["dhammaad", "50"])
+                self.assertIn("tiri", output[2])
+                self.assertIn("50", output[2])
+
+    def test_stack_threads_are_limited(self):
+        """Test that deep recursion with no threads left is max_depth_exceeded."""
+        source = '''
+        hawl tiri(n) {
+            haddii (n == 0) {
+                celi 0
+            }
+            celi 1 + tiri(n - 1)
+        }
+        isku_day {
+            qor(tiri(20000))
+        } qabo (khalad) {
+            qor(khalad)
+        }
+        qor(tiri(10))
+        '''
+        failing_start = mock.patch.object(
+            threading.Thread, "start", side_effect=builtins.RuntimeError
+        )
+        few_threads = mock.patch.object(interpreter, "MAX_STACK_THREADS", 2)
+        for patch in (few_threads, failing_start):
+            for tree_walk in (True, False):
+                with self.subTest(tree_walk=tree_walk), patch:
+                    engine = Interpreter(tree_walk=tree_walk)
+                    output = run_source(source, engine).splitlines()
+                    self.assertIn("tiri", output[0])
+                    self.assertEqual(output[1], "10")
+
+    def test_serialization_round_trip(self):
+        """Test that code objects survive dumps/loads unchanged."""
+        source = '''
+        abn tiro = 5
+        hawl labanlaab(n) {
+            celi n * 2
+        }
+        qor(labanlaab(tiro))
+        '''
+        code = BytecodeCompiler().compile_program(
+            Parser(Lexer(source).tokenize()).parse()
+        )
+        restored = bytecode.loads(bytecode.dumps(code))
+        self.assertEqual(restored.to_tuple(), code.to_tuple())
+        self.assertEqual(restored.instructions, code.instructions)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            VirtualMachine().run_code(restored)
+        self.assertEqual(output.getvalue(), "10\n")
+
+    def test_fresh_cache_skips_parsing(self):
+        """Test that a fresh .sopc file is used instead of lexing and parsing."""
+        path = self.write("barnaamij.sop", 'qor("kow")\n')
+        self.assertEqual(run_file(path), "kow\n")
+        self.assertTrue(os.path.exists(bytecode.cache_path(path)))
+
+        with mock.patch.object(Lexer, "iter_tokens", side_effect=AssertionError):
+            self.assertEqual(run_file(path), "kow\n")
+
+    def test_stale_cache_is_recompiled(self):
+        """Test that editing the source invalidates the cached bytecode."""
+        path = self.write("barnaamij.sop", 'qor("kow")\n')
+        self.assertEqual(run_file(path), "kow\n")
+        self.write("barnaamij.sop", 'qor("labo")\n')
+        self.assertEqual(run_file(path), "labo\n")
+
+    def test_import_uses_cache(self):
+        """Test that ka_keen compiles imported files through the cache."""
+        library = self.write("maktabad.sop", "door qiime = 7\n")
+        source = f'ka_keen "{library}"\nqor(maktabad.qiime)\n'
+        path = self.write("barnaamij.sop", source)
+        self.assertEqual(run_file(path), "7\n")
+        self.assertTrue(os.path.exists(bytecode.cache_path(library)))
+
+
+if __name__ == '__main__':
+    unittest.main()